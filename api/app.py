@@ -2,7 +2,7 @@ from flask import Flask, jsonify
 from flask_swagger_ui import get_swaggerui_blueprint
 from flask_migrate import Migrate
 from .core.config import get_config
-from .routes import users, training_plans, exercise_types, workouts
+from .routes import users, training_plans, training_blocks, exercise_types, workouts, calendar
 from flask_talisman import Talisman
 from flask_cors import CORS
 import os
@@ -18,20 +18,39 @@ def create_app():
     
     # Initialize extensions
     from .core.models import init_db, db
+    from .core.compression import init_compression
+    from .core.negotiation import init_content_negotiation
+    from .core.pool import init_pool_telemetry, pool_status
+    from .core.routing import STICKY_HEADER, init_read_routing
+    from .core.query_stats import init_query_stats
+    from .core.slow_queries import init_slow_query_log
+    from .core.queries import init_query_cache, query_cache_status
+    from .core.search import init_exercise_search
+    from .core.catalog import catalog_status
     init_db(app)
+    init_exercise_search(app)
+    init_pool_telemetry(app)
+    init_read_routing(app)
+    init_query_stats(app)
+    init_slow_query_log(app)
+    init_query_cache(app)
+    init_content_negotiation(app)
+    init_compression(app)
     migrate = Migrate(app, db)
     
     # Environment settings
     env = os.getenv('FLASK_ENV', 'development')
-    is_development = env == 'development'
+    # The test client speaks plain HTTP, like a local dev server
+    is_development = env in ('development', 'testing')
     
     # Enable CORS - more permissive for development
     CORS(app, 
          resources={r"/api/*": {
              "origins": ["http://localhost:3000"] if is_development else ["https://your-production-domain.com"],
              "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-             "allow_headers": ["Content-Type", "Authorization", "Access-Control-Allow-Credentials"],
-             "expose_headers": ["Content-Type", "Authorization"],
+             "allow_headers": ["Content-Type", "Authorization", "Access-Control-Allow-Credentials", STICKY_HEADER],
+             "expose_headers": ["Content-Type", "Authorization", "ETag", "Link", "X-Next-Cursor", STICKY_HEADER,
+                                "X-DB-Queries", "X-DB-Repeated-Queries", "Server-Timing"],
              "supports_credentials": True
          }})
     
@@ -58,11 +77,23 @@ def create_app():
             'version': '1.0.0'
         })
     
+    @app.route('/api/health/db')
+    def database_health():
+        """Connection pool, statement cache and catalog cache telemetry."""
+        return jsonify({
+            'profile': app.config.get('DB_POOL_PROFILE'),
+            'pools': pool_status(),
+            'query_cache': query_cache_status(),
+            'exercise_catalog': catalog_status()
+        })
+    
     # Register blueprints
     app.register_blueprint(users.bp)
     app.register_blueprint(training_plans.bp)
+    app.register_blueprint(training_blocks.bp)
     app.register_blueprint(exercise_types.bp)
     app.register_blueprint(workouts.bp)
+    app.register_blueprint(calendar.bp)
     
     # Swagger UI
     SWAGGER_URL = '/api/docs'
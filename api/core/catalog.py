@@ -0,0 +1,196 @@
+"""Process-local cache of the exercise catalog.
+
+The exercise types are read on nearly every screen and rarely written, so
+each worker keeps a snapshot of them: the serialized rows and, built on
+first use, the encoded response body per content type (JSON, MessagePack,
+NDJSON) for the whole list and for each exercise type. A cached request
+encodes nothing and loads no rows.
+
+Coherence across workers uses the same version as conditional GETs, the
+max(updated_at), count(*) of exercise_types (see conditional.py). It is
+checked at most every EXERCISE_CATALOG_CHECK_SECONDS, so a write made by
+another worker (or in SQL) shows up within that interval. The worker that
+handles a create or delete drops its snapshot right away:
+
+    db.session.commit()
+    exercise_catalog.invalidate()
+
+Only the full representation is cached. Requests with ?fields= or
+pagination parameters go through the serializer as before. Hit, miss and
+staleness counts are reported under exercise_catalog at /api/health/db.
+"""
+
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Response, abort, current_app, request
+
+from .conditional import collection_etag, is_not_modified, not_modified, resource_etag, rows_version, version_statement
+from .models import db, ExerciseType
+from .negotiation import MSGPACK_MIMETYPE, NDJSON_MIMETYPE, best_mimetype, dumps_json, dumps_msgpack
+from .pagination import exercise_type_keyset
+from .queries import ALL_EXERCISE_TYPES
+from .serializers import exercise_type_serializer
+
+DEFAULT_CHECK_SECONDS = 1.0
+
+CATALOG = exercise_type_keyset.order(ALL_EXERCISE_TYPES)
+CATALOG_VERSION = version_statement(ExerciseType, ALL_EXERCISE_TYPES)
+
+
+def _encode(data: Any, mimetype: str) -> bytes:
+    if mimetype == MSGPACK_MIMETYPE:
+        return dumps_msgpack(data)
+    if mimetype == NDJSON_MIMETYPE:
+        return b''.join(dumps_json(row) + b'\n' for row in data)
+    return dumps_json(data)
+
+
+class CatalogSnapshot:
+    """The exercise types as loaded at one version, with their encoded bodies.
+
+    Args:
+        rows: Serialized exercise types in catalog order
+        version: (max(updated_at), count) of the rows
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], version: Tuple[Any, int]):
+        self.rows = rows
+        self.version = version
+        self.by_id = {row['id']: row for row in rows}
+        self.loaded_at = self.checked_at = time.monotonic()
+        # Filled on first use; a race only encodes the same bytes twice
+        self._bodies: Dict[Tuple[Optional[int], str], bytes] = {}
+
+    def body(self, mimetype: str, type_id: Optional[int] = None) -> bytes:
+        """The encoded list, or one exercise type when type_id is given."""
+        key = (type_id, mimetype)
+        body = self._bodies.get(key)
+        if body is None:
+            body = self._bodies[key] = _encode(self.rows if type_id is None else self.by_id[type_id], mimetype)
+        return body
+
+
+class ExerciseCatalog:
+    """Versioned, process-local cache of the exercise types."""
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        # Bumped by invalidate(), so a load that raced with a write is not kept
+        self._generation = 0
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def _check_seconds(self) -> float:
+        return current_app.config.get('EXERCISE_CATALOG_CHECK_SECONDS', DEFAULT_CHECK_SECONDS)
+
+    def snapshot(self, recheck: bool = False) -> CatalogSnapshot:
+        """Return a current snapshot, loading one when missing or out of date.
+
+        Args:
+            recheck: Check the version even within the check interval
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            now = time.monotonic()
+            if not recheck and now - snapshot.checked_at < self._check_seconds():
+                self._count('hits')
+                return snapshot
+            self._count('version_checks')
+            version = tuple(db.session.execute(CATALOG_VERSION).one())
+            if version == snapshot.version:
+                snapshot.checked_at = now
+                self._count('hits')
+                return snapshot
+            # Written by another worker, or outside the API
+            self._count('stale')
+
+        self._count('misses')
+        generation = self._generation
+        objs = db.session.execute(CATALOG).scalars().all()
+        snapshot = CatalogSnapshot(exercise_type_serializer.to_dicts(objs), rows_version(objs))
+        with self._lock:
+            if generation == self._generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        """Drop the snapshot after this worker wrote to exercise_types."""
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+            self._counts['invalidations'] += 1
+
+    def collection_response(self) -> Response:
+        """Render the whole catalog as a conditional GET.
+
+        Returns:
+            Response with ETag and Vary: Accept set, with the same tags as
+            exercise_type_serializer.query_response()
+        """
+        snapshot = self.snapshot()
+        variant = best_mimetype(NDJSON_MIMETYPE)
+        return self._respond(collection_etag(ExerciseType, snapshot.version, variant),
+                             lambda: snapshot.body(variant), variant)
+
+    def resource_response(self, type_id: int) -> Response:
+        """Render one exercise type as a conditional GET.
+
+        An ID missing from the snapshot triggers a version check first, so
+        an exercise type just created by another worker is not reported as
+        missing.
+
+        Returns:
+            Response with ETag set, or 404 if the exercise type does not exist
+        """
+        snapshot = self.snapshot()
+        if type_id not in snapshot.by_id:
+            snapshot = self.snapshot(recheck=True)
+            if type_id not in snapshot.by_id:
+                abort(404)
+        variant = best_mimetype()
+        etag = resource_etag(ExerciseType, snapshot.by_id[type_id]['updated_at'], variant)
+        return self._respond(etag, lambda: snapshot.body(variant, type_id), variant)
+
+    @staticmethod
+    def _respond(etag: str, body, variant: str) -> Response:
+        if is_not_modified(etag):
+            response = not_modified(etag)
+        else:
+            response = Response(body(), mimetype=variant)
+            response.set_etag(etag)
+        response.vary.add('Accept')
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Counts plus the snapshot's age and time since its version was last confirmed."""
+        with self._lock:
+            snapshot = self._snapshot
+            counts = {name: self._counts[name] for name in ('hits', 'misses', 'version_checks', 'stale', 'invalidations')}
+        now = time.monotonic()
+        return {
+            'size': len(snapshot.rows) if snapshot else 0,
+            **counts,
+            'age_seconds': round(now - snapshot.loaded_at, 3) if snapshot else None,
+            'unchecked_seconds': round(now - snapshot.checked_at, 3) if snapshot else None,
+            'check_seconds': self._check_seconds()
+        }
+
+
+exercise_catalog = ExerciseCatalog()
+
+
+def serves_full_catalog() -> bool:
+    """Whether the request asks for the cached representation (no fields or page)."""
+    return not any(name in request.args for name in ('fields', 'limit', 'after'))
+
+
+def catalog_status() -> Dict[str, Any]:
+    """Hit/miss and staleness counts of the exercise catalog cache."""
+    return exercise_catalog.stats()
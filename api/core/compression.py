@@ -0,0 +1,176 @@
+"""Response compression for the API.
+
+Workout payloads are repetitive JSON (the same exercise/set keys over and
+over), so they compress very well. After each request the response body is
+compressed with the best algorithm the client accepts:
+
+- br: Brotli, if the optional `brotli` package is installed
+- zstd: Zstandard, if the optional `zstandard` package is installed
+- gzip: Always available
+
+Buffered responses smaller than COMPRESS_MIN_SIZE are left alone, as are
+responses that already carry a Content-Encoding and non-text content types.
+Streaming responses (NDJSON) are compressed incrementally, flushing after
+each chunk so clients still receive rows as they are produced.
+
+Configuration:
+    COMPRESS_ALGORITHMS: Server preference order, e.g. ['br', 'zstd', 'gzip']
+    COMPRESS_LEVELS: Compression level per algorithm
+    COMPRESS_MIN_SIZE: Minimum body size in bytes for buffered responses
+"""
+
+import zlib
+from typing import Dict, Iterable, Iterator, Optional
+
+from flask import Flask, Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/msgpack',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+}
+
+
+class _GzipStream:
+    """Incremental gzip compressor."""
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    """Incremental Brotli compressor."""
+
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    """Incremental Zstandard compressor."""
+
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def _gzip(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _brotli(data: bytes, level: int) -> bytes:
+    return brotli.compress(data, quality=level)
+
+
+def _zstd(data: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+# Content-coding -> (one-shot compressor, incremental compressor class)
+CODECS: Dict[str, tuple] = {'gzip': (_gzip, _GzipStream)}
+if brotli is not None:
+    CODECS['br'] = (_brotli, _BrotliStream)
+if zstandard is not None:
+    CODECS['zstd'] = (_zstd, _ZstdStream)
+
+DEFAULT_LEVELS = {'br': 4, 'zstd': 3, 'gzip': 6}
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress a complete body with the given content-coding."""
+    compress_func, _ = CODECS[encoding]
+    return compress_func(data, DEFAULT_LEVELS[encoding] if level is None else level)
+
+
+def _compress_stream(chunks: Iterable[bytes], stream) -> Iterator[bytes]:
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            if chunk:
+                yield stream.compress(chunk)
+        yield stream.finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def _is_compressible(response: Response) -> bool:
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return False
+    if response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return False
+    mimetype = response.mimetype or ''
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def init_compression(app: Flask) -> None:
+    """Register response compression on the Flask app."""
+    app.config.setdefault('COMPRESS_ALGORITHMS', ['br', 'zstd', 'gzip'])
+    app.config.setdefault('COMPRESS_LEVELS', DEFAULT_LEVELS)
+    app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+
+    algorithms = [name for name in app.config['COMPRESS_ALGORITHMS'] if name in CODECS]
+    levels = {**DEFAULT_LEVELS, **app.config['COMPRESS_LEVELS']}
+    min_size = app.config['COMPRESS_MIN_SIZE']
+
+    @app.after_request
+    def compress_response(response: Response) -> Response:
+        if not algorithms or not _is_compressible(response):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(algorithms)
+        if encoding is None:
+            return response
+
+        compress_func, stream_class = CODECS[encoding]
+        level = levels[encoding]
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, stream_class(level))
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < min_size:
+                return response
+            response.set_data(compress_func(body, level))
+
+        response.headers['Content-Encoding'] = encoding
+
+        # The compressed bytes differ from the identity representation, so a
+        # strong validator would be wrong; weak comparison still matches it.
+        etag, is_weak = response.get_etag()
+        if etag and not is_weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,96 @@
+"""Conditional GET support for the API.
+
+ETags are derived from the updated_at column rather than from response
+bodies, so a request carrying a matching If-None-Match can be answered with
+304 Not Modified before any row is loaded or serialized:
+
+- Single resources: a primary-key lookup of updated_at only
+- Collections: one max(updated_at), count(*) aggregate over the same filter
+
+These version probes are not counted against a view's query_budget().
+
+Every part of the request that shapes the body (path, query string and
+negotiated content type) is mixed into the tag, so different representations
+never share an ETag.
+"""
+
+import hashlib
+from datetime import datetime
+from http import HTTPStatus
+from typing import Any, Iterable, Optional, Tuple
+
+from flask import Response, abort, request
+from sqlalchemy import bindparam, func
+
+from .models import db
+from .queries import statement_cache
+from .query_stats import version_probe
+
+
+def make_etag(*parts: Any) -> str:
+    """Hash the given parts into an opaque strong ETag value."""
+    raw = '|'.join(str(part) for part in parts).encode()
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def resource_etag(model, updated_at: Optional[datetime], variant: str) -> str:
+    """ETag for a single row of the given model."""
+    return make_etag(model.__tablename__, request.full_path, variant, updated_at)
+
+
+def collection_etag(model, version: Tuple[Optional[datetime], int], variant: str) -> str:
+    """ETag for a collection described by its (max(updated_at), count) version."""
+    return make_etag(model.__tablename__, request.full_path, variant, *version)
+
+
+def resource_version(model, ident) -> Optional[datetime]:
+    """Fetch only updated_at for a row.
+
+    Raises:
+        404: If the row does not exist
+    """
+    stmt = statement_cache.get(
+        ('resource_version', model),
+        lambda: db.select(model.updated_at).where(model.id == bindparam('ident'))
+    )
+    with version_probe():
+        row = db.session.execute(stmt, {'ident': ident}).one_or_none()
+    if row is None:
+        abort(404)
+    return row[0]
+
+
+def version_statement(model, stmt):
+    """Build the max(updated_at), count(*) aggregate over the rows a select would return.
+
+    The select is wrapped as a subquery so that LIMIT (as used by a page of
+    a paginated collection) is honoured.
+    """
+    rows = stmt.with_only_columns(model.updated_at).subquery()
+    return db.select(func.max(rows.c.updated_at), func.count()).select_from(rows)
+
+
+def collection_version(model, stmt, params: Optional[dict] = None) -> Tuple[Optional[datetime], int]:
+    """Compute max(updated_at), count(*) over the rows a select would return."""
+    with version_probe():
+        max_updated_at, count = db.session.execute(version_statement(model, stmt), params).one()
+    return max_updated_at, count
+
+
+def rows_version(rows: Iterable) -> Tuple[Optional[datetime], int]:
+    """Compute the same version as collection_version from already loaded rows."""
+    rows = list(rows)
+    max_updated_at = max((row.updated_at for row in rows if row.updated_at is not None), default=None)
+    return max_updated_at, len(rows)
+
+
+def is_not_modified(etag: str) -> bool:
+    """Check the request's If-None-Match against an ETag."""
+    return request.if_none_match.contains_weak(etag)
+
+
+def not_modified(etag: str) -> Response:
+    """Build an empty 304 response carrying the ETag."""
+    response = Response(status=HTTPStatus.NOT_MODIFIED)
+    response.set_etag(etag)
+    return response
@@ -4,6 +4,8 @@ import os
 from typing import Dict, Any
 from pathlib import Path
 import logging
+from .pool import database_url, engine_options, pool_profile
+from .routing import replica_binds
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -26,17 +28,41 @@ class Config:
     
     # Database
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
+    DB_POOL_PROFILE = pool_profile()
+    SQLALCHEMY_DATABASE_URI = database_url(os.getenv('DATABASE_URL'), DB_POOL_PROFILE)
     logger.debug(f"Environment DATABASE_URL: {os.getenv('DATABASE_URL')}")
     
     if not SQLALCHEMY_DATABASE_URI:
         logger.warning("No DATABASE_URL found in environment, falling back to SQLite")
         SQLALCHEMY_DATABASE_URI = 'sqlite:///app.db'
-    elif SQLALCHEMY_DATABASE_URI.startswith('postgres://'):
-        SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace('postgres://', 'postgresql://', 1)
     
     logger.debug(f"Final Database URL: {SQLALCHEMY_DATABASE_URI}")
     
+    # Connection pooling, see core/pool.py
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI, DB_POOL_PROFILE)
+    DB_POOL_SLOW_WAIT_MS = float(os.getenv('DB_POOL_SLOW_WAIT_MS', 100))
+    
+    # Read replica for GET requests, see core/routing.py; the replica URL is
+    # used as given since POSTGRES_PRISMA_URL points at the primary
+    DB_REPLICA_URL = database_url(os.getenv('DB_REPLICA_URL'), DB_POOL_PROFILE, pooled=False)
+    SQLALCHEMY_BINDS = replica_binds(DB_REPLICA_URL, engine_options(DB_REPLICA_URL, DB_POOL_PROFILE))
+    DB_STICKY_SECONDS = int(os.getenv('DB_STICKY_SECONDS', 5))
+    
+    # Slow-query log, see core/slow_queries.py; disabled unless a threshold is set
+    DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 0))
+    DB_SLOW_QUERY_EXPLAIN_RATE = float(os.getenv('DB_SLOW_QUERY_EXPLAIN_RATE', 0))
+    if os.getenv('DB_SLOW_QUERY_EXPLAIN_FILE'):
+        DB_SLOW_QUERY_EXPLAIN_FILE = os.getenv('DB_SLOW_QUERY_EXPLAIN_FILE')
+    
+    # Exercise catalog cache, see core/catalog.py; other workers' writes show
+    # up within this many seconds
+    EXERCISE_CATALOG_CHECK_SECONDS = float(os.getenv('EXERCISE_CATALOG_CHECK_SECONDS', 1))
+    
+    # Response compression
+    COMPRESS_ALGORITHMS = ['br', 'zstd', 'gzip']
+    COMPRESS_LEVELS = {'br': 4, 'zstd': 3, 'gzip': 6}
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    
     # Security
     SESSION_COOKIE_SECURE = True
     REMEMBER_COOKIE_SECURE = True
@@ -48,6 +74,14 @@ class DevelopmentConfig(Config):
     DEVELOPMENT = True
     SESSION_COOKIE_SECURE = False
     REMEMBER_COOKIE_SECURE = False
+    
+    # A single developer needs few connections; keep Neon's limit for others
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        Config.SQLALCHEMY_DATABASE_URI, Config.DB_POOL_PROFILE, pool_size=2, max_overflow=3
+    )
+    SQLALCHEMY_BINDS = replica_binds(Config.DB_REPLICA_URL, engine_options(
+        Config.DB_REPLICA_URL, Config.DB_POOL_PROFILE, pool_size=2, max_overflow=3
+    ))
 
 class ProductionConfig(Config):
     """Production configuration."""
@@ -65,6 +99,8 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SQLALCHEMY_BINDS = {}
     SESSION_COOKIE_SECURE = False
     REMEMBER_COOKIE_SECURE = False
 
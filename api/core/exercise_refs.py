@@ -0,0 +1,179 @@
+"""Inverted index from exercise types to the workouts that use them.
+
+WorkoutExerciseRef rows mirror the exercise_type_id values in each
+workout's exercises JSON. The write paths report the same (before, after)
+WorkoutState pairs as for the volume rollups:
+
+    before = WorkoutState.of(workout)
+    workout.exercises = data['exercises']
+    sync_exercise_refs([(before, WorkoutState.of(workout))])
+
+Only the difference is written, each kind in one executemany: refs of
+exercise types added to or removed from a workout, and the planned_date of
+the remaining refs when the workout was rescheduled. Writes that change
+neither (renames, status changes, logged sets) cost no queries.
+
+The index answers which workouts use an exercise (history_statement()) and
+whether an exercise type is still referenced (is_referenced()) without
+reading any workout document.
+"""
+
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam
+
+from .models import db, TrainingBlock, TrainingPlan, Workout, WorkoutExerciseRef
+from .rollups import WorkoutState
+from .set_logs import load_set_logs, merge_set_logs
+
+
+def referenced_types(exercises: Any) -> Set[int]:
+    """The exercise_type_id values of an exercises document."""
+    if not isinstance(exercises, dict) or not isinstance(exercises.get('exercises'), list):
+        return set()
+    return {
+        exercise['exercise_type_id'] for exercise in exercises['exercises']
+        if isinstance(exercise, dict) and isinstance(exercise.get('exercise_type_id'), int)
+        and not isinstance(exercise['exercise_type_id'], bool)
+    }
+
+
+def sync_exercise_refs(changes: Iterable[Tuple[Optional[WorkoutState], Optional[WorkoutState]]]) -> None:
+    """Apply workout changes to the exercise refs, in the current transaction.
+
+    Args:
+        changes: (before, after) state pairs; before is None for created
+            workouts and after is None for deleted ones
+    """
+    table = WorkoutExerciseRef.__table__
+    added: List[Dict[str, Any]] = []
+    removed: List[Dict[str, Any]] = []
+    moved: List[Dict[str, Any]] = []
+    for before, after in changes:
+        old = referenced_types(before.exercises) if before is not None else set()
+        new = referenced_types(after.exercises) if after is not None else set()
+        workout_id = after.id if after is not None else before.id
+        removed.extend({'ref_workout_id': workout_id, 'ref_type_id': type_id} for type_id in old - new)
+        added.extend(
+            {'exercise_type_id': type_id, 'workout_id': workout_id, 'planned_date': after.planned_date}
+            for type_id in new - old
+        )
+        if old & new and before.planned_date != after.planned_date:
+            moved.append({'ref_workout_id': workout_id, 'ref_planned_date': after.planned_date})
+
+    if removed:
+        db.session.execute(
+            db.delete(table).where(
+                table.c.workout_id == bindparam('ref_workout_id'),
+                table.c.exercise_type_id == bindparam('ref_type_id')
+            ),
+            removed
+        )
+    if moved:
+        db.session.execute(
+            db.update(table)
+            .where(table.c.workout_id == bindparam('ref_workout_id'))
+            .values(planned_date=bindparam('ref_planned_date')),
+            moved
+        )
+    if added:
+        db.session.execute(db.insert(table), added)
+
+
+def rebuild_exercise_refs(batch_size: int = 500) -> int:
+    """Recompute the exercise refs from every workout, in the current transaction.
+
+    Args:
+        batch_size: Workouts loaded per round trip
+
+    Returns:
+        Number of ref rows written
+    """
+    table = WorkoutExerciseRef.__table__
+    db.session.execute(db.delete(table))
+    written = 0
+    result = db.session.execute(
+        db.select(Workout.id, Workout.planned_date, Workout.exercises)
+        .order_by(Workout.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for batch in result.partitions():
+        rows = [
+            {'exercise_type_id': type_id, 'workout_id': workout_id, 'planned_date': planned_date}
+            for workout_id, planned_date, exercises in batch
+            for type_id in referenced_types(exercises)
+        ]
+        if rows:
+            db.session.execute(db.insert(table), rows)
+            written += len(rows)
+    return written
+
+
+def is_referenced(exercise_type_id: int) -> bool:
+    """Whether any workout uses the exercise type; one index probe."""
+    return db.session.scalar(db.select(
+        db.select(WorkoutExerciseRef.workout_id)
+        .where(WorkoutExerciseRef.exercise_type_id == exercise_type_id)
+        .exists()
+    ))
+
+
+def history_statement(exercise_type_id: int, start: Optional[date] = None, end: Optional[date] = None,
+                      user_id: Optional[int] = None):
+    """Select the workouts using an exercise type, through the refs index.
+
+    Rows carry workout_id and planned_date from the index, so they can be
+    ordered and paginated by exercise_history_keyset.
+
+    Args:
+        exercise_type_id: Exercise type ID
+        start: First planned date, inclusive
+        end: Last planned date, inclusive
+        user_id: Only this user's workouts
+    """
+    stmt = (
+        db.select(
+            WorkoutExerciseRef.workout_id, WorkoutExerciseRef.planned_date, Workout.name,
+            Workout.actual_date, Workout.status, Workout.block_id, Workout.exercises
+        )
+        .join(Workout, Workout.id == WorkoutExerciseRef.workout_id)
+        .where(WorkoutExerciseRef.exercise_type_id == exercise_type_id)
+    )
+    if start is not None:
+        stmt = stmt.where(WorkoutExerciseRef.planned_date >= start)
+    if end is not None:
+        stmt = stmt.where(WorkoutExerciseRef.planned_date <= end)
+    if user_id is not None:
+        stmt = (
+            stmt.join(TrainingBlock, Workout.block_id == TrainingBlock.id)
+            .join(TrainingPlan, TrainingBlock.plan_id == TrainingPlan.id)
+            .where(TrainingPlan.user_id == user_id)
+        )
+    return stmt
+
+
+def history_rows(rows: Iterable[Any], exercise_type_id: int) -> List[Dict[str, Any]]:
+    """Shape history rows, keeping only the entries of the exercise type.
+
+    Logged sets from set_logs are merged into the entries with one query.
+    """
+    rows = list(rows)
+    logs = load_set_logs([row.workout_id for row in rows])
+    history = []
+    for row in rows:
+        exercises = merge_set_logs(row.exercises, logs[row.workout_id]) if row.workout_id in logs else row.exercises
+        entries = exercises.get('exercises') if isinstance(exercises, dict) else None
+        history.append({
+            'workout_id': row.workout_id,
+            'name': row.name,
+            'planned_date': row.planned_date,
+            'actual_date': row.actual_date,
+            'status': row.status,
+            'block_id': row.block_id,
+            'exercises': [
+                exercise for exercise in entries or []
+                if isinstance(exercise, dict) and exercise.get('exercise_type_id') == exercise_type_id
+            ]
+        })
+    return history
@@ -0,0 +1,397 @@
+"""Partial updates of JSON documents: JSON Patch and JSON Merge Patch.
+
+Both formats describe only the change to a document:
+
+- JSON Patch (RFC 6902): a list of add/remove/replace/move/copy/test
+  operations addressed by JSON Pointers (RFC 6901)
+- JSON Merge Patch (RFC 7386): an object merged into the document, where
+  null deletes a member
+
+On Postgres a patch is compiled to a single UPDATE built from jsonb_set,
+jsonb_insert, #- and ||, so the document is changed in the database without
+being read into Python. The stored row is locked while the statement runs,
+so two clients patching the same workout never lose each other's changes,
+and the UPDATE returns the document as it was before and after the patch.
+Elsewhere (SQLite) the patch is applied in Python by apply_json_patch() /
+apply_merge_patch(), with the same semantics.
+
+Example:
+    patched = patch_json_column(
+        Workout, workout_id, 'exercises', MERGE_PATCH, {'name': 'Push day'},
+        returning=(Workout.block_id,)
+    )
+    if patched is not None:
+        block_id, = patched.values
+"""
+
+import copy
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import Text, case, cast, func, literal, select, true, type_coerce
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.exc import DBAPIError
+
+from .models import db
+
+JSON_PATCH = 'application/json-patch+json'
+MERGE_PATCH = 'application/merge-patch+json'
+
+PATCH_OPERATIONS = {'add', 'remove', 'replace', 'move', 'copy', 'test'}
+_ARRAY_INDEX = re.compile(r'^(0|[1-9][0-9]*)$')
+
+
+class JsonPatchError(ValueError):
+    """The patch document is malformed."""
+
+
+class JsonPatchConflict(ValueError):
+    """The patch cannot be applied to the current document (missing path, failed test)."""
+
+
+class PatchedRow(NamedTuple):
+    """A row changed by patch_json_column()."""
+    before: Any  # Document before the patch
+    after: Any  # Document after the patch
+    values: Tuple[Any, ...]  # The requested returning columns
+
+
+def parse_pointer(pointer: Any) -> List[str]:
+    """Split a JSON Pointer such as "/exercises/0/logs" into reference tokens.
+
+    Raises:
+        JsonPatchError: If pointer is not a valid JSON Pointer
+    """
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith('/')):
+        raise JsonPatchError(f"Invalid JSON Pointer: {pointer!r}")
+    if not pointer:
+        return []
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def validate_json_patch(operations: Any) -> List[Dict[str, Any]]:
+    """Check a JSON Patch document and parse its pointers.
+
+    Returns:
+        Operations with "path" (and "from") replaced by token lists
+
+    Raises:
+        JsonPatchError: If the document is malformed
+    """
+    if not isinstance(operations, list):
+        raise JsonPatchError("A JSON Patch must be an array of operations")
+
+    parsed = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in PATCH_OPERATIONS:
+            raise JsonPatchError(f"Operation {index}: op must be one of {', '.join(sorted(PATCH_OPERATIONS))}")
+        op = operation['op']
+        step = {'op': op, 'path': parse_pointer(operation.get('path'))}
+        if op in ('add', 'replace', 'test'):
+            if 'value' not in operation:
+                raise JsonPatchError(f"Operation {index}: {op} requires a value")
+            step['value'] = operation['value']
+        if op in ('move', 'copy'):
+            step['from'] = parse_pointer(operation.get('from'))
+            if op == 'move' and step['path'][:len(step['from'])] == step['from'] and step['path'] != step['from']:
+                raise JsonPatchError(f"Operation {index}: cannot move a value into itself")
+        parsed.append(step)
+    return parsed
+
+
+# Python application
+
+def _json_equal(a: Any, b: Any) -> bool:
+    """JSON equality: unlike ==, true is not 1 and key order does not matter."""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[key], b[key]) for key in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def _child(container: Any, token: str, path: List[str]) -> Any:
+    if isinstance(container, dict) and token in container:
+        return container[token]
+    if isinstance(container, list) and _ARRAY_INDEX.match(token) and int(token) < len(container):
+        return container[int(token)]
+    raise JsonPatchConflict(f"Path not found: /{'/'.join(path)}")
+
+
+def _get(document: Any, path: List[str]) -> Any:
+    for depth, token in enumerate(path):
+        document = _child(document, token, path[:depth + 1])
+    return document
+
+
+def _add(document: Any, path: List[str], value: Any) -> Any:
+    if not path:
+        return value
+    parent, token = _get(document, path[:-1]), path[-1]
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list):
+        if token == '-':
+            parent.append(value)
+        elif _ARRAY_INDEX.match(token) and int(token) <= len(parent):
+            parent.insert(int(token), value)
+        else:
+            raise JsonPatchConflict(f"Invalid array index: /{'/'.join(path)}")
+    else:
+        raise JsonPatchConflict(f"Path not found: /{'/'.join(path[:-1])}")
+    return document
+
+
+def _remove(document: Any, path: List[str]) -> Any:
+    if not path:
+        raise JsonPatchConflict("Cannot remove the whole document")
+    parent = _get(document, path[:-1])
+    _child(parent, path[-1], path)
+    if isinstance(parent, dict):
+        del parent[path[-1]]
+    else:
+        del parent[int(path[-1])]
+    return document
+
+
+def apply_json_patch(document: Any, operations: Any) -> Any:
+    """Apply a JSON Patch to a copy of a document.
+
+    Raises:
+        JsonPatchError: If the patch is malformed
+        JsonPatchConflict: If an operation does not apply to the document
+    """
+    document = copy.deepcopy(document)
+    for step in validate_json_patch(operations):
+        op, path = step['op'], step['path']
+        if op == 'add':
+            document = _add(document, path, copy.deepcopy(step['value']))
+        elif op == 'remove':
+            document = _remove(document, path)
+        elif op == 'replace':
+            if not path:
+                document = copy.deepcopy(step['value'])
+            else:
+                parent = _get(document, path[:-1])
+                _child(parent, path[-1], path)
+                parent[path[-1] if isinstance(parent, dict) else int(path[-1])] = copy.deepcopy(step['value'])
+        elif op == 'move':
+            value = _get(document, step['from'])
+            document = _add(_remove(document, step['from']), path, value)
+        elif op == 'copy':
+            document = _add(document, path, copy.deepcopy(_get(document, step['from'])))
+        elif not _json_equal(_get(document, path), step['value']):
+            raise JsonPatchConflict(f"Test failed: /{'/'.join(path)}")
+    return document
+
+
+def apply_merge_patch(document: Any, patch: Any) -> Any:
+    """Apply a JSON Merge Patch, returning a new document."""
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = copy.deepcopy(document) if isinstance(document, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+
+# SQL compilation (Postgres)
+
+# A step maps the document expression to (new document, precondition or None)
+Step = Callable[[Any], Tuple[Any, Optional[Any]]]
+
+
+def _path(tokens: List[str]):
+    return literal(tokens, ARRAY(Text))
+
+
+def _value(value: Any):
+    # Cast explicitly: as an argument of jsonb_build_array() an untyped
+    # parameter would be taken as text
+    return cast(literal(value, JSONB), JSONB)
+
+
+def _at(document, tokens: List[str]):
+    return document if not tokens else document.op('#>', return_type=JSONB)(_path(tokens))
+
+
+def _typeof(document, tokens: List[str]):
+    return func.jsonb_typeof(_at(document, tokens))
+
+
+def _exists(document, tokens: List[str]):
+    return _at(document, tokens).is_not(None)
+
+
+def _sql_add(document, tokens: List[str], value) -> Tuple[Any, Any]:
+    if not tokens:
+        return value, None
+    parent, token = tokens[:-1], tokens[-1]
+    parent_type = _typeof(document, parent)
+
+    if token == '-':
+        if not parent:
+            return document.op('||', return_type=JSONB)(func.jsonb_build_array(value)), parent_type == 'array'
+        appended = _at(document, parent).op('||', return_type=JSONB)(func.jsonb_build_array(value))
+        return func.jsonb_set(document, _path(parent), appended, type_=JSONB), parent_type == 'array'
+
+    new_document = case(
+        (parent_type == 'array', func.jsonb_insert(document, _path(tokens), value, type_=JSONB)),
+        else_=func.jsonb_set(document, _path(tokens), value, True, type_=JSONB)
+    )
+    if _ARRAY_INDEX.match(token):
+        check = case(
+            (parent_type == 'object', true()),
+            (parent_type == 'array', func.jsonb_array_length(_at(document, parent)) >= int(token)),
+            else_=False
+        )
+    else:
+        check = parent_type == 'object'
+    return new_document, check
+
+
+def _sql_remove(document, tokens: List[str]) -> Any:
+    return document.op('#-', return_type=JSONB)(_path(tokens))
+
+
+def _json_patch_steps(operations: List[Dict[str, Any]]) -> List[Step]:
+    steps = []
+    for step in operations:
+        op, path = step['op'], step['path']
+        if op == 'remove' and not path:
+            raise JsonPatchConflict("Cannot remove the whole document")
+
+        if op == 'add':
+            steps.append(lambda d, path=path, value=step['value']: _sql_add(d, path, _value(value)))
+        elif op == 'remove':
+            steps.append(lambda d, path=path: (_sql_remove(d, path), _exists(d, path)))
+        elif op == 'replace':
+            steps.append(lambda d, path=path, value=step['value']: (
+                func.jsonb_set(d, _path(path), _value(value), False, type_=JSONB) if path else _value(value),
+                _exists(d, path)
+            ))
+        elif op == 'move':
+            def move(d, path=path, source=step['from']):
+                document, check = _sql_add(_sql_remove(d, source), path, _at(d, source))
+                return document, _exists(d, source) if check is None else _exists(d, source) & check
+            steps.append(move)
+        elif op == 'copy':
+            def copy_(d, path=path, source=step['from']):
+                document, check = _sql_add(d, path, _at(d, source))
+                return document, _exists(d, source) if check is None else _exists(d, source) & check
+            steps.append(copy_)
+        else:
+            steps.append(lambda d, path=path, value=step['value']: (d, _at(d, path) == _value(value)))
+    return steps
+
+
+def _merge_patch_steps(patch: Any, tokens: Optional[List[str]] = None) -> List[Step]:
+    tokens = tokens or []
+    if not isinstance(patch, dict):
+        if not tokens:
+            return [lambda d, value=patch: (_value(value), None)]
+        return [lambda d, value=patch, path=tokens: (func.jsonb_set(d, _path(path), _value(value), True, type_=JSONB), None)]
+
+    def as_object(d, path=tokens):
+        return case((_typeof(d, path) == 'object', _at(d, path)), else_=_value({}))
+
+    # Members set to scalars/arrays are merged in one || at this level
+    members = {key: value for key, value in patch.items() if value is not None and not isinstance(value, dict)}
+    if members or not tokens:
+        def merge(d, path=tokens, members=members):
+            merged = as_object(d, path).op('||', return_type=JSONB)(_value(members))
+            return (merged if not path else func.jsonb_set(d, _path(path), merged, True, type_=JSONB)), None
+        steps = [merge]
+    else:
+        steps = [lambda d, path=tokens: (func.jsonb_set(d, _path(path), as_object(d, path), True, type_=JSONB), None)]
+
+    for key, value in patch.items():
+        if value is None:
+            steps.append(lambda d, path=tokens + [key]: (_sql_remove(d, path), None))
+        elif isinstance(value, dict):
+            steps.extend(_merge_patch_steps(value, tokens + [key]))
+    return steps
+
+
+def _patch_statement(model, ident, column_name: str, steps: List[Step], returning: Sequence = ()):
+    """Chain the steps as CTEs over the locked row and update it from the last one.
+
+    The original document is carried through the chain as "old", so the
+    UPDATE returns it alongside the patched one.
+    """
+    column = type_coerce(getattr(model, column_name), JSONB)
+    stage = (
+        select(column.label('doc'), column.label('old'), true().label('ok'))
+        .where(model.id == ident)
+        .with_for_update()
+        .cte('patch_0')
+    )
+    for number, step in enumerate(steps, 1):
+        document, check = step(stage.c.doc)
+        ok = stage.c.ok if check is None else stage.c.ok & check
+        stage = select(document.label('doc'), stage.c.old, ok.label('ok')).select_from(stage).cte(f'patch_{number}')
+
+    return (
+        db.update(model)
+        .where(model.id == ident, stage.c.ok)
+        .values({column_name: stage.c.doc, 'updated_at': datetime.utcnow()})
+        .returning(stage.c.old, getattr(model, column_name), *returning)
+    )
+
+
+def patch_json_column(model, ident, column_name: str, patch_type: str, patch: Any,
+                      returning: Sequence = ()) -> Optional[PatchedRow]:
+    """Apply a JSON Patch or Merge Patch to a JSON column of one row.
+
+    The change is added to the current transaction; the caller commits.
+
+    Args:
+        model: Model class with id and updated_at columns
+        ident: Primary key of the row
+        column_name: Name of the JSON column
+        patch_type: JSON_PATCH or MERGE_PATCH
+        patch: The patch document
+        returning: Further columns of the row to return, as of the update
+
+    Returns:
+        The documents before and after the patch and the returning values,
+        or None if the row does not exist
+
+    Raises:
+        JsonPatchError: If the patch is malformed
+        JsonPatchConflict: If the patch does not apply to the stored document
+    """
+    if patch_type == JSON_PATCH:
+        operations = validate_json_patch(patch)
+
+    if db.session.get_bind().dialect.name != 'postgresql':
+        row = db.session.get(model, ident, with_for_update=True)
+        if row is None:
+            return None
+        before = getattr(row, column_name)
+        if patch_type == JSON_PATCH:
+            document = apply_json_patch(before, patch)
+        else:
+            document = apply_merge_patch(before, patch)
+        setattr(row, column_name, document)
+        return PatchedRow(before, document, tuple(getattr(row, column.key) for column in returning))
+
+    steps = _json_patch_steps(operations) if patch_type == JSON_PATCH else _merge_patch_steps(patch)
+    try:
+        with db.session.begin_nested():
+            updated = db.session.execute(_patch_statement(model, ident, column_name, steps, returning)).one_or_none()
+    except DBAPIError as e:
+        # e.g. jsonb_set through a scalar
+        raise JsonPatchConflict(f"Patch does not apply: {e.orig}")
+    if updated is not None:
+        before, after, *values = updated
+        return PatchedRow(before, after, tuple(values))
+    if db.session.scalar(select(model.id).where(model.id == ident)) is None:
+        return None
+    raise JsonPatchConflict("Patch does not apply: a path is missing or a test failed")
@@ -0,0 +1,76 @@
+"""SQL filters on the content of Workout.exercises.
+
+Workout.exercises holds {"exercises": [{...}, ...]}. The helpers here build
+WHERE clauses that match workouts by the exercises they contain, evaluated
+by the database instead of by loading and parsing every row in Python:
+
+- Postgres: jsonb containment (@>), served by the jsonb_path_ops GIN index
+  ix_workouts_exercises
+- SQLite: EXISTS over json_each() from the JSON1 extension
+
+Example:
+    db.select(Workout).where(has_exercise(exercise_type_id=3))
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy import Boolean, and_, func, literal, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement, type_coerce
+from sqlalchemy.sql.visitors import InternalTraversal
+
+from .models import Workout
+
+
+class ExerciseMatch(ColumnElement):
+    """True when any exercise in a workout has all of the given key/values."""
+
+    type = Boolean()
+    inherit_cache = True
+
+    # The criteria are part of the cache key: they are rendered as binds at
+    # compile time, so each distinct criteria set compiles once
+    _traverse_internals = [
+        ('column', InternalTraversal.dp_clauseelement),
+        ('criteria', InternalTraversal.dp_plain_obj),
+    ]
+
+    def __init__(self, column, criteria: Dict[str, Any]):
+        self.column = column
+        self.criteria = tuple(sorted(criteria.items()))
+
+
+@compiles(ExerciseMatch)
+def _compile_json_each(element, compiler, **kw):
+    items = func.json_each(element.column, '$.exercises').table_valued('value')
+    matches = [
+        func.json_extract(items.c.value, f'$.{key}') == literal(value)
+        for key, value in element.criteria
+    ]
+    return compiler.process(select(literal(1)).select_from(items).where(and_(*matches)).exists(), **kw)
+
+
+@compiles(ExerciseMatch, 'postgresql')
+def _compile_containment(element, compiler, **kw):
+    document = {'exercises': [dict(element.criteria)]}
+    return compiler.process(type_coerce(element.column, JSONB).contains(document), **kw)
+
+
+def has_exercise(column=None, **criteria: Any) -> ExerciseMatch:
+    """Match workouts containing an exercise with all the given fields.
+
+    Args:
+        column: JSON column to search (default: Workout.exercises)
+        criteria: Top-level exercise fields and their values,
+            e.g. exercise_type_id=3 or name='Squat'
+
+    Returns:
+        Boolean SQL expression for a WHERE clause
+
+    Raises:
+        ValueError: If no criteria are given
+    """
+    if not criteria:
+        raise ValueError("At least one exercise field is required")
+    return ExerciseMatch(Workout.exercises if column is None else column, criteria)
@@ -0,0 +1,253 @@
+"""Materialization of training plans into dated workouts.
+
+A plan's blocks run back to back in sequence order, each for its
+duration_weeks. Every week of a block gets one workout per training day,
+built from the block's template:
+
+- planned_date: block start + week offset + the training day's weekday offset
+- sequence_order: running count within the block, starting at 1
+- exercises: the template's exercise list
+
+All rows are computed in Python and written with one multi-row INSERT, so a
+52-week plan costs one statement instead of one ORM flush per workout.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from .models import db, SetLog, TrainingBlock, VolumeRollup, Workout, WorkoutExerciseRef
+from .exercise_refs import sync_exercise_refs
+from .records import recompute_records, records_held_by, update_personal_records
+from .rollups import WorkoutState, record_volume_changes
+from .set_logs import strip_set_logs
+
+MAX_SESSIONS_PER_WEEK = 7
+
+
+class PlanNotEmptyError(ValueError):
+    """Raised when generating a plan that already has workouts."""
+
+# Block templates keyed by block name, as used by the dev data
+BLOCK_TEMPLATES: Dict[str, Dict[str, Any]] = {
+    'Hypertrophy Block': {
+        'exercises': [
+            {
+                'exercise_type_id': 1,  # Squat
+                'name': 'Squat',
+                'sequence': 1,
+                'planned': {
+                    'sets': 4,
+                    'reps': 10,
+                    'rpe': 7,
+                    'rest_minutes': 2
+                }
+            },
+            {
+                'exercise_type_id': 2,  # Bench Press
+                'name': 'Bench Press',
+                'sequence': 2,
+                'planned': {
+                    'sets': 5,
+                    'reps': 8,
+                    'rpe': 7,
+                    'rest_minutes': 2
+                }
+            }
+        ]
+    },
+    'Strength Block': {
+        'exercises': [
+            {
+                'exercise_type_id': 1,  # Squat
+                'name': 'Squat',
+                'sequence': 1,
+                'planned': {
+                    'sets': 5,
+                    'reps': 5,
+                    'rpe': 8,
+                    'rest_minutes': 3
+                }
+            },
+            {
+                'exercise_type_id': 3,  # Deadlift
+                'name': 'Deadlift',
+                'sequence': 2,
+                'planned': {
+                    'sets': 5,
+                    'reps': 5,
+                    'rpe': 8,
+                    'rest_minutes': 3
+                }
+            }
+        ]
+    },
+    'Peak Block': {
+        'exercises': [
+            {
+                'exercise_type_id': 2,  # Bench Press
+                'name': 'Bench Press',
+                'sequence': 1,
+                'planned': {
+                    'sets': 1,
+                    'reps': 1,
+                    'rpe': 10,
+                    'rest_minutes': 5
+                }
+            },
+            {
+                'exercise_type_id': 3,  # Deadlift
+                'name': 'Deadlift',
+                'sequence': 2,
+                'planned': {
+                    'sets': 1,
+                    'reps': 1,
+                    'rpe': 10,
+                    'rest_minutes': 5
+                }
+            }
+        ]
+    }
+}
+
+
+def training_days(sessions_per_week: int) -> List[int]:
+    """Spread sessions over a week as weekday offsets, e.g. 3 -> [0, 2, 4].
+
+    Raises:
+        ValueError: If sessions_per_week is not an integer between 1 and 7
+    """
+    if (isinstance(sessions_per_week, bool) or not isinstance(sessions_per_week, int)
+            or not 1 <= sessions_per_week <= MAX_SESSIONS_PER_WEEK):
+        raise ValueError(f"sessions_per_week must be an integer between 1 and {MAX_SESSIONS_PER_WEEK}")
+    if sessions_per_week * 2 - 1 <= 7:
+        return [day * 2 for day in range(sessions_per_week)]
+    return list(range(sessions_per_week))
+
+
+def find_template(block: TrainingBlock, templates: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Pick a block's template by its name, then by a template keyword in it.
+
+    A block named "Strength Block 2" or "Heavy strength" falls back to the
+    "Strength Block" template.
+    """
+    if block.name in templates:
+        return templates[block.name]
+    name = block.name.lower()
+    for template_name, template in templates.items():
+        if template_name.lower().removesuffix(' block') in name:
+            return template
+    return None
+
+
+def plan_workout_rows(blocks: Sequence[TrainingBlock], start_date: date, days: Sequence[int],
+                      templates: Dict[str, Dict[str, Any]], status: str = 'planned') -> List[Dict[str, Any]]:
+    """Expand blocks into workout rows ready for a bulk insert.
+
+    Args:
+        blocks: The plan's blocks in sequence order
+        start_date: Date of the first block's first week
+        days: Weekday offsets (0-6) of the training days in each week
+        templates: Block templates, see find_template()
+        status: Status of the generated workouts
+
+    Returns:
+        List of column dicts for Workout
+
+    Raises:
+        ValueError: If a block has no matching template
+    """
+    rows = []
+    block_start = start_date
+    for block in blocks:
+        template = find_template(block, templates)
+        if template is None:
+            raise ValueError(f"No template for block '{block.name}'")
+        # A template copied from a workout read through the API has its logged sets
+        template = strip_set_logs(template)
+
+        sequence_order = 0
+        for week in range(block.duration_weeks):
+            week_start = block_start + timedelta(weeks=week)
+            for session, offset in enumerate(days, start=1):
+                sequence_order += 1
+                rows.append({
+                    'block_id': block.id,
+                    'name': f"{block.name} W{week + 1}D{session}",
+                    'planned_date': week_start + timedelta(days=offset),
+                    'sequence_order': sequence_order,
+                    'status': status,
+                    'exercises': template
+                })
+        block_start += timedelta(weeks=block.duration_weeks)
+    return rows
+
+
+def materialize_plan(plan_id: int, start_date: date, days: Sequence[int],
+                     templates: Optional[Dict[str, Dict[str, Any]]] = None,
+                     replace: bool = False) -> Dict[str, Any]:
+    """Generate a plan's workouts and add them to the current transaction.
+
+    Args:
+        plan_id: Training plan ID
+        start_date: Date the first block starts
+        days: Weekday offsets of the training days in each week
+        templates: Templates overriding BLOCK_TEMPLATES by block name
+        replace: Delete the plan's existing workouts first
+
+    Returns:
+        Summary with the date range and the number of workouts per block
+
+    Raises:
+        ValueError: If a block has no template
+        PlanNotEmptyError: If the plan already has workouts and replace is false
+    """
+    blocks = db.session.scalars(
+        db.select(TrainingBlock)
+        .filter_by(plan_id=plan_id)
+        .order_by(TrainingBlock.sequence_order, TrainingBlock.id)
+    ).all()
+    block_ids = [block.id for block in blocks]
+
+    rows = plan_workout_rows(blocks, start_date, days, {**BLOCK_TEMPLATES, **(templates or {})})
+
+    held = set()
+    if block_ids:
+        existing = db.select(Workout.id).where(Workout.block_id.in_(block_ids))
+        if replace:
+            held = records_held_by(Workout.block_id.in_(block_ids))
+            # Not left to ON DELETE CASCADE, which SQLite does not enforce by default
+            db.session.execute(db.delete(SetLog).where(SetLog.workout_id.in_(existing)))
+            db.session.execute(db.delete(WorkoutExerciseRef).where(WorkoutExerciseRef.workout_id.in_(existing)))
+            db.session.execute(db.delete(Workout).where(Workout.block_id.in_(block_ids)))
+            # Every workout of these blocks is gone, and with it their volume
+            db.session.execute(db.delete(VolumeRollup).where(VolumeRollup.block_id.in_(block_ids)))
+        elif db.session.scalar(db.select(existing.exists())):
+            raise PlanNotEmptyError("Training plan already has workouts")
+
+    if rows:
+        created = [
+            (None, WorkoutState.of(workout)) for workout in db.session.execute(
+                db.insert(Workout).returning(Workout.id, Workout.block_id, Workout.planned_date,
+                                             Workout.actual_date, Workout.exercises),
+                rows
+            )
+        ]
+        # Templates normally carry no logs, which makes these no-ops
+        record_volume_changes(created)
+        update_personal_records(created)
+        sync_exercise_refs(created)
+    if held:
+        # Records held by the deleted workouts, recomputed from what is left
+        recompute_records(held)
+
+    weeks = sum(block.duration_weeks for block in blocks)
+    counts = {block_id: 0 for block_id in block_ids}
+    for row in rows:
+        counts[row['block_id']] += 1
+    return {
+        'plan_id': plan_id,
+        'start_date': start_date,
+        'end_date': start_date + timedelta(weeks=weeks, days=-1) if weeks else start_date,
+        'workouts_created': len(rows),
+        'blocks': [{'id': block_id, 'workouts': count} for block_id, count in counts.items()]
+    }
@@ -12,13 +12,21 @@ User
 └── Training Plan
     └── Training Block
         └── Workout (includes exercises and logs as JSON)
+            └── Set Log (sets appended outside the JSON)
+
+Volume Rollups hold weekly totals derived from the logged sets, and
+Personal Records the heaviest set per exercise type and rep count.
+Workout Exercise Refs index which workouts use each exercise type.
 """
 
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import JSONB, REGCONFIG
 import os
+from .routing import RoutingSession
 
-db = SQLAlchemy()
+# Reads during GET requests may be routed to a replica, see core/routing.py
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 def init_db(app):
     """Initialize the database with the Flask app."""
@@ -74,6 +82,10 @@ class TrainingPlan(db.Model):
     
     training_blocks = db.relationship('TrainingBlock', backref='training_plan', lazy=True, order_by='TrainingBlock.sequence_order')
     
+    __table_args__ = (
+        db.Index('ix_training_plans_user_created', user_id, created_at.desc(), id.desc()),
+    )
+    
     def __init__(self, user_id, name, progression_type=None, target_weekly_hours=None, start_date=None, end_date=None):
         self.user_id = user_id
         self.name = name
@@ -109,6 +121,10 @@ class TrainingBlock(db.Model):
     
     workouts = db.relationship('Workout', backref='training_block', lazy=True, order_by='Workout.sequence_order')
     
+    __table_args__ = (
+        db.UniqueConstraint('plan_id', 'sequence_order', name='uq_training_blocks_plan_sequence'),
+    )
+    
     def __init__(self, plan_id, name, primary_focus, duration_weeks, sequence_order):
         self.plan_id = plan_id
         self.name = name
@@ -142,11 +158,38 @@ class ExerciseType(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_exercise_types_name', 'name', 'id'),
+    )
+    
     def __init__(self, name, category, description=None):
         self.name = name
         self.category = category
         self.description = description
 
+# Full-text document of an exercise type on Postgres, name weighted above
+# description. Queries must use this exact expression to hit the index; see
+# core/search.py (which uses an FTS5 table on SQLite instead).
+EXERCISE_SEARCH_CONFIG = db.cast(db.literal('english'), REGCONFIG)
+EXERCISE_SEARCH_DOCUMENT = db.func.setweight(
+    db.func.to_tsvector(EXERCISE_SEARCH_CONFIG, ExerciseType.__table__.c.name), db.literal('A')
+).op('||')(db.func.setweight(
+    db.func.to_tsvector(EXERCISE_SEARCH_CONFIG, db.func.coalesce(ExerciseType.__table__.c.description, db.literal(''))),
+    db.literal('B')
+))
+db.Index(
+    'ix_exercise_types_search', EXERCISE_SEARCH_DOCUMENT, postgresql_using='gin'
+).ddl_if(dialect='postgresql')
+# Trigram similarity (pg_trgm's % operator) for misspelled or partial names
+db.Index(
+    'ix_exercise_types_name_trgm', ExerciseType.name,
+    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}
+).ddl_if(dialect='postgresql')
+db.event.listen(
+    ExerciseType.__table__, 'before_create',
+    db.DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
+
 class Workout(db.Model):
     """
     Represents a planned workout session within a training block.
@@ -198,9 +241,28 @@ class Workout(db.Model):
     actual_date = db.Column(db.Date, nullable=True)
     status = db.Column(db.String(20), nullable=False, default='planned')  # planned, completed, skipped
     sequence_order = db.Column(db.Integer, nullable=False)
-    exercises = db.Column(db.JSON, nullable=False)  # Stores exercises, parameters, and logs
+    exercises = db.Column(db.JSON().with_variant(JSONB, 'postgresql'), nullable=False)  # Stores exercises, parameters, and logs
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Read-only; eager loaded where logged sets are merged into many workouts at once
+    set_logs = db.relationship(
+        'SetLog', viewonly=True, lazy=True,
+        order_by='[SetLog.exercise_sequence, SetLog.log_ts, SetLog.set_index]'
+    )
+    
+    __table_args__ = (
+        db.UniqueConstraint('block_id', 'sequence_order', name='uq_workouts_block_sequence'),
+        # Covers the calendar projection, so a date range never visits the heap
+        db.Index(
+            'ix_workouts_calendar', 'planned_date', 'block_id',
+            postgresql_include=['name', 'actual_date', 'status', 'updated_at']
+        ),
+        # Containment (@>) queries on exercise content, see core/json_queries.py
+        db.Index(
+            'ix_workouts_exercises', 'exercises',
+            postgresql_using='gin', postgresql_ops={'exercises': 'jsonb_path_ops'}
+        ).ddl_if(dialect='postgresql'),
+    )
     
     def __init__(self, block_id, name, planned_date, sequence_order, exercises=None, status='planned', actual_date=None):
         self.block_id = block_id
@@ -209,4 +271,147 @@ class Workout(db.Model):
         self.actual_date = actual_date
         self.status = status
         self.sequence_order = sequence_order
-        self.exercises = exercises or {"exercises": []} 
\ No newline at end of file
+        self.exercises = exercises or {"exercises": []} 
+
+
+class SetLog(db.Model):
+    """
+    A single logged set of an exercise in a workout.
+    
+    Sets are appended here instead of being written into the workout's
+    exercises JSON, so logging a set is one small INSERT regardless of how
+    large the workout document is. Rows are never updated.
+    
+    A set belongs to the exercise with the matching "sequence" in the
+    workout's exercises JSON, and to the log session identified by log_ts
+    (the "timestamp" of an entry in that exercise's "logs"). Reads merge the
+    rows back into that shape, see core/set_logs.py.
+    
+    Example:
+    workout_id: 42
+    exercise_sequence: 1
+    log_ts: 2024-01-21 14:30:00
+    set_index: 0
+    reps: 5, weight: 82.5, weight_unit: "kg", rpe: 8.5
+    """
+    __tablename__ = 'set_logs'
+    
+    workout_id = db.Column(db.Integer, db.ForeignKey('workouts.id', ondelete='CASCADE'), primary_key=True)
+    exercise_sequence = db.Column(db.Integer, primary_key=True)
+    log_ts = db.Column(db.DateTime, primary_key=True)
+    set_index = db.Column(db.Integer, primary_key=True)
+    reps = db.Column(db.Integer, nullable=True)
+    weight = db.Column(db.Numeric(7, 2), nullable=True)
+    weight_unit = db.Column(db.String(8), nullable=True)  # kg, lb
+    rpe = db.Column(db.Numeric(3, 1), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __init__(self, workout_id, exercise_sequence, log_ts, set_index, reps=None, weight=None, weight_unit=None, rpe=None):
+        self.workout_id = workout_id
+        self.exercise_sequence = exercise_sequence
+        self.log_ts = log_ts
+        self.set_index = set_index
+        self.reps = reps
+        self.weight = weight
+        self.weight_unit = weight_unit
+        self.rpe = rpe
+
+class VolumeRollup(db.Model):
+    """
+    Weekly training volume of one exercise type within one training block.
+    
+    Derived from the logged sets (both the exercises JSON logs and set_logs)
+    and kept up to date incrementally by the write paths, so volume charts
+    read a few summary rows instead of every workout document. Rows can be
+    rebuilt from scratch at any time, see core/rollups.py.
+    
+    A set counts towards the ISO week of its log timestamp, or of the
+    workout's actual (else planned) date when the log has none. Tonnage is
+    reps x weight in kg, with pounds converted.
+    
+    Example:
+    user_id: 1, exercise_type_id: 3, iso_week: 202403 (2024-W03), block_id: 7
+    sets: 12, reps: 58, tonnage: 5225.00
+    """
+    __tablename__ = 'volume_rollups'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    exercise_type_id = db.Column(db.Integer, primary_key=True)
+    iso_week = db.Column(db.Integer, primary_key=True)  # ISO year * 100 + week number
+    block_id = db.Column(db.Integer, db.ForeignKey('training_blocks.id', ondelete='CASCADE'), primary_key=True)
+    sets = db.Column(db.Integer, nullable=False, default=0)
+    reps = db.Column(db.Integer, nullable=False, default=0)
+    tonnage = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # The primary key serves one exercise over a week range; these serve
+        # all exercises of a user over a week range, and a block's totals
+        db.Index('ix_volume_rollups_user_week', 'user_id', 'iso_week'),
+        db.Index('ix_volume_rollups_block', 'block_id', 'iso_week'),
+    )
+
+
+class PersonalRecord(db.Model):
+    """
+    Heaviest set a user has logged for one exercise type at one rep count.
+    
+    Derived from the logged sets like VolumeRollup and kept up to date by
+    the write paths, so PRs are read without scanning every workout. The
+    workout holding the record is kept so that edits and deletes of that
+    workout recompute only the affected exercise (see core/records.py).
+    It is not a foreign key: the row is replaced in the same transaction
+    as the workout write.
+    
+    Estimated 1RMs are derived from weight and rep_count when read; for a
+    fixed rep count the heaviest set is also the best e1RM under both the
+    Epley and Brzycki formulas.
+    
+    Example:
+    user_id: 1, exercise_type_id: 3, rep_count: 5
+    weight: 110.00 (kg), workout_id: 42, achieved_on: 2024-03-04
+    """
+    __tablename__ = 'personal_records'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    exercise_type_id = db.Column(db.Integer, primary_key=True)
+    rep_count = db.Column(db.Integer, primary_key=True)
+    weight = db.Column(db.Numeric(8, 2), nullable=False)  # kg, pounds converted
+    workout_id = db.Column(db.Integer, nullable=False)
+    achieved_on = db.Column(db.Date)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # Finds the records held by a workout that is edited or deleted
+        db.Index('ix_personal_records_workout', 'workout_id'),
+    )
+
+
+class WorkoutExerciseRef(db.Model):
+    """
+    Inverted index from an exercise type to the workouts that include it.
+    
+    One row per exercise type referenced in a workout's exercises JSON,
+    with the workout's planned_date copied so an exercise's history over a
+    date range is one index range scan. Kept in sync by the workout write
+    paths, see core/exercise_refs.py.
+    
+    exercise_type_id is not a foreign key: the JSON document is not
+    validated against exercise_types, and the index must mirror it.
+    
+    Example:
+    exercise_type_id: 3, workout_id: 42, planned_date: 2024-03-04
+    """
+    __tablename__ = 'workout_exercise_refs'
+    
+    exercise_type_id = db.Column(db.Integer, primary_key=True)
+    workout_id = db.Column(db.Integer, db.ForeignKey('workouts.id', ondelete='CASCADE'), primary_key=True)
+    planned_date = db.Column(db.Date, nullable=False)
+    
+    __table_args__ = (
+        # History of one exercise by date; the workout_id index serves
+        # rewriting or deleting a workout's rows
+        db.Index('ix_workout_exercise_refs_history', 'exercise_type_id', 'planned_date', 'workout_id'),
+        db.Index('ix_workout_exercise_refs_workout', 'workout_id'),
+    )
+
@@ -0,0 +1,166 @@
+"""Content negotiation between JSON and MessagePack.
+
+Clients that send ``Accept: application/msgpack`` receive MessagePack
+instead of JSON, and request bodies sent with
+``Content-Type: application/msgpack`` are decoded transparently. Both hook
+into Flask in one place, so routes keep calling ``request.get_json()`` and
+returning serializer responses, ``jsonify(...)`` or plain dicts:
+
+- ApiRequest.get_json() decodes MessagePack bodies
+- ApiJSONProvider.response() (behind jsonify and dict returns) and render()
+  (behind the model serializers) encode MessagePack responses
+
+Dates and datetimes are encoded as compact extension types:
+
+- datetime: the standard timestamp extension (-1); naive values are UTC
+- date: extension 1 holding the proleptic Gregorian ordinal as a uint32
+
+In request bodies both are decoded back to ISO 8601 strings, so routes see
+the same shapes as with JSON.
+"""
+
+import struct
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from http import HTTPStatus
+from typing import Any, Optional
+
+import msgpack
+import orjson
+from flask import Flask, Request, Response, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+JSON_MIMETYPE = 'application/json'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+DATE_EXT_TYPE = 1
+_DATE_STRUCT = struct.Struct('>I')
+
+
+def _json_default(value: Any) -> Any:
+    """Encode types orjson does not support natively."""
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _msgpack_default(value: Any) -> Any:
+    """Encode dates and other types msgpack does not support natively."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return msgpack.Timestamp.from_datetime(value)
+    if isinstance(value, date):
+        return msgpack.ExtType(DATE_EXT_TYPE, _DATE_STRUCT.pack(value.toordinal()))
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not MessagePack serializable")
+
+
+def _request_ext_hook(code: int, data: bytes) -> Any:
+    """Decode date extensions in request bodies to ISO strings."""
+    if code == DATE_EXT_TYPE:
+        return date.fromordinal(_DATE_STRUCT.unpack(data)[0]).isoformat()
+    return msgpack.ExtType(code, data)
+
+
+def dumps_json(data: Any) -> bytes:
+    """Encode data to JSON bytes."""
+    return orjson.dumps(data, default=_json_default)
+
+
+def dumps_msgpack(data: Any) -> bytes:
+    """Encode data to MessagePack bytes."""
+    return msgpack.packb(data, default=_msgpack_default, datetime=False)
+
+
+def _stringify_datetimes(value: Any) -> Any:
+    """Replace decoded timestamps with naive UTC ISO strings, recursively."""
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+    if isinstance(value, dict):
+        return {key: _stringify_datetimes(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_stringify_datetimes(item) for item in value]
+    return value
+
+
+def loads_msgpack(data: bytes) -> Any:
+    """Decode a MessagePack request body, turning dates into ISO strings."""
+    return _stringify_datetimes(msgpack.unpackb(
+        data,
+        ext_hook=_request_ext_hook,
+        timestamp=3,
+        strict_map_key=False
+    ))
+
+
+def best_mimetype(*candidates: str) -> str:
+    """Pick the response mimetype the client prefers.
+
+    Args:
+        candidates: Mimetypes the endpoint can produce besides JSON/MessagePack
+
+    Returns:
+        The best match, JSON when nothing matches or outside a request
+    """
+    if not has_request_context():
+        return JSON_MIMETYPE
+    offered = [JSON_MIMETYPE, *candidates, MSGPACK_MIMETYPE]
+    return request.accept_mimetypes.best_match(offered) or JSON_MIMETYPE
+
+
+def render(data: Any, status: int = HTTPStatus.OK, mimetype: Optional[str] = None) -> Response:
+    """Encode data as JSON or MessagePack according to the request's Accept."""
+    if mimetype is None:
+        mimetype = best_mimetype()
+    if mimetype == MSGPACK_MIMETYPE:
+        body = dumps_msgpack(data)
+    else:
+        mimetype = JSON_MIMETYPE
+        body = dumps_json(data)
+    response = Response(body, status=status, mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
+
+
+class ApiRequest(Request):
+    """Request class that also accepts MessagePack bodies in get_json()."""
+
+    def get_json(self, force: bool = False, silent: bool = False, cache: bool = True) -> Any:
+        if self.mimetype != MSGPACK_MIMETYPE:
+            return super().get_json(force=force, silent=silent, cache=cache)
+
+        if cache and self._cached_json[silent] is not Ellipsis:
+            return self._cached_json[silent]
+
+        try:
+            rv = loads_msgpack(self.get_data(cache=cache))
+        except (ValueError, msgpack.UnpackException) as e:
+            if silent:
+                return None
+            return self.on_json_loading_failed(e)
+
+        if cache:
+            self._cached_json = (rv, rv)
+        return rv
+
+
+class ApiJSONProvider(DefaultJSONProvider):
+    """JSON provider whose responses switch to MessagePack when requested."""
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if best_mimetype() != MSGPACK_MIMETYPE:
+            response = super().response(*args, **kwargs)
+        else:
+            obj = self._prepare_response_obj(args, kwargs)
+            response = self._app.response_class(dumps_msgpack(obj), mimetype=MSGPACK_MIMETYPE)
+        response.vary.add('Accept')
+        return response
+
+
+def init_content_negotiation(app: Flask) -> None:
+    """Install MessagePack-aware request and JSON provider classes."""
+    app.request_class = ApiRequest
+    app.json = ApiJSONProvider(app)
@@ -0,0 +1,163 @@
+"""Keyset (cursor) pagination for collection endpoints.
+
+Each collection is ordered by a keyset, a sort key plus the primary key as a
+tiebreaker. A page is selected with a row-value predicate such as
+``WHERE (sequence_order, id) > (:k, :id)`` followed by ``LIMIT``, which an
+index on the keyset can serve directly, unlike OFFSET which has to walk and
+discard every skipped row.
+
+Cursors are opaque to clients: the keyset values of the last row on a page,
+JSON encoded and base64url wrapped.
+
+Query parameters:
+    - limit: Page size (1 to MAX_PAGE_SIZE)
+    - after: Cursor returned as X-Next-Cursor by the previous page
+"""
+
+import base64
+import binascii
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+import orjson
+from flask import abort, request
+from sqlalchemy import Integer, bindparam, tuple_
+
+from .models import TrainingPlan, TrainingBlock, ExerciseType, Workout, WorkoutExerciseRef
+
+MAX_PAGE_SIZE = 500
+
+
+class Keyset:
+    """Ordering and cursor encoding for one collection.
+
+    Args:
+        columns: Sort columns, ending with the primary key
+        descending: Whether the collection is sorted newest/highest first
+    """
+
+    def __init__(self, *columns, descending: bool = False):
+        self.columns = columns
+        self.descending = descending
+
+    def order(self, stmt):
+        """Apply the keyset ordering to a select."""
+        if self.descending:
+            return stmt.order_by(*(column.desc() for column in self.columns))
+        return stmt.order_by(*self.columns)
+
+    def after(self, stmt):
+        """Restrict a select to rows after a cursor bound by cursor_params()."""
+        key = tuple_(*self.columns)
+        values = tuple_(*(
+            bindparam(f'keyset_{i}', type_=column.type) for i, column in enumerate(self.columns)
+        ))
+        return stmt.where(key < values if self.descending else key > values)
+
+    def cursor_params(self, cursor: str) -> Dict[str, Any]:
+        """Bind parameter values for after() from a cursor.
+
+        Raises:
+            ValueError: If the cursor is malformed or does not match the keyset
+        """
+        return {f'keyset_{i}': value for i, value in enumerate(self.decode(cursor))}
+
+    def encode(self, obj) -> str:
+        """Build the cursor pointing just past the given row."""
+        values = [getattr(obj, column.key) for column in self.columns]
+        return base64.urlsafe_b64encode(orjson.dumps(values)).rstrip(b'=').decode()
+
+    def decode(self, cursor: str) -> List[Any]:
+        """Parse a cursor back into typed keyset values.
+
+        Raises:
+            ValueError: If the cursor is malformed or does not match the keyset
+        """
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = orjson.loads(base64.urlsafe_b64decode(padded))
+        except (binascii.Error, orjson.JSONDecodeError):
+            raise ValueError("Invalid cursor")
+        if not isinstance(values, list) or len(values) != len(self.columns):
+            raise ValueError("Invalid cursor")
+        try:
+            return [self._coerce(column, value) for column, value in zip(self.columns, values)]
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def _coerce(column, value):
+        python_type = column.type.python_type
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        if not isinstance(value, python_type):
+            raise TypeError(f"Expected {python_type.__name__}")
+        return value
+
+
+def page_params() -> Optional[Tuple[int, Optional[str]]]:
+    """Read limit/after from the query string.
+
+    Returns:
+        (limit, after) when pagination was requested, otherwise None
+
+    Raises:
+        400: If limit is not an integer between 1 and MAX_PAGE_SIZE
+    """
+    if 'limit' not in request.args and 'after' not in request.args:
+        return None
+    limit = request.args.get('limit', MAX_PAGE_SIZE, type=int)
+    if not limit or not 1 <= limit <= MAX_PAGE_SIZE:
+        abort(400, description=f"limit must be an integer between 1 and {MAX_PAGE_SIZE}")
+    return limit, request.args.get('after')
+
+
+def paginate(stmt, keyset: Keyset, after: bool):
+    """Restrict a select to one page, fetching one extra row to detect a next page.
+
+    Values are left as bind parameters, see page_bind_params(), so the
+    statement can be reused for every page of the same shape.
+    """
+    if after:
+        stmt = keyset.after(stmt)
+    return stmt.limit(bindparam('page_limit', type_=Integer))
+
+
+def page_bind_params(keyset: Keyset, limit: int, after: Optional[str]) -> Dict[str, Any]:
+    """Bind parameter values for a statement built by paginate().
+
+    Raises:
+        400: If the cursor is invalid
+    """
+    params = {'page_limit': limit + 1}
+    if after:
+        try:
+            params.update(keyset.cursor_params(after))
+        except ValueError as e:
+            abort(400, description=str(e))
+    return params
+
+
+def split_page(rows: Sequence, keyset: Keyset, limit: int) -> Tuple[Sequence, Optional[str]]:
+    """Trim the extra row fetched by paginate() and build the next cursor."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, keyset.encode(rows[-1])
+
+
+def next_link(cursor: str) -> str:
+    """Build a Link header value pointing at the next page."""
+    args = request.args.to_dict(flat=False)
+    args['after'] = [cursor]
+    return f'<{request.path}?{urlencode(args, doseq=True)}>; rel="next"'
+
+
+training_plan_keyset = Keyset(TrainingPlan.created_at, TrainingPlan.id, descending=True)
+training_block_keyset = Keyset(TrainingBlock.sequence_order, TrainingBlock.id)
+exercise_type_keyset = Keyset(ExerciseType.name, ExerciseType.id)
+workout_keyset = Keyset(Workout.sequence_order, Workout.id)
+exercise_history_keyset = Keyset(WorkoutExerciseRef.planned_date, WorkoutExerciseRef.workout_id, descending=True)
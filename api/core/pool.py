@@ -0,0 +1,256 @@
+"""Engine profiles and connection pool telemetry.
+
+The API runs both as a long-lived server (local development, containers)
+and as serverless functions on Vercel, and the right pooling differs:
+
+- server: a QueuePool of direct connections, pre-pinged and recycled before
+  Neon's idle timeout closes them under us
+- serverless: NullPool against the pgbouncer (pooled) URL, since each
+  function instance is short-lived and a per-process pool would pin Neon
+  connections that are never reused
+
+The profile comes from DB_POOL_PROFILE, defaulting to serverless when
+running on Vercel. Sizing can be overridden with DB_POOL_SIZE,
+DB_MAX_OVERFLOW, DB_POOL_TIMEOUT and DB_POOL_RECYCLE, and the compiled SQL
+cache with DB_QUERY_CACHE_SIZE.
+
+Pool events are instrumented per engine: checkout wait time, timeouts,
+overflow and connection churn (connections opened and closed relative to
+checkouts). pool_status() returns a snapshot, served at /api/health/db.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+SERVER = 'server'
+SERVERLESS = 'serverless'
+
+# Compiled SQL kept per engine. SQLAlchemy's default of 500 is shared by our
+# ~35 routes, each with several statement shapes (sparse fieldsets, pages,
+# ETag aggregates) plus the ORM's own loads and flushes, and a full cache
+# evicts half its entries at once.
+QUERY_CACHE_SIZE = 1200
+
+# Query parameters Prisma-style pooled URLs carry that libpq rejects
+_NON_LIBPQ_PARAMS = ('pgbouncer', 'schema', 'connection_limit', 'pool_timeout')
+
+
+def pool_profile() -> str:
+    """Pick the engine profile for this process."""
+    profile = os.getenv('DB_POOL_PROFILE')
+    if profile:
+        if profile not in (SERVER, SERVERLESS):
+            raise ValueError(f"DB_POOL_PROFILE must be '{SERVER}' or '{SERVERLESS}'")
+        return profile
+    return SERVERLESS if os.getenv('VERCEL') else SERVER
+
+
+def database_url(url: Optional[str], profile: str, pooled: bool = True) -> Optional[str]:
+    """Choose the database URL for a profile and make it usable by psycopg2.
+
+    Serverless functions connect through pgbouncer (POSTGRES_PRISMA_URL)
+    when it is configured and pooled is true; everything else uses the
+    given URL.
+    """
+    if pooled and profile == SERVERLESS and os.getenv('POSTGRES_PRISMA_URL'):
+        url = os.getenv('POSTGRES_PRISMA_URL')
+    if not url:
+        return url
+    if url.startswith('postgres://'):
+        url = url.replace('postgres://', 'postgresql://', 1)
+    parsed = make_url(url)
+    if parsed.get_backend_name() == 'postgresql':
+        parsed = parsed.difference_update_query(_NON_LIBPQ_PARAMS)
+    return parsed.render_as_string(hide_password=False)
+
+
+def engine_options(url: Optional[str], profile: str, **overrides: Any) -> Dict[str, Any]:
+    """Build SQLALCHEMY_ENGINE_OPTIONS for a profile.
+
+    Args:
+        url: Database URL the options are for
+        profile: SERVER or SERVERLESS
+        overrides: Defaults for the QueuePool sizing (pool_size, ...)
+
+    Returns:
+        Engine options; only the compiled cache size for SQLite, whose pool
+        Flask-SQLAlchemy configures
+    """
+    options = {'query_cache_size': int(os.getenv('DB_QUERY_CACHE_SIZE', QUERY_CACHE_SIZE))}
+    if not url or make_url(url).get_backend_name() == 'sqlite':
+        return options
+
+    if profile == SERVERLESS:
+        return {**options, 'poolclass': InstrumentedNullPool, 'pool_pre_ping': False}
+
+    sizing = {'pool_size': 5, 'max_overflow': 10, 'pool_timeout': 10, 'pool_recycle': 240, **overrides}
+    return {
+        **options,
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', sizing['pool_size'])),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', sizing['max_overflow'])),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', sizing['pool_timeout'])),
+        # Neon closes idle connections after 5 minutes
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', sizing['pool_recycle'])),
+        'pool_pre_ping': True,
+        'pool_use_lifo': True,
+    }
+
+
+class PoolStats:
+    """Thread-safe counters for one engine's pool."""
+
+    def __init__(self, slow_wait_ms: float = 100.0):
+        self._lock = threading.Lock()
+        self.slow_wait_ms = slow_wait_ms
+        self.checkouts = 0
+        self.checkins = 0
+        self.checked_out = 0
+        self.checked_out_peak = 0
+        self.overflow_peak = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.slow_waits = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+
+    def record_wait(self, wait_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            if wait_ms >= self.slow_wait_ms:
+                self.slow_waits += 1
+            if timed_out:
+                self.timeouts += 1
+        if wait_ms >= self.slow_wait_ms:
+            logger.warning(f"Waited {wait_ms:.1f} ms for a database connection")
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def record_checkout(self, overflow: Optional[int]) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.checked_out_peak = max(self.checked_out_peak, self.checked_out)
+            if overflow is not None:
+                self.overflow_peak = max(self.overflow_peak, overflow)
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'checked_out': self.checked_out,
+                'checked_out_peak': self.checked_out_peak,
+                'overflow_peak': self.overflow_peak,
+                'wait_avg_ms': round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max_ms, 3),
+                'slow_waits': self.slow_waits,
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'closes': self.closes,
+                'invalidations': self.invalidations,
+                # 1.0 means every checkout opened a new connection
+                'churn': round(self.connects / self.checkouts, 3) if self.checkouts else 0.0,
+            }
+
+
+class _TimedCheckout:
+    """Pool mixin timing how long checkouts wait for a connection."""
+
+    telemetry: Optional[PoolStats] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            if self.telemetry is not None:
+                self.telemetry.record_wait((time.perf_counter() - start) * 1000, timed_out)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool that records checkout wait times."""
+
+
+class InstrumentedNullPool(_TimedCheckout, NullPool):
+    """NullPool that records connect times as checkout waits."""
+
+
+_stats: Dict[str, PoolStats] = {}
+
+
+def instrument_engine(engine, name: str, slow_wait_ms: float = 100.0) -> PoolStats:
+    """Attach pool event listeners to an engine and return its stats."""
+    stats = _stats[name] = PoolStats(slow_wait_ms)
+    engine.pool.telemetry = stats
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        stats.increment('connects')
+
+    @event.listens_for(engine, 'close')
+    def on_close(dbapi_connection, connection_record):
+        stats.increment('closes')
+
+    @event.listens_for(engine, 'close_detached')
+    def on_close_detached(dbapi_connection):
+        stats.increment('closes')
+
+    @event.listens_for(engine, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        stats.increment('invalidations')
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool = engine.pool
+        stats.record_checkout(pool.overflow() if isinstance(pool, QueuePool) else None)
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        stats.record_checkin()
+
+    return stats
+
+
+def pool_status() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of the telemetry of every instrumented engine."""
+    return {name: stats.snapshot() for name, stats in _stats.items()}
+
+
+def init_pool_telemetry(app: Flask) -> None:
+    """Instrument the pools of all of the app's engines."""
+    from .models import db
+
+    app.config.setdefault('DB_POOL_SLOW_WAIT_MS', 100.0)
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            instrument_engine(engine, bind_key or 'default', app.config['DB_POOL_SLOW_WAIT_MS'])
@@ -0,0 +1,120 @@
+"""Hot-path queries, built once and reused across requests.
+
+SQLAlchemy already caches the compiled SQL of a statement in the engine's
+compiled_cache (sized by DB_QUERY_CACHE_SIZE), but finding it there needs
+the statement's cache key, which is recomputed for every freshly built
+select. On short requests, building the select and walking it for its key
+is a noticeable share of the Python time.
+
+The statements here are module-level constants whose values are bindparams
+supplied at execution, so their cache key is computed once and memoized on
+the object. Statements derived from them per request shape (sparse
+fieldset, ordering, pagination, ETag aggregate) are memoized in
+statement_cache, keyed by that shape, so a repeated request reuses the same
+objects and only the parameter values change.
+
+Example:
+    user = db.session.execute(USER_BY_ACCESS_KEY, {'access_key': key}).scalar_one_or_none()
+    return workout_serializer.query_response(WORKOUTS_BY_BLOCK, workout_keyset, {'block_id': block_id})
+
+statement_cache and the engines' compiled_cache hit rates are reported at
+/api/health/db.
+"""
+
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+from flask import Flask
+from sqlalchemy import bindparam, event, select
+
+from .models import db, User, TrainingPlan, TrainingBlock, ExerciseType, Workout
+
+USER_BY_ACCESS_KEY = select(User).where(User.access_key == bindparam('access_key'))
+PLANS_BY_USER = select(TrainingPlan).where(TrainingPlan.user_id == bindparam('user_id'))
+BLOCKS_BY_PLAN = select(TrainingBlock).where(TrainingBlock.plan_id == bindparam('plan_id'))
+WORKOUTS_BY_BLOCK = select(Workout).where(Workout.block_id == bindparam('block_id'))
+ALL_EXERCISE_TYPES = select(ExerciseType)
+
+
+class StatementCache:
+    """Thread-safe LRU of statements derived from the constants above.
+
+    Keys include user-controlled parts such as ?fields= combinations, so
+    the cache is bounded.
+    """
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._statements: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Return the statement cached under key, building it on a miss."""
+        with self._lock:
+            stmt = self._statements.get(key)
+            if stmt is not None:
+                self._statements.move_to_end(key)
+                self.hits += 1
+                return stmt
+            self.misses += 1
+
+        stmt = build()
+        with self._lock:
+            self._statements[key] = stmt
+            if len(self._statements) > self.maxsize:
+                self._statements.popitem(last=False)
+        return stmt
+
+    def clear(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'size': len(self._statements), 'hits': self.hits, 'misses': self.misses}
+
+
+statement_cache = StatementCache()
+
+# Outcome of the compiled_cache lookup of each statement, per engine
+_compiled_cache_stats: Dict[str, Counter] = {}
+
+
+def _cache_outcome(context) -> str:
+    dialect = context.dialect
+    return {
+        dialect.CACHE_HIT: 'hits',
+        dialect.CACHE_MISS: 'misses',
+        dialect.CACHING_DISABLED: 'disabled',
+        dialect.NO_CACHE_KEY: 'uncacheable',
+        dialect.NO_DIALECT_SUPPORT: 'uncacheable',
+    }.get(context.cache_hit, 'uncacheable')
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Count compiled_cache hits and misses of an engine's statements."""
+    stats = _compiled_cache_stats[name] = Counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def count_cache_lookup(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and context.compiled is not None:
+            stats[_cache_outcome(context)] += 1
+
+
+def query_cache_status() -> Dict[str, Any]:
+    """Hit/miss counts of statement_cache and each engine's compiled_cache."""
+    return {
+        'statements': statement_cache.stats(),
+        'compiled': {name: dict(stats) for name, stats in _compiled_cache_stats.items()},
+    }
+
+
+def init_query_cache(app: Flask) -> None:
+    """Record compiled_cache hit rates for the app's engines."""
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            instrument_engine(engine, bind_key or 'default')
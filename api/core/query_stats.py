@@ -0,0 +1,191 @@
+"""Per-request SQL statement counting, N+1 detection and query budgets.
+
+Every statement executed on the app's engines is counted and timed against
+the collectors active in the current context: one per request, plus any
+count_queries() blocks and query_budget() views. After each request the
+totals are reported in response headers:
+
+- X-DB-Queries: number of statements executed
+- Server-Timing: db;dur=<ms>, shown in browser dev tools
+
+Statements are keyed by their SQL text with bound parameters as
+placeholders, so the same SELECT run for each of N parent rows shows up as
+one statement executed N times. Statements repeated at least
+DB_REPEATED_QUERY_THRESHOLD times in a request are logged as a likely N+1
+and counted in an X-DB-Repeated-Queries header. An executemany counts once.
+
+query_budget() caps the statements a view may execute. Exceeding it raises
+QueryBudgetExceeded when DB_QUERY_BUDGET_STRICT is set (the default under
+TESTING, so regressions fail tests) and logs a warning otherwise. A budget
+is the cost of a full response: the version probe of a conditional GET
+(see conditional.py), run inside version_probe(), is reported in the
+headers but not counted against it, so a stale If-None-Match stays within
+budget.
+
+Statements run by streamed (NDJSON) response bodies execute after the
+headers are sent and are not included in them.
+
+Configuration:
+    DB_QUERY_STATS: Enable counting and the response headers (default: True)
+    DB_REPEATED_QUERY_THRESHOLD: Repeats of one statement flagged as N+1 (default: 3)
+    DB_QUERY_BUDGET_STRICT: Raise on exceeded budgets (default: TESTING)
+"""
+
+import functools
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Tuple
+
+from flask import Flask, Response, current_app, g, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_collectors: ContextVar[Tuple['QueryStats', ...]] = ContextVar('query_stats_collectors', default=())
+_in_version_probe: ContextVar[bool] = ContextVar('query_stats_version_probe', default=False)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A view executed more SQL statements than its budget allows."""
+
+
+class QueryStats:
+    """Statements executed while a collector was active."""
+
+    def __init__(self):
+        self.count = 0
+        self.probes = 0
+        self.duration_ms = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, duration_ms: float, probe: bool = False) -> None:
+        self.count += 1
+        self.probes += probe
+        self.duration_ms += duration_ms
+        self.statements[statement] += 1
+
+    @property
+    def budgeted(self) -> int:
+        """Statements counted against a query_budget(), i.e. all but version probes."""
+        return self.count - self.probes
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements executed at least threshold times, most repeated first."""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """Count the statements executed inside the block.
+
+    Example:
+        with count_queries() as stats:
+            client.get('/api/workouts?block_id=1')
+        assert stats.count <= 2
+    """
+    stats = QueryStats()
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+
+@contextmanager
+def version_probe() -> Iterator[None]:
+    """Mark the statements inside as a conditional GET's version probe."""
+    token = _in_version_probe.set(True)
+    try:
+        yield
+    finally:
+        _in_version_probe.reset(token)
+
+
+def query_budget(max_queries: int) -> Callable:
+    """Decorate a view to cap the SQL statements it may execute.
+
+    Args:
+        max_queries: Maximum number of statements per request, not
+            counting a version probe
+    """
+    def decorator(view: Callable) -> Callable:
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with count_queries() as stats:
+                response = view(*args, **kwargs)
+            if stats.budgeted > max_queries:
+                message = (f"{request.endpoint} executed {stats.budgeted} SQL statements, "
+                           f"over its budget of {max_queries}")
+                if current_app.config.get('DB_QUERY_BUDGET_STRICT'):
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return response
+        return wrapper
+    return decorator
+
+
+def instrument_engine(engine) -> None:
+    """Attach statement counting to an engine."""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        if _collectors.get():
+            conn.info.setdefault('query_stats_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        collectors = _collectors.get()
+        starts = conn.info.get('query_stats_start')
+        if not collectors or not starts:
+            return
+        duration_ms = (time.perf_counter() - starts.pop()) * 1000
+        probe = _in_version_probe.get()
+        for stats in collectors:
+            stats.record(statement, duration_ms, probe)
+
+
+def init_query_stats(app: Flask) -> None:
+    """Count statements per request and report them in response headers."""
+    from .models import db
+
+    app.config.setdefault('DB_QUERY_STATS', True)
+    app.config.setdefault('DB_REPEATED_QUERY_THRESHOLD', 3)
+    app.config.setdefault('DB_QUERY_BUDGET_STRICT', app.config.get('TESTING', False))
+    if not app.config['DB_QUERY_STATS']:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+    threshold = app.config['DB_REPEATED_QUERY_THRESHOLD']
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats()
+        g.query_stats_token = _collectors.set(_collectors.get() + (g.query_stats,))
+
+    @app.after_request
+    def report_query_stats(response: Response) -> Response:
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+        response.headers['X-DB-Queries'] = str(stats.count)
+        response.headers.add('Server-Timing', f'db;dur={stats.duration_ms:.1f};desc="{stats.count} queries"')
+
+        repeated = stats.repeated(threshold)
+        if repeated:
+            response.headers['X-DB-Repeated-Queries'] = str(len(repeated))
+            for sql, n in repeated:
+                logger.warning(f"Possible N+1 in {request.method} {request.path}: "
+                               f"statement executed {n} times: {' '.join(sql.split())[:200]}")
+        return response
+
+    @app.teardown_request
+    def stop_query_stats(exc):
+        token = g.pop('query_stats_token', None)
+        if token is not None:
+            _collectors.reset(token)
@@ -0,0 +1,326 @@
+"""Incrementally maintained personal records.
+
+PersonalRecord rows hold the heaviest set per (user, exercise type, rep
+count) together with the workout it was logged in. The write paths report
+workout changes the same way as for the volume rollups, after the change
+has been applied:
+
+    before = WorkoutState.of(workout)
+    workout.exercises = data['exercises']
+    record_volume_changes([(before, WorkoutState.of(workout))])
+    update_personal_records([(before, WorkoutState.of(workout))])
+    db.session.commit()
+
+Sets that beat a workout's previous best are upserted, replacing the
+record only where they are heavier. A best that got lighter or disappeared
+(an edited or deleted log) matters only if that workout holds the record;
+then the records of that user and exercise type, and nothing else, are
+recomputed from the workouts containing the exercise. A write that touches
+no logged sets costs no queries.
+
+Estimated 1RMs are computed when records are read, with the formula chosen
+by the caller. rebuild_records() recomputes everything from scratch (see
+scripts/rebuild_personal_records.py).
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .json_queries import has_exercise
+from .models import db, PersonalRecord, SetLog, TrainingBlock, TrainingPlan, Workout
+from .rollups import AppendedSets, WorkoutState, block_users, logged_sets, with_set_logs
+
+E1RM_FORMULAS = ('epley', 'brzycki')
+_CENT = Decimal('0.01')
+
+# (exercise_type_id, rep_count) -> (weight, achieved_on)
+Bests = Dict[Tuple[int, int], Tuple[Decimal, Optional[date]]]
+
+# (user_id, exercise_type_id, rep_count) -> (weight, workout_id, achieved_on)
+Records = Dict[Tuple[int, int, int], Tuple[Decimal, int, Optional[date]]]
+
+
+def estimated_1rm(weight: Decimal, reps: int, formula: str = 'epley') -> Optional[Decimal]:
+    """Estimate a one-rep max from a set.
+
+    Args:
+        weight: Weight lifted
+        reps: Repetitions performed
+        formula: 'epley' (w * (1 + r / 30)) or 'brzycki' (w * 36 / (37 - r))
+
+    Returns:
+        Estimated 1RM rounded to 0.01, or None where the formula is undefined
+        (Brzycki at 37 reps or more)
+
+    Raises:
+        ValueError: If the formula is unknown
+    """
+    if formula not in E1RM_FORMULAS:
+        raise ValueError(f"formula must be one of: {', '.join(E1RM_FORMULAS)}")
+    weight = Decimal(weight)
+    if reps == 1:
+        return weight.quantize(_CENT)
+    if formula == 'epley':
+        return (weight * (1 + Decimal(reps) / 30)).quantize(_CENT)
+    if reps >= 37:
+        return None
+    return (weight * 36 / (37 - reps)).quantize(_CENT)
+
+
+def workout_bests(state: WorkoutState) -> Bests:
+    """Heaviest set per exercise type and rep count in one workout."""
+    bests: Bests = {}
+    for logged in logged_sets(state):
+        if logged.reps <= 0 or logged.kilograms <= 0:
+            continue
+        key = (logged.exercise_type_id, logged.reps)
+        weight = logged.kilograms.quantize(_CENT)
+        if key not in bests or weight > bests[key][0]:
+            bests[key] = (weight, logged.day)
+    return bests
+
+
+def _keep_heaviest(records: Records, key: Tuple[int, int, int], record: Tuple[Decimal, int, Optional[date]]) -> None:
+    if key not in records or record[0] > records[key][0]:
+        records[key] = record
+
+
+def _upsert(records: Records) -> None:
+    """Store records, replacing existing ones only where they are heavier."""
+    table = PersonalRecord.__table__
+    now = datetime.utcnow()
+    rows = [
+        {
+            'user_id': user_id,
+            'exercise_type_id': type_id,
+            'rep_count': reps,
+            'weight': weight,
+            'workout_id': workout_id,
+            'achieved_on': achieved_on,
+            'updated_at': now
+        }
+        for (user_id, type_id, reps), (weight, workout_id, achieved_on) in records.items()
+    ]
+    if not rows:
+        return
+
+    dialect = db.session.get_bind(mapper=PersonalRecord).dialect.name
+    insert = (postgresql.insert if dialect == 'postgresql' else sqlite.insert)(table)
+    db.session.execute(
+        insert.on_conflict_do_update(
+            index_elements=[column.name for column in table.primary_key],
+            set_={
+                'weight': insert.excluded.weight,
+                'workout_id': insert.excluded.workout_id,
+                'achieved_on': insert.excluded.achieved_on,
+                'updated_at': insert.excluded.updated_at
+            },
+            where=insert.excluded.weight > table.c.weight
+        ),
+        rows
+    )
+
+
+def _collect(workouts, batch_size: int = 500) -> Records:
+    """Heaviest sets across the workouts selected by a statement.
+
+    Args:
+        workouts: Select of Workout.id, block_id, planned_date, actual_date,
+            exercises and the owning user_id, ordered by Workout.id
+        batch_size: Workouts loaded per round trip
+
+    Returns:
+        The best set per user, exercise type and rep count; ties go to the
+        earliest workout
+    """
+    records: Records = {}
+    result = db.session.execute(workouts.execution_options(yield_per=batch_size))
+    for batch in result.partitions():
+        logs = defaultdict(list)
+        for log in db.session.scalars(
+                db.select(SetLog).where(SetLog.workout_id.in_([row.id for row in batch]))):
+            logs[log.workout_id].append(log)
+        for row in batch:
+            for (type_id, reps), (weight, day) in workout_bests(WorkoutState.of(row, logs[row.id])).items():
+                _keep_heaviest(records, (row.user_id, type_id, reps), (weight, row.id, day))
+    return records
+
+
+def _user_workouts():
+    return (
+        db.select(Workout.id, Workout.block_id, Workout.planned_date, Workout.actual_date,
+                  Workout.exercises, TrainingPlan.user_id)
+        .join(TrainingBlock, Workout.block_id == TrainingBlock.id)
+        .join(TrainingPlan)
+        .order_by(Workout.id)
+    )
+
+
+def recompute_records(pairs: Iterable[Tuple[int, int]]) -> int:
+    """Recompute the records of the given exercise types only.
+
+    Reads just the user's workouts that contain the exercise (an indexed
+    JSON match) and their set_logs rows.
+
+    Args:
+        pairs: (user_id, exercise_type_id) pairs
+
+    Returns:
+        Number of record rows written
+    """
+    types_by_user: Dict[int, Set[int]] = defaultdict(set)
+    for user_id, type_id in pairs:
+        types_by_user[user_id].add(type_id)
+
+    written = 0
+    for user_id, type_ids in types_by_user.items():
+        records = _collect(_user_workouts().where(
+            TrainingPlan.user_id == user_id,
+            or_(*(has_exercise(exercise_type_id=type_id) for type_id in sorted(type_ids)))
+        ))
+        db.session.execute(db.delete(PersonalRecord).where(
+            PersonalRecord.user_id == user_id,
+            PersonalRecord.exercise_type_id.in_(type_ids)
+        ))
+        records = {key: record for key, record in records.items() if key[1] in type_ids}
+        _upsert(records)
+        written += len(records)
+    return written
+
+
+def records_held_by(*criteria: Any) -> Set[Tuple[int, int]]:
+    """(user_id, exercise_type_id) pairs whose records come from matching workouts.
+
+    Call it before deleting workouts in bulk, and pass the result to
+    recompute_records() afterwards.
+
+    Args:
+        criteria: WHERE clauses on Workout, e.g. Workout.block_id.in_(ids)
+    """
+    return set(db.session.execute(
+        db.select(PersonalRecord.user_id, PersonalRecord.exercise_type_id)
+        .where(PersonalRecord.workout_id.in_(db.select(Workout.id).where(*criteria)))
+        .distinct()
+    ).all())
+
+
+def update_personal_records(changes: Iterable[Tuple[Optional[WorkoutState], Optional[WorkoutState]]]) -> None:
+    """Apply workout changes to the personal records.
+
+    Call after the change has been applied (or the workout deleted) in the
+    current transaction, since a targeted recompute reads the new state.
+
+    Args:
+        changes: (before, after) state pairs; before is None for created
+            workouts and after is None for deleted ones
+    """
+    gains: Dict[Tuple[int, int, int], Tuple[Decimal, int, Optional[date]]] = {}
+    lowered: Dict[int, Set[Tuple[int, int]]] = defaultdict(set)
+    for before, after in with_set_logs(list(changes)):
+        old = workout_bests(before) if before is not None else {}
+        new = workout_bests(after) if after is not None else {}
+        moved = before is not None and after is not None and before.block_id != after.block_id
+        for key, (weight, day) in new.items():
+            if moved or key not in old or weight > old[key][0]:
+                _keep_heaviest(gains, (after.block_id,) + key, (weight, after.id, day))
+        for key, best in old.items():
+            if moved or new.get(key) != best:
+                lowered[before.id].add(key)
+
+    stale: Set[Tuple[int, int]] = set()
+    if lowered:
+        held = db.session.execute(
+            db.select(PersonalRecord.user_id, PersonalRecord.exercise_type_id,
+                      PersonalRecord.rep_count, PersonalRecord.workout_id)
+            .where(PersonalRecord.workout_id.in_(lowered))
+        )
+        stale = {
+            (user_id, type_id) for user_id, type_id, reps, workout_id in held
+            if (type_id, reps) in lowered[workout_id]
+        }
+    if gains:
+        owners = block_users(block_id for block_id, _, _ in gains)
+        records: Records = {}
+        for (block_id, type_id, reps), record in gains.items():
+            if block_id in owners and (owners[block_id], type_id) not in stale:
+                _keep_heaviest(records, (owners[block_id], type_id, reps), record)
+        _upsert(records)
+    if stale:
+        recompute_records(stale)
+
+
+def append_set_records(appended: Optional[AppendedSets]) -> None:
+    """Add sets just appended to a workout to the personal records."""
+    if appended is None:
+        return
+    records: Records = {}
+    for logged in appended.sets:
+        if logged.reps > 0 and logged.kilograms > 0:
+            key = (appended.user_id, logged.exercise_type_id, logged.reps)
+            _keep_heaviest(records, key, (logged.kilograms.quantize(_CENT), appended.workout_id, logged.day))
+    _upsert(records)
+
+
+def rebuild_records(user_id: Optional[int] = None, batch_size: int = 500) -> int:
+    """Recompute the personal records from every workout, in the current transaction.
+
+    Args:
+        user_id: Only rebuild this user's records (default: all users)
+        batch_size: Workouts loaded per round trip
+
+    Returns:
+        Number of record rows written
+    """
+    delete = db.delete(PersonalRecord)
+    workouts = _user_workouts()
+    if user_id is not None:
+        delete = delete.where(PersonalRecord.user_id == user_id)
+        workouts = workouts.where(TrainingPlan.user_id == user_id)
+    db.session.execute(delete)
+    records = _collect(workouts, batch_size)
+    _upsert(records)
+    return len(records)
+
+
+def personal_records(user_id: int, exercise_type_id: Optional[int] = None,
+                     formula: str = 'epley') -> List[Dict[str, Any]]:
+    """Read a user's personal records with their estimated 1RMs.
+
+    Args:
+        user_id: User ID
+        exercise_type_id: Only this exercise type
+        formula: e1RM formula, 'epley' or 'brzycki'
+
+    Returns:
+        Rows with exercise_type_id, rep_count, weight (kg), e1rm,
+        workout_id and achieved_on, ordered by exercise type and rep count
+
+    Raises:
+        ValueError: If the formula is unknown
+    """
+    if formula not in E1RM_FORMULAS:
+        raise ValueError(f"formula must be one of: {', '.join(E1RM_FORMULAS)}")
+    stmt = (
+        db.select(PersonalRecord)
+        .where(PersonalRecord.user_id == user_id)
+        .order_by(PersonalRecord.exercise_type_id, PersonalRecord.rep_count)
+    )
+    if exercise_type_id is not None:
+        stmt = stmt.where(PersonalRecord.exercise_type_id == exercise_type_id)
+
+    return [
+        {
+            'exercise_type_id': record.exercise_type_id,
+            'rep_count': record.rep_count,
+            'weight': record.weight,
+            'e1rm': estimated_1rm(record.weight, record.rep_count, formula),
+            'workout_id': record.workout_id,
+            'achieved_on': record.achieved_on
+        }
+        for record in db.session.scalars(stmt)
+    ]
@@ -0,0 +1,428 @@
+"""Incrementally maintained weekly volume rollups.
+
+VolumeRollup rows hold sets, reps and tonnage per (user, exercise type,
+ISO week, block). Every write path that changes logged sets reports the
+workout's state before and after the change; the volume of both states is
+computed in Python, and only the difference is applied as one upsert that
+adds to the existing totals, in the caller's transaction:
+
+    before = WorkoutState.of(workout)
+    workout.exercises = data['exercises']
+    record_volume_changes([(before, WorkoutState.of(workout))])
+    db.session.commit()
+
+Changes that touch no logged sets (renames, status changes, plan templates)
+produce an empty difference and cost no queries. Sets in the set_logs table
+are counted through the exercise type at their sequence in the workout's
+document; append_set_volume() adds newly appended ones.
+
+logged_sets() is shared with the personal records (core/records.py).
+
+rebuild_volume() recomputes the rollups from scratch, for backfills and to
+repair drift (see scripts/rebuild_volume_rollups.py).
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .models import db, SetLog, TrainingBlock, TrainingPlan, VolumeRollup, Workout
+from .set_logs import parse_weight
+
+LB_TO_KG = Decimal('0.45359237')
+_CENT = Decimal('0.01')
+
+# (block_id, exercise_type_id, iso_week) -> [sets, reps, tonnage]
+Volume = Dict[Tuple[int, int, int], List[Any]]
+
+
+class WorkoutState(NamedTuple):
+    """The parts of a workout that determine its volume."""
+    id: Optional[int]
+    block_id: int
+    planned_date: Any
+    actual_date: Any
+    exercises: Any
+    set_logs: Sequence[Any] = ()
+
+    @classmethod
+    def of(cls, workout: Any, set_logs: Sequence[Any] = ()) -> 'WorkoutState':
+        """Capture a Workout (or a row with the same attributes)."""
+        return cls(workout.id, workout.block_id, workout.planned_date, workout.actual_date,
+                   workout.exercises, set_logs)
+
+
+def iso_week(day: date) -> int:
+    """Encode a date's ISO week as year * 100 + week, e.g. 202403."""
+    year, week, _ = day.isocalendar()
+    return year * 100 + week
+
+
+def iso_week_label(value: int) -> str:
+    """Render an encoded ISO week as "2024-W03"."""
+    return f"{value // 100}-W{value % 100:02d}"
+
+
+def iso_week_start(value: int) -> date:
+    """Monday of an encoded ISO week."""
+    return date.fromisocalendar(value // 100, value % 100, 1)
+
+
+def _as_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).date()
+        except ValueError:
+            return None
+    return None
+
+
+def _kilograms(weight: Any, unit: Optional[str] = None) -> Decimal:
+    """Weight of a set in kg; unparseable or missing weights count as 0."""
+    try:
+        number, unit = parse_weight(weight, unit)
+    except ValueError:
+        return Decimal(0)
+    if number is None:
+        return Decimal(0)
+    return number * LB_TO_KG if unit == 'lb' else number
+
+
+def _reps(value: Any) -> int:
+    return value if isinstance(value, int) and not isinstance(value, bool) else 0
+
+
+def _add_set(volume: Volume, key: Tuple[int, int, int], reps: int, kilograms: Decimal) -> None:
+    totals = volume.setdefault(key, [0, 0, Decimal(0)])
+    totals[0] += 1
+    totals[1] += reps
+    totals[2] += (reps * kilograms).quantize(_CENT)
+
+
+def exercise_types(exercises: Any) -> Dict[Any, int]:
+    """Map each exercise's "sequence" to its exercise_type_id."""
+    if not isinstance(exercises, dict) or not isinstance(exercises.get('exercises'), list):
+        return {}
+    return {
+        exercise.get('sequence'): exercise['exercise_type_id']
+        for exercise in exercises['exercises']
+        if isinstance(exercise, dict) and isinstance(exercise.get('exercise_type_id'), int)
+    }
+
+
+class LoggedSet(NamedTuple):
+    """One logged set of a workout, resolved to its exercise type."""
+    exercise_type_id: int
+    day: Optional[date]
+    reps: int
+    kilograms: Decimal
+
+
+def _list(value: Any) -> list:
+    """The value if it is a JSON array, else empty; documents are not validated."""
+    return value if isinstance(value, list) else []
+
+
+def logged_sets(state: WorkoutState) -> Iterator[LoggedSet]:
+    """Yield the sets logged in a workout's exercises JSON and set_logs rows.
+
+    JSON sets are dated by their log's timestamp, falling back to the
+    workout's actual or planned date; set_logs rows are resolved to the
+    exercise type at their sequence in the document.
+    """
+    exercises = state.exercises if isinstance(state.exercises, dict) else {}
+    fallback = _as_date(state.actual_date) or _as_date(state.planned_date)
+
+    for exercise in _list(exercises.get('exercises')):
+        if not isinstance(exercise, dict) or not isinstance(exercise.get('exercise_type_id'), int):
+            continue
+        for entry in _list(exercise.get('logs')):
+            if not isinstance(entry, dict):
+                continue
+            day = _as_date(entry.get('timestamp')) or fallback
+            for set_data in _list(entry.get('sets')):
+                if isinstance(set_data, dict):
+                    yield LoggedSet(exercise['exercise_type_id'], day,
+                                    _reps(set_data.get('reps')), _kilograms(set_data.get('weight')))
+
+    if state.set_logs:
+        types = exercise_types(exercises)
+        for log in state.set_logs:
+            type_id = types.get(log.exercise_sequence)
+            if type_id is not None:
+                yield LoggedSet(type_id, log.log_ts.date(), _reps(log.reps), _kilograms(log.weight, log.weight_unit))
+
+
+def workout_volume(state: WorkoutState) -> Volume:
+    """Compute the volume contributed by one workout."""
+    volume: Volume = {}
+    for logged in logged_sets(state):
+        if logged.day is not None:
+            key = (state.block_id, logged.exercise_type_id, iso_week(logged.day))
+            _add_set(volume, key, logged.reps, logged.kilograms)
+    return volume
+
+
+def _subtract(after: Volume, before: Volume) -> Volume:
+    delta: Volume = {}
+    for key in after.keys() | before.keys():
+        new = after.get(key, (0, 0, Decimal(0)))
+        old = before.get(key, (0, 0, Decimal(0)))
+        change = [new[0] - old[0], new[1] - old[1], new[2] - old[2]]
+        if any(change):
+            delta[key] = change
+    return delta
+
+
+def block_users(block_ids: Iterable[int]) -> Dict[int, int]:
+    """Look up the owning user of each block in one query."""
+    return dict(db.session.execute(
+        db.select(TrainingBlock.id, TrainingPlan.user_id)
+        .join(TrainingPlan)
+        .where(TrainingBlock.id.in_(set(block_ids)))
+    ).all())
+
+
+def with_set_logs(changes: List[Tuple[Optional[WorkoutState], Optional[WorkoutState]]]):
+    """Attach set_logs rows to changes that move them to another exercise type.
+
+    Appended sets are counted through the exercise type at their sequence,
+    so they only change volume when that mapping (or the block) changes.
+    """
+    affected = {
+        before.id for before, after in changes
+        if before is not None and after is not None and before.id is not None
+        and not before.set_logs
+        and (before.block_id != after.block_id
+             or exercise_types(before.exercises) != exercise_types(after.exercises))
+    }
+    if not affected:
+        return changes
+    logs = defaultdict(list)
+    for log in db.session.scalars(db.select(SetLog).where(SetLog.workout_id.in_(affected))):
+        logs[log.workout_id].append(log)
+    return [
+        (before._replace(set_logs=logs[before.id]), after._replace(set_logs=logs[before.id]))
+        if before is not None and before.id in logs and after is not None else (before, after)
+        for before, after in changes
+    ]
+
+
+def _apply(delta: Volume, owners: Dict[int, int]) -> None:
+    """Add a volume difference to the rollups with one upsert."""
+    table = VolumeRollup.__table__
+    now = datetime.utcnow()
+    rows = [
+        {
+            'user_id': owners[block_id],
+            'exercise_type_id': type_id,
+            'iso_week': week,
+            'block_id': block_id,
+            'sets': sets,
+            'reps': reps,
+            'tonnage': tonnage,
+            'updated_at': now
+        }
+        for (block_id, type_id, week), (sets, reps, tonnage) in delta.items()
+        if block_id in owners
+    ]
+    if not rows:
+        return
+
+    dialect = db.session.get_bind(mapper=VolumeRollup).dialect.name
+    insert = (postgresql.insert if dialect == 'postgresql' else sqlite.insert)(table)
+    db.session.execute(
+        insert.on_conflict_do_update(
+            index_elements=[column.name for column in table.primary_key],
+            set_={
+                'sets': table.c.sets + insert.excluded.sets,
+                'reps': table.c.reps + insert.excluded.reps,
+                'tonnage': table.c.tonnage + insert.excluded.tonnage,
+                'updated_at': insert.excluded.updated_at
+            }
+        ),
+        rows
+    )
+    if any(totals[0] < 0 for totals in delta.values()):
+        # Drop rows whose sets were all removed
+        db.session.execute(
+            db.delete(VolumeRollup).where(
+                VolumeRollup.block_id.in_({block_id for block_id, _, _ in delta}),
+                VolumeRollup.sets <= 0
+            )
+        )
+
+
+def record_volume_changes(changes: Iterable[Tuple[Optional[WorkoutState], Optional[WorkoutState]]]) -> None:
+    """Apply the volume difference of workout changes to the rollups.
+
+    Args:
+        changes: (before, after) state pairs; before is None for created
+            workouts and after is None for deleted ones
+    """
+    changes = with_set_logs(list(changes))
+    delta: Volume = {}
+    for before, after in changes:
+        change = _subtract(
+            workout_volume(after) if after is not None else {},
+            workout_volume(before) if before is not None else {}
+        )
+        for key, (sets, reps, tonnage) in change.items():
+            totals = delta.setdefault(key, [0, 0, Decimal(0)])
+            totals[0] += sets
+            totals[1] += reps
+            totals[2] += tonnage
+
+    delta = {key: totals for key, totals in delta.items() if any(totals)}
+    if delta:
+        _apply(delta, block_users(block_id for block_id, _, _ in delta))
+
+
+class AppendedSets(NamedTuple):
+    """Sets just appended to a workout, resolved to their exercise type."""
+    workout_id: int
+    block_id: int
+    user_id: int
+    sets: List[LoggedSet]
+
+
+def appended_sets(workout_id: int, exercise_sequence: int,
+                  rows: Sequence[Dict[str, Any]]) -> Optional[AppendedSets]:
+    """Resolve the rows returned by set_logs.append_sets() in one query.
+
+    Returns:
+        The appended sets with the workout's block and owner, or None if
+        there are none or the sequence maps to no exercise type
+    """
+    if not rows:
+        return None
+    found = db.session.execute(
+        db.select(Workout.block_id, Workout.exercises, TrainingPlan.user_id)
+        .join(TrainingBlock, Workout.block_id == TrainingBlock.id)
+        .join(TrainingPlan)
+        .where(Workout.id == workout_id)
+    ).one_or_none()
+    if found is None:
+        return None
+    block_id, exercises, user_id = found
+    type_id = exercise_types(exercises).get(exercise_sequence)
+    if type_id is None:
+        return None
+    return AppendedSets(workout_id, block_id, user_id, [
+        LoggedSet(type_id, row['log_ts'].date(), _reps(row['reps']), _kilograms(row['weight'], row['weight_unit']))
+        for row in rows
+    ])
+
+
+def append_set_volume(appended: Optional[AppendedSets]) -> None:
+    """Add sets just appended to a workout to the rollups."""
+    if appended is None:
+        return
+    volume: Volume = {}
+    for logged in appended.sets:
+        key = (appended.block_id, logged.exercise_type_id, iso_week(logged.day))
+        _add_set(volume, key, logged.reps, logged.kilograms)
+    _apply(volume, {appended.block_id: appended.user_id})
+
+
+def rebuild_volume(user_id: Optional[int] = None, batch_size: int = 500) -> int:
+    """Recompute the rollups from every workout, in the current transaction.
+
+    Args:
+        user_id: Only rebuild this user's rollups (default: all users)
+        batch_size: Workouts loaded per round trip
+
+    Returns:
+        Number of rollup rows written
+    """
+    delete = db.delete(VolumeRollup)
+    workouts = (
+        db.select(Workout)
+        .join(TrainingBlock, Workout.block_id == TrainingBlock.id)
+        .join(TrainingPlan)
+        .order_by(Workout.id)
+    )
+    blocks = db.select(TrainingBlock.id, TrainingPlan.user_id).join(TrainingPlan)
+    if user_id is not None:
+        delete = delete.where(VolumeRollup.user_id == user_id)
+        workouts = workouts.where(TrainingPlan.user_id == user_id)
+        blocks = blocks.where(TrainingPlan.user_id == user_id)
+    db.session.execute(delete)
+    owners = dict(db.session.execute(blocks).all())
+
+    volume: Volume = {}
+    result = db.session.execute(workouts.execution_options(yield_per=batch_size)).scalars()
+    for batch in result.partitions():
+        logs = defaultdict(list)
+        for log in db.session.scalars(
+                db.select(SetLog).where(SetLog.workout_id.in_([workout.id for workout in batch]))):
+            logs[log.workout_id].append(log)
+        for workout in batch:
+            for key, (sets, reps, tonnage) in workout_volume(WorkoutState.of(workout, logs[workout.id])).items():
+                totals = volume.setdefault(key, [0, 0, Decimal(0)])
+                totals[0] += sets
+                totals[1] += reps
+                totals[2] += tonnage
+
+    _apply(volume, owners)
+    return len(volume)
+
+
+def weekly_volume(user_id: int, start: date, end: date, group_by: str = 'exercise',
+                  exercise_type_id: Optional[int] = None, block_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Read a user's weekly volume between two dates from the rollups.
+
+    One range scan over (user_id, [exercise_type_id,] iso_week), summed per
+    week and exercise type or per week and block.
+
+    Args:
+        user_id: User ID
+        start: A day in the first week
+        end: A day in the last week
+        group_by: 'exercise' or 'block'
+        exercise_type_id: Only this exercise type
+        block_id: Only this training block
+
+    Returns:
+        Rows with iso_week, week_start, exercise_type_id or block_id, sets,
+        reps and tonnage, ordered by week
+    """
+    group_column = VolumeRollup.exercise_type_id if group_by == 'exercise' else VolumeRollup.block_id
+    stmt = (
+        db.select(
+            VolumeRollup.iso_week,
+            group_column,
+            db.func.sum(VolumeRollup.sets),
+            db.func.sum(VolumeRollup.reps),
+            db.func.sum(VolumeRollup.tonnage)
+        )
+        .where(
+            VolumeRollup.user_id == user_id,
+            VolumeRollup.iso_week.between(iso_week(start), iso_week(end))
+        )
+        .group_by(VolumeRollup.iso_week, group_column)
+        .order_by(VolumeRollup.iso_week, group_column)
+    )
+    if exercise_type_id is not None:
+        stmt = stmt.where(VolumeRollup.exercise_type_id == exercise_type_id)
+    if block_id is not None:
+        stmt = stmt.where(VolumeRollup.block_id == block_id)
+
+    return [
+        {
+            'iso_week': iso_week_label(week),
+            'week_start': iso_week_start(week),
+            group_column.key: group_id,
+            'sets': sets,
+            'reps': reps,
+            'tonnage': Decimal(tonnage or 0).quantize(_CENT)
+        }
+        for week, group_id, sets, reps, tonnage in db.session.execute(stmt)
+    ]
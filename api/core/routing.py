@@ -0,0 +1,151 @@
+"""Read-replica routing with read-your-writes stickiness.
+
+When DB_REPLICA_URL is configured it becomes the 'replica' bind, and the
+session sends reads made while handling GET/HEAD requests there. Everything
+else goes to the primary:
+
+- requests with other methods
+- any INSERT/UPDATE/DELETE and ORM flush, and every read after them in the
+  same request
+- code running outside a request (scripts, migrations, the shell)
+
+A client that has just written must not read stale data from a lagging
+replica, so after a request commits a write the response pins that client
+to the primary for DB_STICKY_SECONDS: a db_primary_until cookie for
+browsers, and an X-DB-Primary-Until header (a Unix timestamp) that other
+clients can echo back on their next requests.
+
+Without a replica everything reads from the primary and no stickiness is
+recorded. Locally, two SQLite files stand in for a primary and its replica:
+
+    DATABASE_URL=sqlite:///primary.db DB_REPLICA_URL=sqlite:///replica.db
+
+db.create_all() only builds the primary, so at startup a SQLite replica
+that lacks any table is seeded with a copy of a SQLite primary. Any other
+replica without the schema is not used: reads stay on the primary and a
+warning is logged.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from flask import Flask, Response, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, inspect
+
+REPLICA_BIND = 'replica'
+READ_METHODS = frozenset({'GET', 'HEAD'})
+STICKY_COOKIE = 'db_primary_until'
+STICKY_HEADER = 'X-DB-Primary-Until'
+
+logger = logging.getLogger(__name__)
+
+
+def replica_binds(url: Optional[str], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Build SQLALCHEMY_BINDS with the replica, if one is configured."""
+    if not url:
+        return {}
+    return {REPLICA_BIND: {'url': url, **options}}
+
+
+class RoutingSession(Session):
+    """Session that reads from the replica bind while a request allows it."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and g.get('db_read_replica'):
+            if self._flushing or getattr(clause, 'is_dml', False):
+                # Writes go to the primary, and so does the rest of the request
+                self.info['db_wrote'] = True
+            elif not self.info.get('db_wrote') and REPLICA_BIND in self._db.engines:
+                return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_flush(session, flush_context):
+    session.info['db_wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _record_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['db_wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _record_commit(session):
+    if session.info.pop('db_wrote', False) and has_request_context():
+        g.db_committed_write = True
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_writes(session):
+    session.info.pop('db_wrote', None)
+
+
+def _pinned_to_primary() -> bool:
+    """Whether the client wrote recently enough to need the primary."""
+    value = request.headers.get(STICKY_HEADER) or request.cookies.get(STICKY_COOKIE)
+    if not value:
+        return False
+    try:
+        return float(value) > time.time()
+    except ValueError:
+        return False
+
+
+def init_replica_schema(app: Flask) -> bool:
+    """Make sure the replica has the primary's tables before reads go to it.
+
+    A SQLite replica missing tables is overwritten with a copy of a SQLite
+    primary (including data and the search index), like a first replication.
+
+    Returns:
+        Whether the replica can serve reads
+    """
+    db = app.extensions['sqlalchemy']
+    with app.app_context():
+        primary, replica = db.engine, db.engines[REPLICA_BIND]
+        missing = set(db.metadata.tables) - set(inspect(replica).get_table_names())
+        if not missing:
+            return True
+        if primary.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+            logger.warning(f"Replica lacks tables {sorted(missing)}; reads stay on the primary")
+            return False
+        source, target = primary.raw_connection(), replica.raw_connection()
+        try:
+            source.driver_connection.backup(target.driver_connection)
+        finally:
+            target.close()
+            source.close()
+        logger.info("Seeded the SQLite replica from the primary")
+        return True
+
+
+def init_read_routing(app: Flask) -> None:
+    """Route GET requests to the replica and pin recent writers to the primary."""
+    app.config.setdefault('DB_STICKY_SECONDS', 5)
+    if REPLICA_BIND not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+    if not init_replica_schema(app):
+        return
+
+    @app.before_request
+    def choose_database():
+        g.db_read_replica = request.method in READ_METHODS and not _pinned_to_primary()
+
+    @app.after_request
+    def pin_writer_to_primary(response: Response) -> Response:
+        if g.get('db_committed_write'):
+            seconds = app.config['DB_STICKY_SECONDS']
+            until = f"{time.time() + seconds:.3f}"
+            response.headers[STICKY_HEADER] = until
+            response.set_cookie(
+                STICKY_COOKIE, until,
+                max_age=seconds,
+                httponly=True,
+                samesite='Lax',
+                secure=app.config.get('SESSION_COOKIE_SECURE', False)
+            )
+        return response
@@ -0,0 +1,214 @@
+"""Full-text and fuzzy search over the exercise catalog.
+
+search_catalog() ranks exercise types against free text and counts the
+matches per category in a single statement: a CTE of all matches, UNION
+ALL'd into one page of hits (narrowed by the category filter) and one row
+per category (not narrowed, so a UI can still show the other categories'
+counts).
+
+- Postgres: websearch_to_tsquery() against EXERCISE_SEARCH_DOCUMENT (name
+  weighted over description, GIN expression index ix_exercise_types_search)
+  OR pg_trgm similarity of the name (ix_exercise_types_name_trgm), so
+  misspelled and partial names still match. Ranked by ts_rank_cd() plus
+  the name's similarity.
+- SQLite: an external-content FTS5 table kept in sync by triggers, created
+  by init_exercise_search(). Every word matches as a prefix and results are
+  ranked by bm25() with the name weighted over the description. There is
+  no typo tolerance.
+
+Hits are paginated by (rank, id) with the usual cursors. The statements are
+built once per shape and cached in statement_cache.
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Flask
+from sqlalchemy import Double, Integer, String, bindparam, column, literal, null, or_, table, union_all
+from sqlalchemy.exc import OperationalError
+
+from .models import db, ExerciseType, EXERCISE_SEARCH_CONFIG, EXERCISE_SEARCH_DOCUMENT
+from .pagination import Keyset, page_bind_params, paginate, split_page
+from .queries import statement_cache
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'exercise_types_fts'
+DEFAULT_PAGE_SIZE = 20
+MAX_QUERY_LENGTH = 200
+
+_WORD = re.compile(r'\w+')
+
+# External content: the FTS table stores only the index and reads the text
+# from exercise_types; the triggers keep it in step with every write
+_FTS_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description, content='exercise_types', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON exercise_types BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON exercise_types BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE ON exercise_types BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+)
+
+_fts = table(FTS_TABLE, column('rowid', Integer), column(FTS_TABLE))
+
+
+def search_terms(dialect: str, q: str) -> Optional[str]:
+    """The value bound as :q for a dialect, or None if q has no words.
+
+    On SQLite each word becomes a quoted FTS5 prefix term, so user input
+    can never be read as FTS5 query syntax.
+    """
+    words = _WORD.findall(q)
+    if not words:
+        return None
+    if dialect == 'postgresql':
+        return q
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _postgresql_matches():
+    terms = bindparam('q', type_=String)
+    tsquery = db.func.websearch_to_tsquery(EXERCISE_SEARCH_CONFIG, terms)
+    rank = db.func.ts_rank_cd(EXERCISE_SEARCH_DOCUMENT, tsquery) + db.func.similarity(ExerciseType.name, terms)
+    return (
+        db.select(
+            ExerciseType.id, ExerciseType.name, ExerciseType.category, ExerciseType.description,
+            # float8, so cursor values round-trip exactly
+            db.cast(rank, Double).label('rank')
+        )
+        .where(or_(
+            EXERCISE_SEARCH_DOCUMENT.bool_op('@@')(tsquery),
+            ExerciseType.name.bool_op('%')(terms)
+        ))
+        .cte('matches')
+    )
+
+
+def _sqlite_matches():
+    hidden = _fts.c[FTS_TABLE]
+    return (
+        db.select(
+            ExerciseType.id, ExerciseType.name, ExerciseType.category, ExerciseType.description,
+            # bm25() is lower for better matches
+            db.cast(-db.func.bm25(hidden, 10.0, 1.0), Double).label('rank')
+        )
+        .select_from(_fts)
+        .join(ExerciseType, ExerciseType.id == _fts.c.rowid)
+        .where(hidden.match(bindparam('q', type_=String)))
+        .cte('matches')
+    )
+
+
+def search_statement(dialect: str, category: bool = False, after: bool = False):
+    """Build the search statement for one request shape.
+
+    Args:
+        dialect: Database dialect name
+        category: Whether hits are filtered by :category
+        after: Whether the page starts after a cursor
+
+    Returns:
+        (statement, keyset) with bindparams q, page_limit, category and the
+        keyset values; rows have kind 'hit' or 'facet'
+    """
+    matches = _postgresql_matches() if dialect == 'postgresql' else _sqlite_matches()
+    keyset = Keyset(matches.c.rank, matches.c.id, descending=True)
+
+    hits = db.select(
+        literal('hit').label('kind'), matches.c.id, matches.c.name, matches.c.category,
+        matches.c.description, matches.c.rank, null().label('total')
+    )
+    if category:
+        hits = hits.where(matches.c.category == bindparam('category'))
+    hits = paginate(keyset.order(hits), keyset, after).subquery('hits')
+
+    facets = db.select(
+        literal('facet'), null(), null(), matches.c.category, null(), null(), db.func.count()
+    ).group_by(matches.c.category)
+    return union_all(db.select(hits), facets), keyset
+
+
+def search_catalog(q: str, category: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                   after: Optional[str] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[str]]:
+    """Search exercise types, with category facets, in one query.
+
+    Args:
+        q: Free-text query
+        category: Only return hits in this category
+        limit: Page size
+        after: Cursor from the previous page
+
+    Returns:
+        (hits, facets, next_cursor): hits with id, name, category,
+        description and rank, best first; facets as value/count pairs,
+        largest first
+
+    Raises:
+        400: If the cursor is invalid
+    """
+    dialect = db.session.get_bind(mapper=ExerciseType).dialect.name
+    terms = search_terms(dialect, q)
+    if terms is None:
+        return [], [], None
+
+    shape = ('exercise_search', dialect, category is not None, bool(after))
+    stmt, keyset = statement_cache.get(shape, lambda: search_statement(*shape[1:]))
+    params = {'q': terms, **page_bind_params(keyset, limit, after)}
+    if category is not None:
+        params['category'] = category
+
+    hits, facets = [], []
+    for row in db.session.execute(stmt, params):
+        if row.kind == 'hit':
+            hits.append(row)
+        else:
+            facets.append({'value': row.category, 'count': row.total})
+
+    hits.sort(key=lambda row: (row.rank, row.id), reverse=True)
+    hits, next_cursor = split_page(hits, keyset, limit)
+    facets.sort(key=lambda facet: (-facet['count'], facet['value']))
+    return [
+        {
+            'id': row.id,
+            'name': row.name,
+            'category': row.category,
+            'description': row.description,
+            'rank': row.rank
+        }
+        for row in hits
+    ], facets, next_cursor
+
+
+def init_exercise_search(app: Flask) -> None:
+    """Create the FTS5 index on SQLite databases that lack it.
+
+    Postgres gets its search indexes from the models and migrations.
+    """
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name != 'sqlite':
+            return
+        try:
+            with engine.begin() as conn:
+                exists = conn.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+                ).first()
+                for ddl in _FTS_DDL:
+                    conn.exec_driver_sql(ddl)
+                if not exists:
+                    # Index the rows that predate the table
+                    conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        except OperationalError as e:
+            logger.warning(f"Exercise search unavailable, SQLite lacks FTS5: {e}")
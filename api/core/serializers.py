@@ -0,0 +1,341 @@
+"""Response serialization for the API.
+
+Every blueprint renders the same handful of models. Instead of each route
+building its response dict by hand, each model gets a ModelSerializer that is
+compiled once at import time: the field list becomes a single attrgetter, and
+the resulting rows are encoded straight to bytes with orjson, which handles
+date/datetime values (as ISO 8601 strings) and None natively, or with
+MessagePack when the client asks for it (see negotiation.py).
+
+List endpoints go through query_response(), which streams rows as NDJSON
+(one JSON object per line) when the client sends Accept: application/x-ndjson.
+Streaming executes with yield_per, so on Postgres rows come from a server-side
+cursor in batches and memory stays flat regardless of result size.
+
+query_response() and resource_response() also answer conditional GETs (see
+conditional.py) and honour a ?fields=id,name,... sparse fieldset: only the
+requested columns are selected, so e.g. the calendar can list workouts
+without ever reading the exercises JSON.
+
+Example:
+    return workout_serializer.response(workout)
+    return workout_serializer.query_response(
+        db.select(Workout).filter_by(block_id=block_id), workout_keyset
+    )
+"""
+
+from http import HTTPStatus
+from itertools import islice
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from flask import Response, abort, request, stream_with_context
+from sqlalchemy.orm import load_only
+
+from .models import db, User, TrainingPlan, TrainingBlock, ExerciseType, Workout, SetLog
+from .set_logs import attach_set_logs
+from .negotiation import JSON_MIMETYPE, NDJSON_MIMETYPE, best_mimetype, dumps_json, render
+from .pagination import Keyset, next_link, page_bind_params, page_params, paginate, split_page
+from .conditional import (
+    collection_etag, is_not_modified, not_modified,
+    resource_etag, resource_version, rows_version, version_statement
+)
+from .queries import statement_cache
+from .query_stats import version_probe
+
+# Rows fetched per round trip when streaming
+STREAM_BATCH_SIZE = 200
+
+# Called with (instances, rows) to fill in a field from another table for a
+# whole batch at once
+Enricher = Callable[[Sequence[Any], List[Dict[str, Any]]], None]
+
+
+def _compile_row(fields: Tuple[str, ...]) -> Callable[[Any], Dict[str, Any]]:
+    """Build a function turning a model instance into a dict of the given fields."""
+    getter = attrgetter(*fields)
+    if len(fields) == 1:
+        field = fields[0]
+        return lambda obj: {field: getter(obj)}
+    return lambda obj: dict(zip(fields, getter(obj)))
+
+
+class ModelSerializer:
+    """Serializes instances of a single model to dicts or JSON bytes.
+
+    Args:
+        model: SQLAlchemy model class
+        fields: Attribute names to include, in output order
+        enrichers: Per-field functions that post-process a batch of rows,
+            applied only when the field is serialized
+    """
+
+    def __init__(self, model, fields: Sequence[str], enrichers: Optional[Dict[str, Enricher]] = None):
+        columns = model.__table__.columns.keys()
+        unknown = [field for field in fields if field not in columns]
+        if unknown:
+            raise ValueError(f"Unknown {model.__name__} fields: {', '.join(unknown)}")
+
+        self.model = model
+        self.fields = tuple(fields)
+        self._row = _compile_row(self.fields)
+        self._all_enrichers = enrichers or {}
+        self._enrichers = [func for field, func in self._all_enrichers.items() if field in self.fields]
+        self._subsets: Dict[Tuple[str, ...], 'ModelSerializer'] = {}
+
+    def only(self, names: Iterable[str]) -> 'ModelSerializer':
+        """Return a serializer restricted to a subset of this one's fields.
+
+        Subsets keep this serializer's field order and are compiled once.
+
+        Raises:
+            ValueError: If a name is not one of this serializer's fields
+        """
+        names = set(names)
+        unknown = names.difference(self.fields)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        fields = tuple(field for field in self.fields if field in names)
+        if fields == self.fields:
+            return self
+        if fields not in self._subsets:
+            self._subsets[fields] = ModelSerializer(self.model, fields, self._all_enrichers)
+        return self._subsets[fields]
+
+    def requested(self, param_name: str = 'fields') -> 'ModelSerializer':
+        """Return the serializer for the request's ?fields= parameter.
+
+        Args:
+            param_name: Query parameter holding the comma-separated field list
+
+        Raises:
+            400: If the parameter names an unknown field
+        """
+        param = request.args.get(param_name)
+        if not param:
+            return self
+        try:
+            return self.only(name.strip() for name in param.split(',') if name.strip())
+        except ValueError as e:
+            abort(400, description=str(e))
+
+    def load_columns(self, *extra_columns) -> list:
+        """Columns to load so that only this serializer's fields are selected.
+
+        updated_at is always loaded since ETags are computed from it, along
+        with any extra columns the caller needs (e.g. keyset columns).
+        """
+        model = self.model
+        columns = {getattr(model, field) for field in self.fields}
+        columns.add(model.updated_at)
+        columns.update(extra_columns)
+        return list(columns)
+
+    def load_options(self, *extra_columns) -> list:
+        """Loader options that select only this serializer's columns."""
+        return [load_only(*self.load_columns(*extra_columns))]
+
+    def to_dicts(self, objs: Iterable) -> List[Dict[str, Any]]:
+        """Return the serializable dicts for a sequence of instances."""
+        row = self._row
+        if not self._enrichers:
+            return [row(obj) for obj in objs]
+        objs = list(objs)
+        rows = [row(obj) for obj in objs]
+        for enrich in self._enrichers:
+            enrich(objs, rows)
+        return rows
+
+    def to_dict(self, obj) -> Dict[str, Any]:
+        """Return the serializable dict for a single instance."""
+        if not self._enrichers:
+            return self._row(obj)
+        return self.to_dicts((obj,))[0]
+
+    def dumps(self, obj) -> bytes:
+        """Encode a single instance to JSON bytes."""
+        return dumps_json(self.to_dict(obj))
+
+    def dumps_many(self, objs: Iterable) -> bytes:
+        """Encode a sequence of instances to a JSON array."""
+        return dumps_json(self.to_dicts(objs))
+
+    def response(self, obj, status: int = HTTPStatus.OK, mimetype: Optional[str] = None) -> Response:
+        """Build a JSON or MessagePack response for a single instance."""
+        return render(self.to_dict(obj), status, mimetype)
+
+    def response_many(self, objs: Iterable, status: int = HTTPStatus.OK,
+                      mimetype: Optional[str] = None) -> Response:
+        """Build a JSON or MessagePack array response for a sequence of instances."""
+        return render(self.to_dicts(objs), status, mimetype)
+
+    def iter_ndjson(self, objs: Iterable) -> Iterator[bytes]:
+        """Encode instances lazily, one JSON line each.
+
+        With enrichers, instances are encoded in batches of STREAM_BATCH_SIZE
+        so each enricher runs once per batch.
+        """
+        if not self._enrichers:
+            row = self._row
+            for obj in objs:
+                yield dumps_json(row(obj)) + b'\n'
+            return
+
+        objs = iter(objs)
+        while True:
+            batch = list(islice(objs, STREAM_BATCH_SIZE))
+            if not batch:
+                return
+            yield b''.join(dumps_json(row) + b'\n' for row in self.to_dicts(batch))
+
+    def stream_response(self, objs: Iterable) -> Response:
+        """Build a streaming NDJSON response over an iterable of instances."""
+        return Response(stream_with_context(self.iter_ndjson(objs)), mimetype=NDJSON_MIMETYPE)
+
+    def query_response(self, stmt, keyset: Keyset, params: Optional[Dict[str, Any]] = None) -> Response:
+        """Execute a select and render its rows as a conditional GET.
+
+        Only the columns named by ?fields= are selected when it is given.
+        Rows are ordered by the keyset, and paginated by it when the request
+        has limit/after parameters; the next page's cursor is then returned in
+        X-Next-Cursor and a Link header.
+
+        Streams NDJSON from a server-side cursor when the client asks for it,
+        otherwise loads all rows and returns a JSON (or MessagePack) array. When the request
+        carries If-None-Match, a max(updated_at)/count(*) aggregate is checked
+        first and a matching tag is answered with 304 without loading rows.
+
+        Args:
+            stmt: Select statement returning instances of this serializer's model
+            keyset: Ordering of the collection
+            params: Values for the bindparams of stmt. When given, stmt must be
+                a constant from queries.py, and the statements derived from it
+                are reused across requests of the same shape.
+
+        Returns:
+            Response with ETag and Vary: Accept set
+        """
+        serializer = self.requested()
+        page = page_params()
+        bind_params = dict(params or {})
+        if page:
+            limit, after = page
+            bind_params.update(page_bind_params(keyset, limit, after))
+
+        def build_select():
+            select = stmt
+            if serializer is not self:
+                select = select.options(*serializer.load_options(*keyset.columns))
+            select = keyset.order(select)
+            if page:
+                select = paginate(select, keyset, bool(after))
+            return select
+
+        shape = (stmt, keyset, serializer.fields if serializer is not self else None,
+                 bool(page), bool(page and after))
+        cached = params is not None
+        select = statement_cache.get(shape, build_select) if cached else build_select()
+
+        variant = best_mimetype(NDJSON_MIMETYPE)
+        # Pages are bounded, so they are rendered in one piece rather than streamed
+        streaming = variant == NDJSON_MIMETYPE and not page
+
+        etag = None
+        if streaming or request.if_none_match:
+            version = (
+                statement_cache.get(shape + ('version',), lambda: version_statement(self.model, select))
+                if cached else version_statement(self.model, select)
+            )
+            with version_probe():
+                max_updated_at, count = db.session.execute(version, bind_params).one()
+            etag = collection_etag(self.model, (max_updated_at, count), variant)
+            if is_not_modified(etag):
+                response = not_modified(etag)
+                response.vary.add('Accept')
+                return response
+
+        next_cursor = None
+        if streaming:
+            rows = db.session.execute(
+                select, bind_params, execution_options={'yield_per': STREAM_BATCH_SIZE}
+            ).scalars()
+            response = serializer.stream_response(rows)
+        else:
+            rows = db.session.execute(select, bind_params).scalars().all()
+            if etag is None:
+                etag = collection_etag(self.model, rows_version(rows), variant)
+            if page:
+                rows, next_cursor = split_page(rows, keyset, limit)
+            if variant == NDJSON_MIMETYPE:
+                response = Response(b''.join(serializer.iter_ndjson(rows)), mimetype=NDJSON_MIMETYPE)
+            else:
+                response = serializer.response_many(rows, mimetype=variant)
+
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+            response.headers['Link'] = next_link(next_cursor)
+        response.set_etag(etag)
+        response.vary.add('Accept')
+        return response
+
+    def resource_response(self, ident) -> Response:
+        """Load a row by primary key and render it as a conditional GET.
+
+        When the request carries If-None-Match, only updated_at is fetched
+        first, and a matching tag is answered with 304 without loading the row.
+        Only the columns named by ?fields= are selected when it is given.
+
+        Args:
+            ident: Primary key of the row
+
+        Returns:
+            Response with ETag set, or 404 if the row does not exist
+        """
+        variant = best_mimetype()
+        if request.if_none_match:
+            etag = resource_etag(self.model, resource_version(self.model, ident), variant)
+            if is_not_modified(etag):
+                response = not_modified(etag)
+                response.vary.add('Accept')
+                return response
+
+        serializer = self.requested()
+        options = serializer.load_options() if serializer is not self else None
+        obj = db.get_or_404(self.model, ident, options=options)
+        response = serializer.response(obj, mimetype=variant)
+        response.set_etag(resource_etag(self.model, obj.updated_at, variant))
+        return response
+
+user_serializer = ModelSerializer(User, (
+    'id', 'nickname', 'access_key'
+))
+
+training_plan_serializer = ModelSerializer(TrainingPlan, (
+    'id', 'name', 'user_id', 'progression_type', 'target_weekly_hours',
+    'start_date', 'end_date', 'created_at', 'updated_at'
+))
+
+training_block_serializer = ModelSerializer(TrainingBlock, (
+    'id', 'name', 'plan_id', 'primary_focus', 'duration_weeks',
+    'sequence_order', 'created_at', 'updated_at'
+))
+
+exercise_type_serializer = ModelSerializer(ExerciseType, (
+    'id', 'name', 'category', 'description', 'created_at', 'updated_at'
+))
+
+workout_serializer = ModelSerializer(Workout, (
+    'id', 'name', 'block_id', 'sequence_order', 'status', 'planned_date',
+    'actual_date', 'exercises', 'created_at', 'updated_at'
+), enrichers={'exercises': attach_set_logs})
+
+set_log_serializer = ModelSerializer(SetLog, (
+    'workout_id', 'exercise_sequence', 'log_ts', 'set_index',
+    'reps', 'weight', 'weight_unit', 'rpe', 'created_at'
+))
+
+# Summary shape used by the user's plan listing
+training_plan_summary_serializer = ModelSerializer(TrainingPlan, (
+    'id', 'name', 'start_date', 'end_date'
+))
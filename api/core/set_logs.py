@@ -0,0 +1,290 @@
+"""Append-only set logging and its JSON read path.
+
+Logged sets live in the set_logs table (see models.SetLog) instead of inside
+Workout.exercises[*].logs[*].sets, so logging a set is one INSERT and never
+rewrites the workout document. Clients still see the original shape: reads
+merge the rows back into the exercises JSON, grouping sets into the log entry
+whose "timestamp" matches log_ts, after any sets already stored in the JSON.
+Sessions without a stored entry get a new one appended after the stored
+entries, so every stored entry and set keeps its index and a JSON Pointer
+taken from a read addresses the same value in the stored document.
+
+Merged sets carry "source": "set_log". A client that reads a workout and
+writes the document back (PUT, bulk update, patches) sends them along;
+strip_set_logs() drops them again on write, so they are never stored twice.
+
+Weights are stored as a number plus unit and rendered back as "82.5kg";
+weights logged without a unit are rendered as plain numbers.
+"""
+
+import re
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .models import db, SetLog, Workout
+
+WEIGHT_UNITS = {'kg': 'kg', 'kgs': 'kg', 'lb': 'lb', 'lbs': 'lb'}
+_WEIGHT_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*$')
+
+# workout_id -> exercise_sequence -> log_ts -> sets in set_index order
+SetLogIndex = Dict[int, Dict[int, Dict[datetime, List[SetLog]]]]
+
+# Marks the sets merge_set_logs() adds to a document
+SET_LOG_SOURCE = 'set_log'
+
+
+def parse_weight(value: Any, unit: Optional[str] = None) -> Tuple[Optional[Decimal], Optional[str]]:
+    """Split a weight such as "82.5kg", 82.5 or "180 lbs" into number and unit.
+
+    Args:
+        value: Weight as a number or a string with an optional unit suffix
+        unit: Unit to use when value has none
+
+    Returns:
+        (weight, unit), either of which may be None
+
+    Raises:
+        ValueError: If the weight or unit is not recognised
+    """
+    if value is None:
+        return None, None
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid weight: {value!r}")
+    if isinstance(value, (int, float)):
+        number, suffix = str(value), ''
+    else:
+        match = _WEIGHT_PATTERN.match(str(value))
+        if not match:
+            raise ValueError(f"Invalid weight: {value!r}")
+        number, suffix = match.groups()
+
+    unit = suffix or unit
+    if unit is not None:
+        if unit.lower() not in WEIGHT_UNITS:
+            raise ValueError(f"Unknown weight unit: {unit!r}")
+        unit = WEIGHT_UNITS[unit.lower()]
+    try:
+        return Decimal(number), unit
+    except InvalidOperation:
+        raise ValueError(f"Invalid weight: {value!r}")
+
+
+def _number(value: Optional[Decimal]) -> Any:
+    """Render a Decimal as an int when whole, otherwise a float."""
+    if value is None:
+        return None
+    return int(value) if value == value.to_integral_value() else float(value)
+
+
+def format_set(log: SetLog) -> Dict[str, Any]:
+    """Render a set row in the shape of a set in the exercises JSON."""
+    data = {}
+    if log.reps is not None:
+        data['reps'] = log.reps
+    if log.weight is not None:
+        weight = _number(log.weight)
+        data['weight'] = f"{weight}{log.weight_unit}" if log.weight_unit else weight
+    if log.rpe is not None:
+        data['rpe'] = _number(log.rpe)
+    return data
+
+
+def set_log_values(set_data: Any) -> Dict[str, Any]:
+    """Convert one set from a request into SetLog column values.
+
+    Raises:
+        ValueError: If the set is malformed
+    """
+    if not isinstance(set_data, dict):
+        raise ValueError("Each set must be an object")
+    reps = set_data.get('reps')
+    if reps is not None and (isinstance(reps, bool) or not isinstance(reps, int)):
+        raise ValueError("reps must be an integer")
+    weight, weight_unit = parse_weight(set_data.get('weight'), set_data.get('weight_unit'))
+    rpe = set_data.get('rpe')
+    if rpe is not None:
+        try:
+            rpe = Decimal(str(rpe))
+        except InvalidOperation:
+            raise ValueError("rpe must be a number")
+        if not 0 <= rpe <= 10:
+            raise ValueError("rpe must be between 0 and 10")
+    return {'reps': reps, 'weight': weight, 'weight_unit': weight_unit, 'rpe': rpe}
+
+
+def append_sets(workout_id: int, exercise_sequence: int, sets: Sequence[Dict[str, Any]],
+                log_ts: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Append sets to a log session of a workout's exercise.
+
+    Adds the rows to the current transaction and bumps the workout's
+    updated_at, so its ETags change, without touching the exercises JSON.
+
+    Args:
+        workout_id: Workout ID
+        exercise_sequence: "sequence" of the exercise in the workout
+        sets: Sets as in the exercises JSON, e.g. {"reps": 5, "weight": "80kg", "rpe": 8}
+        log_ts: Log session timestamp (default: now); sets continue its numbering
+
+    Returns:
+        The inserted rows as column dicts
+
+    Raises:
+        ValueError: If a set is malformed
+    """
+    values = [set_log_values(set_data) for set_data in sets]
+    if log_ts is None:
+        log_ts = datetime.utcnow().replace(microsecond=0)
+
+    last_index = db.session.scalar(
+        db.select(db.func.max(SetLog.set_index)).where(
+            SetLog.workout_id == workout_id,
+            SetLog.exercise_sequence == exercise_sequence,
+            SetLog.log_ts == log_ts
+        )
+    )
+    first_index = 0 if last_index is None else last_index + 1
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            'workout_id': workout_id,
+            'exercise_sequence': exercise_sequence,
+            'log_ts': log_ts,
+            'set_index': first_index + offset,
+            **set_values,
+            'created_at': now
+        }
+        for offset, set_values in enumerate(values)
+    ]
+    if rows:
+        db.session.execute(db.insert(SetLog.__table__), rows)
+        db.session.execute(db.update(Workout).where(Workout.id == workout_id).values(updated_at=now))
+    return rows
+
+
+def index_set_logs(logs: Iterable[SetLog]) -> SetLogIndex:
+    """Group set logs for merging; logs must be in set_index order per session."""
+    index: SetLogIndex = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+    for log in logs:
+        index[log.workout_id][log.exercise_sequence][log.log_ts].append(log)
+    return index
+
+
+def load_set_logs(workout_ids: Sequence[int]) -> SetLogIndex:
+    """Fetch the set logs of many workouts in one query, grouped for merging."""
+    if not workout_ids:
+        return index_set_logs(())
+    return index_set_logs(db.session.scalars(
+        db.select(SetLog)
+        .where(SetLog.workout_id.in_(set(workout_ids)))
+        .order_by(SetLog.workout_id, SetLog.exercise_sequence, SetLog.log_ts, SetLog.set_index)
+    ))
+
+
+def merge_set_logs(exercises: Any, logs: Dict[int, Dict[datetime, List[SetLog]]]) -> Any:
+    """Return a copy of an exercises document with logged sets merged in.
+
+    Only the exercises and log entries that receive sets are copied; the
+    document passed in (usually a loaded model attribute) is not modified.
+
+    Args:
+        exercises: {"exercises": [...]} document of a workout
+        logs: That workout's entry from load_set_logs()
+    """
+    if not logs or not isinstance(exercises, dict) or not isinstance(exercises.get('exercises'), list):
+        return exercises
+
+    merged = []
+    for exercise in exercises['exercises']:
+        sessions = logs.get(exercise.get('sequence')) if isinstance(exercise, dict) else None
+        if not sessions:
+            merged.append(exercise)
+            continue
+
+        stored = exercise.get('logs') if isinstance(exercise.get('logs'), list) else []
+        entries = [dict(entry) if isinstance(entry, dict) else entry for entry in stored]
+        by_timestamp = {}
+        for entry in entries:
+            if isinstance(entry, dict) and isinstance(entry.get('sets', []), list):
+                by_timestamp.setdefault(entry.get('timestamp'), entry)
+        # Sessions are in log_ts order; new entries go after the stored ones
+        for log_ts, set_rows in sessions.items():
+            timestamp = log_ts.isoformat()
+            entry = by_timestamp.get(timestamp)
+            if entry is None:
+                entry = by_timestamp[timestamp] = {'timestamp': timestamp, 'sets': []}
+                entries.append(entry)
+            entry['sets'] = list(entry.get('sets', [])) + [
+                {**format_set(row), 'source': SET_LOG_SOURCE} for row in set_rows
+            ]
+        merged.append({**exercise, 'logs': entries})
+    return {**exercises, 'exercises': merged}
+
+
+def _is_merged_set(value: Any) -> bool:
+    return isinstance(value, dict) and value.get('source') == SET_LOG_SOURCE
+
+
+def strip_set_logs(value: Any) -> Any:
+    """Remove the sets merged in from set_logs from a document sent by a client.
+
+    Works on a whole exercises document or any part of one (an exercise, a
+    log entry, a list of sets). Log entries that only held merged sets, as
+    created by merge_set_logs(), are removed with them.
+    """
+    if isinstance(value, list):
+        items = []
+        for item in value:
+            if _is_merged_set(item):
+                continue
+            stripped = strip_set_logs(item)
+            if (isinstance(item, dict) and stripped.keys() <= {'timestamp', 'sets'}
+                    and isinstance(item.get('sets'), list) and any(map(_is_merged_set, item['sets']))
+                    and not stripped['sets']):
+                continue
+            items.append(stripped)
+        return items
+    if isinstance(value, dict):
+        return {key: strip_set_logs(item) for key, item in value.items()}
+    return value
+
+
+def strip_set_log_patch(patch: Any) -> Any:
+    """Apply strip_set_logs() to the values of a JSON Patch.
+
+    Operations whose value is a single merged set are dropped.
+    """
+    if not isinstance(patch, list):
+        return patch
+    operations = []
+    for operation in patch:
+        if isinstance(operation, dict) and 'value' in operation:
+            if _is_merged_set(operation['value']):
+                continue
+            operation = {**operation, 'value': strip_set_logs(operation['value'])}
+        operations.append(operation)
+    return operations
+
+
+def _set_logs_loaded(workout: Any) -> bool:
+    state = db.inspect(workout, raiseerr=False)
+    return state is not None and 'set_logs' not in state.unloaded
+
+
+def attach_set_logs(workouts: Sequence[Workout], rows: List[Dict[str, Any]]) -> None:
+    """Serializer enricher: merge set logs into the rows' exercises documents.
+
+    Uses Workout.set_logs when it was eager loaded with the workouts (see
+    the plan tree), otherwise fetches the batch's logs in one query.
+    """
+    if workouts and all(map(_set_logs_loaded, workouts)):
+        index = index_set_logs(log for workout in workouts for log in workout.set_logs)
+    else:
+        index = load_set_logs([workout.id for workout in workouts])
+    if not index:
+        return
+    for workout, row in zip(workouts, rows):
+        if workout.id in index:
+            row['exercises'] = merge_set_logs(row['exercises'], index[workout.id])
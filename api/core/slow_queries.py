@@ -0,0 +1,173 @@
+"""Slow-query log with sampled EXPLAIN capture.
+
+Statements taking at least DB_SLOW_QUERY_MS are logged as warnings with
+the route that ran them, their normalized SQL (whitespace collapsed,
+literals replaced by ?) and the shape of their bind parameters (types
+only, never values).
+
+On Postgres, a sample of slow SELECTs (DB_SLOW_QUERY_EXPLAIN_RATE) is run
+again under EXPLAIN (ANALYZE, BUFFERS) on the same connection, inside a
+savepoint so a failing EXPLAIN cannot abort the request's transaction, and
+the plan is appended to a rotating file. Statements that write are never
+explained, since ANALYZE executes them. The plan reflects a warm re-run,
+so buffer hits are higher than in the original execution.
+
+With DB_SLOW_QUERY_MS unset or 0 no engine events are registered at all,
+so the feature costs nothing when disabled.
+
+Configuration:
+    DB_SLOW_QUERY_MS: Threshold in milliseconds (default: disabled)
+    DB_SLOW_QUERY_EXPLAIN_RATE: Fraction of slow SELECTs explained on Postgres (default: 0)
+    DB_SLOW_QUERY_EXPLAIN_FILE: Plan file (default: <instance path>/slow_query_plans.log)
+    DB_SLOW_QUERY_EXPLAIN_MAX_BYTES: Size at which the file rotates (default: 5 MB)
+    DB_SLOW_QUERY_EXPLAIN_BACKUPS: Rotated files kept (default: 3)
+"""
+
+import logging
+import os
+import random
+import re
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Any
+
+from flask import Flask, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+plan_logger = logging.getLogger(f'{__name__}.plans')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH)\b', re.IGNORECASE)
+_WRITES = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE)\b', re.IGNORECASE)
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace and replace literals with ?."""
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    return ' '.join(statement.split())
+
+
+def _value_shape(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def bind_shape(parameters: Any, executemany: bool = False) -> str:
+    """Describe bind parameters by type, e.g. {block_id: int, param_1: str}."""
+    if executemany:
+        rows = list(parameters or [])
+        return f"{len(rows)} x {bind_shape(rows[0]) if rows else '{}'}"
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f"{name}: {_value_shape(value)}" for name, value in parameters.items()) + '}'
+    if isinstance(parameters, (list, tuple)):
+        return '(' + ', '.join(_value_shape(value) for value in parameters) + ')'
+    return '()'
+
+
+def _current_route() -> str:
+    if not has_request_context():
+        return 'no request'
+    rule = request.url_rule.rule if request.url_rule else request.path
+    return f"{request.method} {rule}"
+
+
+def _is_explainable(statement: str, context, executemany: bool) -> bool:
+    """Only single read statements; EXPLAIN ANALYZE would run writes again."""
+    if executemany or context is None:
+        return False
+    if context.isinsert or context.isupdate or context.isdelete:
+        return False
+    if not _EXPLAINABLE.match(statement):
+        return False
+    return not (statement.lstrip()[:4].upper() == 'WITH' and _WRITES.search(statement))
+
+
+def _explain(cursor, statement: str, parameters: Any, route: str, duration_ms: float) -> None:
+    """Run EXPLAIN (ANALYZE, BUFFERS) in a savepoint and write the plan."""
+    explain_cursor = cursor.connection.cursor()
+    try:
+        try:
+            explain_cursor.execute('SAVEPOINT slow_query_explain')
+        except Exception as e:
+            logger.warning(f"Cannot EXPLAIN slow query outside a transaction: {e}")
+            return
+        try:
+            explain_cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {statement}', parameters)
+            plan = '\n'.join(row[0] for row in explain_cursor.fetchall())
+        except Exception as e:
+            explain_cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            logger.warning(f"EXPLAIN of slow query failed: {e}")
+            return
+        explain_cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    finally:
+        explain_cursor.close()
+
+    plan_logger.info(f"-- {route} ({duration_ms:.1f} ms)\n{normalize_sql(statement)}\n{plan}\n")
+
+
+def instrument_engine(engine, threshold_ms: float, explain_rate: float) -> None:
+    """Log statements on an engine that take at least threshold_ms."""
+    explain_rate = explain_rate if engine.dialect.name == 'postgresql' else 0
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def check_duration(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info['slow_query_start'].pop()) * 1000
+        if duration_ms < threshold_ms:
+            return
+
+        route = _current_route()
+        logger.warning(
+            f"Slow query ({duration_ms:.1f} ms) in {route}: {normalize_sql(statement)} "
+            f"binds={bind_shape(parameters, executemany)}"
+        )
+        if explain_rate and random.random() < explain_rate and _is_explainable(statement, context, executemany):
+            _explain(cursor, statement, parameters, route, duration_ms)
+
+    @event.listens_for(engine, 'handle_error')
+    def discard_timer(exception_context):
+        starts = exception_context.connection.info.get('slow_query_start') if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+
+def init_slow_query_log(app: Flask) -> None:
+    """Register the slow-query log on the app's engines, if enabled."""
+    from .models import db
+
+    app.config.setdefault('DB_SLOW_QUERY_MS', None)
+    app.config.setdefault('DB_SLOW_QUERY_EXPLAIN_RATE', 0.0)
+    app.config.setdefault('DB_SLOW_QUERY_EXPLAIN_FILE', os.path.join(app.instance_path, 'slow_query_plans.log'))
+    app.config.setdefault('DB_SLOW_QUERY_EXPLAIN_MAX_BYTES', 5 * 1024 * 1024)
+    app.config.setdefault('DB_SLOW_QUERY_EXPLAIN_BACKUPS', 3)
+
+    threshold_ms = app.config['DB_SLOW_QUERY_MS']
+    if not threshold_ms:
+        return
+
+    explain_rate = float(app.config['DB_SLOW_QUERY_EXPLAIN_RATE'])
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    if explain_rate and any(engine.dialect.name == 'postgresql' for engine in engines) and not plan_logger.handlers:
+        path = app.config['DB_SLOW_QUERY_EXPLAIN_FILE']
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=app.config['DB_SLOW_QUERY_EXPLAIN_MAX_BYTES'],
+            backupCount=app.config['DB_SLOW_QUERY_EXPLAIN_BACKUPS']
+        )
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        plan_logger.addHandler(handler)
+        plan_logger.setLevel(logging.INFO)
+        plan_logger.propagate = False
+
+    for engine in engines:
+        instrument_engine(engine, float(threshold_ms), explain_rate)
@@ -0,0 +1,34 @@
+"""replace planned_date index with a covering calendar index
+
+Revision ID: 5d8e2c7b9a14
+Revises: c41f7a9e2b63
+Create Date: 2026-10-16 11:02:17.093541
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8e2c7b9a14'
+down_revision: Union[str, None] = 'c41f7a9e2b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The calendar filters on planned_date and joins on block_id; the
+    # remaining projected columns are carried in the index leaf pages
+    # (Postgres INCLUDE) so the range is answered by an index-only scan.
+    op.create_index(
+        'ix_workouts_calendar', 'workouts', ['planned_date', 'block_id'],
+        postgresql_include=['name', 'actual_date', 'status', 'updated_at']
+    )
+    op.drop_index('ix_workouts_planned_date', table_name='workouts')
+
+
+def downgrade() -> None:
+    op.create_index('ix_workouts_planned_date', 'workouts', ['planned_date'])
+    op.drop_index('ix_workouts_calendar', table_name='workouts')
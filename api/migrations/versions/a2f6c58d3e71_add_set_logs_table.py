@@ -0,0 +1,40 @@
+"""add append-only set_logs table
+
+Revision ID: a2f6c58d3e71
+Revises: e7b3a91c4d20
+Create Date: 2026-10-16 15:18:09.652874
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2f6c58d3e71'
+down_revision: Union[str, None] = 'e7b3a91c4d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The primary key doubles as the index for reading a workout's sets in
+    # (exercise, session, set) order
+    op.create_table('set_logs',
+        sa.Column('workout_id', sa.Integer(), nullable=False),
+        sa.Column('exercise_sequence', sa.Integer(), nullable=False),
+        sa.Column('log_ts', sa.DateTime(), nullable=False),
+        sa.Column('set_index', sa.Integer(), nullable=False),
+        sa.Column('reps', sa.Integer(), nullable=True),
+        sa.Column('weight', sa.Numeric(precision=7, scale=2), nullable=True),
+        sa.Column('weight_unit', sa.String(length=8), nullable=True),
+        sa.Column('rpe', sa.Numeric(precision=3, scale=1), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['workout_id'], ['workouts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('workout_id', 'exercise_sequence', 'log_ts', 'set_index')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('set_logs')
@@ -0,0 +1,43 @@
+"""add volume_rollups table
+
+Revision ID: b8d4e2f6a913
+Revises: a2f6c58d3e71
+Create Date: 2026-10-16 18:42:31.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d4e2f6a913'
+down_revision: Union[str, None] = 'a2f6c58d3e71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Starts empty; backfill with api/scripts/rebuild_volume_rollups.py
+    op.create_table('volume_rollups',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('exercise_type_id', sa.Integer(), nullable=False),
+        sa.Column('iso_week', sa.Integer(), nullable=False),
+        sa.Column('block_id', sa.Integer(), nullable=False),
+        sa.Column('sets', sa.Integer(), nullable=False),
+        sa.Column('reps', sa.Integer(), nullable=False),
+        sa.Column('tonnage', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['block_id'], ['training_blocks.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'exercise_type_id', 'iso_week', 'block_id')
+    )
+    op.create_index('ix_volume_rollups_user_week', 'volume_rollups', ['user_id', 'iso_week'])
+    op.create_index('ix_volume_rollups_block', 'volume_rollups', ['block_id', 'iso_week'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_volume_rollups_block', table_name='volume_rollups')
+    op.drop_index('ix_volume_rollups_user_week', table_name='volume_rollups')
+    op.drop_table('volume_rollups')
@@ -0,0 +1,47 @@
+"""add indexes and constraints for route access paths
+
+Revision ID: c41f7a9e2b63
+Revises: 4b2ad13f471c
+Create Date: 2026-10-16 09:12:44.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f7a9e2b63'
+down_revision: Union[str, None] = '4b2ad13f471c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Sequence order is unique within a parent; the routes already treat an
+    # IntegrityError here as a duplicate. The constraint indexes also serve
+    # the (parent_id, sequence_order, id) listings and their keyset pages.
+    op.create_unique_constraint('uq_workouts_block_sequence', 'workouts', ['block_id', 'sequence_order'])
+    op.create_unique_constraint('uq_training_blocks_plan_sequence', 'training_blocks', ['plan_id', 'sequence_order'])
+    
+    # Plans are listed per user, newest first
+    op.create_index(
+        'ix_training_plans_user_created',
+        'training_plans',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')]
+    )
+    
+    # Date range lookups for the calendar
+    op.create_index('ix_workouts_planned_date', 'workouts', ['planned_date'])
+    
+    # Exercise catalog is listed by name
+    op.create_index('ix_exercise_types_name', 'exercise_types', ['name', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_exercise_types_name', table_name='exercise_types')
+    op.drop_index('ix_workouts_planned_date', table_name='workouts')
+    op.drop_index('ix_training_plans_user_created', table_name='training_plans')
+    op.drop_constraint('uq_training_blocks_plan_sequence', 'training_blocks', type_='unique')
+    op.drop_constraint('uq_workouts_block_sequence', 'workouts', type_='unique')
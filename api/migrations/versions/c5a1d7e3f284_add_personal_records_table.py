@@ -0,0 +1,39 @@
+"""add personal_records table
+
+Revision ID: c5a1d7e3f284
+Revises: b8d4e2f6a913
+Create Date: 2026-10-16 20:07:54.618392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a1d7e3f284'
+down_revision: Union[str, None] = 'b8d4e2f6a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Starts empty; backfill with api/scripts/rebuild_personal_records.py
+    op.create_table('personal_records',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('exercise_type_id', sa.Integer(), nullable=False),
+        sa.Column('rep_count', sa.Integer(), nullable=False),
+        sa.Column('weight', sa.Numeric(precision=8, scale=2), nullable=False),
+        sa.Column('workout_id', sa.Integer(), nullable=False),
+        sa.Column('achieved_on', sa.Date(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'exercise_type_id', 'rep_count')
+    )
+    op.create_index('ix_personal_records_workout', 'personal_records', ['workout_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_personal_records_workout', table_name='personal_records')
+    op.drop_table('personal_records')
@@ -0,0 +1,54 @@
+"""add workout_exercise_refs table
+
+Revision ID: d2b6f8a4c197
+Revises: c5a1d7e3f284
+Create Date: 2026-10-16 21:26:13.847520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b6f8a4c197'
+down_revision: Union[str, None] = 'c5a1d7e3f284'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('workout_exercise_refs',
+        sa.Column('exercise_type_id', sa.Integer(), nullable=False),
+        sa.Column('workout_id', sa.Integer(), nullable=False),
+        sa.Column('planned_date', sa.Date(), nullable=False),
+        sa.ForeignKeyConstraint(['workout_id'], ['workouts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('exercise_type_id', 'workout_id')
+    )
+    
+    # Backfilled here rather than by a script: delete_exercise_type relies
+    # on the index being complete. Mirrors exercise_refs.referenced_types():
+    # integer exercise_type_id values only, one row per type per workout.
+    op.execute("""
+        INSERT INTO workout_exercise_refs (exercise_type_id, workout_id, planned_date)
+        SELECT DISTINCT (exercise->>'exercise_type_id')::integer, w.id, w.planned_date
+        FROM workouts w
+        CROSS JOIN LATERAL jsonb_array_elements(
+            CASE WHEN jsonb_typeof(w.exercises->'exercises') = 'array'
+                 THEN w.exercises->'exercises' ELSE '[]'::jsonb END
+        ) AS exercise
+        WHERE jsonb_typeof(exercise) = 'object'
+          AND jsonb_typeof(exercise->'exercise_type_id') = 'number'
+          AND exercise->>'exercise_type_id' ~ '^-?[0-9]+$'
+    """)
+    
+    op.create_index('ix_workout_exercise_refs_history', 'workout_exercise_refs',
+                    ['exercise_type_id', 'planned_date', 'workout_id'])
+    op.create_index('ix_workout_exercise_refs_workout', 'workout_exercise_refs', ['workout_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_workout_exercise_refs_workout', table_name='workout_exercise_refs')
+    op.drop_index('ix_workout_exercise_refs_history', table_name='workout_exercise_refs')
+    op.drop_table('workout_exercise_refs')
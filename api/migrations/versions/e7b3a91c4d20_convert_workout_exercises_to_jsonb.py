@@ -0,0 +1,49 @@
+"""convert workouts.exercises to jsonb with a gin index
+
+Revision ID: e7b3a91c4d20
+Revises: 5d8e2c7b9a14
+Create Date: 2026-10-16 13:40:51.276310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3a91c4d20'
+down_revision: Union[str, None] = '5d8e2c7b9a14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rewrites the table; jsonb stores the parsed document, so containment
+    # queries no longer re-parse every row
+    op.alter_column(
+        'workouts', 'exercises',
+        type_=postgresql.JSONB(),
+        existing_type=postgresql.JSON(),
+        existing_nullable=False,
+        postgresql_using='exercises::jsonb'
+    )
+    
+    # jsonb_path_ops only supports @>, but is smaller and faster than the
+    # default jsonb_ops for it
+    op.create_index(
+        'ix_workouts_exercises', 'workouts', ['exercises'],
+        postgresql_using='gin',
+        postgresql_ops={'exercises': 'jsonb_path_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_workouts_exercises', table_name='workouts')
+    op.alter_column(
+        'workouts', 'exercises',
+        type_=postgresql.JSON(),
+        existing_type=postgresql.JSONB(),
+        existing_nullable=False,
+        postgresql_using='exercises::json'
+    )
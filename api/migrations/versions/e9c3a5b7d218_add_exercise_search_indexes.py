@@ -0,0 +1,36 @@
+"""add exercise search indexes
+
+Revision ID: e9c3a5b7d218
+Revises: d2b6f8a4c197
+Create Date: 2026-10-16 22:41:37.205913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9c3a5b7d218'
+down_revision: Union[str, None] = 'd2b6f8a4c197'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # Must match EXERCISE_SEARCH_DOCUMENT in core/models.py exactly, or the
+    # planner will not use the index
+    op.create_index('ix_exercise_types_search', 'exercise_types', [sa.text(
+        "(setweight(to_tsvector('english'::regconfig, name), 'A') || "
+        "setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B'))"
+    )], postgresql_using='gin')
+    op.create_index('ix_exercise_types_name_trgm', 'exercise_types', ['name'],
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_exercise_types_name_trgm', table_name='exercise_types')
+    op.drop_index('ix_exercise_types_search', table_name='exercise_types')
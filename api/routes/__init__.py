@@ -4,6 +4,6 @@ This package contains all the route blueprints for the API.
 Each blueprint is responsible for a specific resource or group of related resources.
 """
 
-from . import users, training_plans, exercise_types, workouts
+from . import users, training_plans, training_blocks, exercise_types, workouts, calendar
 
-__all__ = ['users', 'training_plans', 'exercise_types', 'workouts'] 
\ No newline at end of file
+__all__ = ['users', 'training_plans', 'training_blocks', 'exercise_types', 'workouts', 'calendar'] 
\ No newline at end of file
@@ -0,0 +1,70 @@
+from flask import Blueprint, request, abort
+from ..core.models import db, Workout, TrainingBlock, TrainingPlan
+from ..core.validation import validate_date_format
+from ..core.negotiation import best_mimetype, render
+from ..core.conditional import (
+    collection_etag, collection_version, is_not_modified, not_modified, rows_version
+)
+from ..core.query_stats import query_budget
+
+bp = Blueprint('calendar', __name__, url_prefix='/api/calendar')
+
+CALENDAR_FIELDS = ('id', 'name', 'planned_date', 'actual_date', 'status', 'block_id', 'plan_id')
+
+@bp.route('', methods=['GET'])
+@query_budget(1)
+def get_calendar():
+    """Get all of a user's workouts planned within a date range.
+
+    Returns a lightweight projection across every plan and block of the
+    user in a single join query, so a month view is one round trip.
+
+    Query parameters:
+        - user_id: User whose workouts to list (required)
+        - start: First date of the range, YYYY-MM-DD (required)
+        - end: Last date of the range, YYYY-MM-DD, inclusive (required)
+
+    Returns:
+        List of workouts (id, name, planned_date, actual_date, status,
+        block_id, plan_id) ordered by planned date
+    """
+    user_id = request.args.get('user_id', type=int)
+    if user_id is None:
+        abort(400, description="user_id query parameter is required")
+    try:
+        start = validate_date_format(request.args.get('start', ''))
+        end = validate_date_format(request.args.get('end', ''))
+    except ValueError as e:
+        abort(400, description=f"start and end are required. {e}")
+    if end < start:
+        abort(400, description="end must not be before start")
+
+    stmt = (
+        db.select(Workout)
+        .join(TrainingBlock, Workout.block_id == TrainingBlock.id)
+        .join(TrainingPlan, TrainingBlock.plan_id == TrainingPlan.id)
+        .where(
+            TrainingPlan.user_id == user_id,
+            Workout.planned_date.between(start, end)
+        )
+    )
+
+    variant = best_mimetype()
+    if request.if_none_match:
+        etag = collection_etag(Workout, collection_version(Workout, stmt), variant)
+        if is_not_modified(etag):
+            response = not_modified(etag)
+            response.vary.add('Accept')
+            return response
+
+    rows = db.session.execute(
+        stmt.with_only_columns(
+            Workout.id, Workout.name, Workout.planned_date, Workout.actual_date,
+            Workout.status, Workout.block_id, TrainingBlock.plan_id, Workout.updated_at
+        )
+        .order_by(Workout.planned_date, Workout.id)
+    ).all()
+
+    response = render([dict(zip(CALENDAR_FIELDS, row)) for row in rows], mimetype=variant)
+    response.set_etag(collection_etag(Workout, rows_version(rows), variant))
+    return response
@@ -1,30 +1,37 @@
-from flask import Blueprint, jsonify, request, abort
+from flask import Blueprint, request, abort
 from http import HTTPStatus
 from ..core.models import db, ExerciseType
-from ..core.validation import validate_request_data
+from ..core.validation import validate_request_data, validate_date_format
+from ..core.serializers import exercise_type_serializer
+from ..core.pagination import (
+    exercise_history_keyset, exercise_type_keyset, next_link, page_bind_params, page_params, paginate, split_page
+)
+from ..core.queries import ALL_EXERCISE_TYPES
+from ..core.exercise_refs import history_rows, history_statement, is_referenced
+from ..core.catalog import exercise_catalog, serves_full_catalog
+from ..core.search import DEFAULT_PAGE_SIZE, MAX_QUERY_LENGTH, search_catalog
+from ..core.negotiation import render
+from ..core.query_stats import query_budget
 from sqlalchemy.exc import IntegrityError
 
 bp = Blueprint('exercise_types', __name__, url_prefix='/api/exercise-types')
 
 @bp.route('', methods=['GET'])
 def get_exercise_types():
-    """Get all exercise types.
+    """Get all exercise types ordered by name.
     
+    Query parameters:
+        - limit: Page size for keyset pagination (optional)
+        - after: Cursor from the previous page's X-Next-Cursor (optional)
+        
     Returns:
-        List of exercise types
+        List of exercise types, or NDJSON lines when the client sends
+        Accept: application/x-ndjson. The full list is served from the
+        process-local catalog cache.
     """
-    exercise_types = db.session.execute(
-        db.select(ExerciseType)
-        .order_by(db.text('name'))
-    ).scalars().all()
-    return jsonify([{
-        'id': ex.id,
-        'name': ex.name,
-        'category': ex.category,
-        'description': ex.description,
-        'created_at': ex.created_at.isoformat(),
-        'updated_at': ex.updated_at.isoformat()
-    } for ex in exercise_types])
+    if serves_full_catalog():
+        return exercise_catalog.collection_response()
+    return exercise_type_serializer.query_response(ALL_EXERCISE_TYPES, exercise_type_keyset, {})
 
 @bp.route('', methods=['POST'])
 def create_exercise_type():
@@ -52,15 +59,9 @@ def create_exercise_type():
         
         db.session.add(exercise_type)
         db.session.commit()
+        exercise_catalog.invalidate()
         
-        return jsonify({
-            'id': exercise_type.id,
-            'name': exercise_type.name,
-            'category': exercise_type.category,
-            'description': exercise_type.description,
-            'created_at': exercise_type.created_at.isoformat(),
-            'updated_at': exercise_type.updated_at.isoformat()
-        }), HTTPStatus.CREATED
+        return exercise_type_serializer.response(exercise_type, HTTPStatus.CREATED)
         
     except IntegrityError:
         db.session.rollback()
@@ -69,6 +70,39 @@ def create_exercise_type():
         db.session.rollback()
         abort(500, description=str(e))
 
+@bp.route('/search', methods=['GET'])
+@query_budget(1)
+def search_exercise_types():
+    """Search exercise types by name and description, with category facets.
+    
+    Results are ranked by relevance; on Postgres misspelled names still
+    match by trigram similarity. Facet counts cover every match, ignoring
+    the category filter.
+    
+    Query parameters:
+        - q: Search text (required)
+        - category: Only return results in this category (optional)
+        - limit: Page size (default: 20)
+        - after: Cursor from the previous page's X-Next-Cursor (optional)
+        
+    Returns:
+        {"results": [...], "facets": {"category": [{"value", "count"}]}},
+        with the next page's cursor in X-Next-Cursor and a Link header
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        abort(400, description="q is required")
+    if len(q) > MAX_QUERY_LENGTH:
+        abort(400, description=f"q must be at most {MAX_QUERY_LENGTH} characters")
+    limit, after = page_params() or (DEFAULT_PAGE_SIZE, None)
+    
+    results, facets, next_cursor = search_catalog(q, request.args.get('category'), limit, after)
+    response = render({'results': results, 'facets': {'category': facets}})
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = next_link(next_cursor)
+    return response
+
 @bp.route('/<int:type_id>', methods=['GET'])
 def get_exercise_type(type_id):
     """Get exercise type by ID.
@@ -77,18 +111,66 @@ def get_exercise_type(type_id):
         type_id: Exercise type ID
         
     Returns:
-        Exercise type data or 404 if not found
+        Exercise type data with an ETag, 304 if If-None-Match matches,
+        or 404 if not found
     """
-    exercise_type = ExerciseType.query.get_or_404(type_id)
+    if serves_full_catalog():
+        return exercise_catalog.resource_response(type_id)
+    return exercise_type_serializer.resource_response(type_id)
+
+@bp.route('/<int:type_id>/history', methods=['GET'])
+@query_budget(3)
+def get_exercise_type_history(type_id):
+    """Get the workouts that include an exercise type, most recent first.
+    
+    Served by the workout_exercise_refs index, so only the matching
+    workouts are read.
+    
+    Args:
+        type_id: Exercise type ID
+        
+    Query parameters:
+        - start: First planned date, YYYY-MM-DD (optional)
+        - end: Last planned date, YYYY-MM-DD, inclusive (optional)
+        - user_id: Only this user's workouts (optional)
+        - limit: Page size for keyset pagination (optional)
+        - after: Cursor from the previous page's X-Next-Cursor (optional)
+        
+    Returns:
+        List of workouts (workout_id, name, planned_date, actual_date,
+        status, block_id) with the entries of this exercise, including
+        logged sets, in "exercises"; 404 if the exercise type is not found
+    """
+    try:
+        start = validate_date_format(request.args['start']) if 'start' in request.args else None
+        end = validate_date_format(request.args['end']) if 'end' in request.args else None
+    except ValueError as e:
+        abort(400, description=str(e))
+    if start and end and end < start:
+        abort(400, description="end must not be before start")
+    
+    ExerciseType.query.get_or_404(type_id)  # Verify exercise type exists
+    
+    stmt = exercise_history_keyset.order(history_statement(
+        type_id, start, end, user_id=request.args.get('user_id', type=int)
+    ))
+    page = page_params()
+    params = {}
+    if page:
+        limit, after = page
+        stmt = paginate(stmt, exercise_history_keyset, bool(after))
+        params = page_bind_params(exercise_history_keyset, limit, after)
+    
+    rows = db.session.execute(stmt, params).all()
+    next_cursor = None
+    if page:
+        rows, next_cursor = split_page(rows, exercise_history_keyset, limit)
     
-    return jsonify({
-        'id': exercise_type.id,
-        'name': exercise_type.name,
-        'category': exercise_type.category,
-        'description': exercise_type.description,
-        'created_at': exercise_type.created_at.isoformat(),
-        'updated_at': exercise_type.updated_at.isoformat()
-    })
+    response = render(history_rows(rows, type_id))
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = next_link(next_cursor)
+    return response
 
 @bp.route('/<int:type_id>', methods=['DELETE'])
 def delete_exercise_type(type_id):
@@ -98,13 +180,17 @@ def delete_exercise_type(type_id):
         type_id: Exercise type ID
         
     Returns:
-        204 No Content on success
+        204 No Content on success, or 409 if workouts still use the
+        exercise type
     """
     exercise_type = ExerciseType.query.get_or_404(type_id)
+    if is_referenced(type_id):
+        abort(409, description="Exercise type is used by workouts; remove it from them first")
     
     try:
         db.session.delete(exercise_type)
         db.session.commit()
+        exercise_catalog.invalidate()
         return '', HTTPStatus.NO_CONTENT
     except Exception as e:
         db.session.rollback()
@@ -1,42 +1,38 @@
-from flask import Blueprint, jsonify, request, abort
+from flask import Blueprint, request, abort
 from http import HTTPStatus
 from ..core.models import db, TrainingBlock, TrainingPlan
 from ..core.validation import validate_request_data
+from ..core.serializers import training_block_serializer
+from ..core.pagination import training_block_keyset
+from ..core.queries import BLOCKS_BY_PLAN
+from ..core.query_stats import query_budget
 from sqlalchemy.exc import IntegrityError
 
 bp = Blueprint('training_blocks', __name__, url_prefix='/api/training-blocks')
 
 @bp.route('', methods=['GET'])
+@query_budget(2)
 def get_training_blocks():
     """Get all training blocks for a training plan.
     
     Query parameters:
         - plan_id: Training plan ID (required)
+        - limit: Page size for keyset pagination (optional)
+        - after: Cursor from the previous page's X-Next-Cursor (optional)
         
     Returns:
-        List of training blocks in sequence order
+        List of training blocks in sequence order, or NDJSON lines when the
+        client sends Accept: application/x-ndjson
     """
     plan_id = request.args.get('plan_id', type=int)
     if not plan_id:
         abort(400, description="plan_id query parameter is required")
         
     plan = TrainingPlan.query.get_or_404(plan_id)
-    blocks = db.session.execute(
-        db.select(TrainingBlock)
-        .filter_by(plan_id=plan_id)
-        .order_by(db.text('sequence_order'))
-    ).scalars().all()
     
-    return jsonify([{
-        'id': b.id,
-        'name': b.name,
-        'plan_id': b.plan_id,
-        'primary_focus': b.primary_focus,
-        'duration_weeks': b.duration_weeks,
-        'sequence_order': b.sequence_order,
-        'created_at': b.created_at.isoformat(),
-        'updated_at': b.updated_at.isoformat()
-    } for b in blocks])
+    return training_block_serializer.query_response(
+        BLOCKS_BY_PLAN, training_block_keyset, {'plan_id': plan_id}
+    )
 
 @bp.route('', methods=['POST'])
 def create_training_block():
@@ -69,16 +65,7 @@ def create_training_block():
         db.session.add(block)
         db.session.commit()
         
-        return jsonify({
-            'id': block.id,
-            'name': block.name,
-            'plan_id': block.plan_id,
-            'primary_focus': block.primary_focus,
-            'duration_weeks': block.duration_weeks,
-            'sequence_order': block.sequence_order,
-            'created_at': block.created_at.isoformat(),
-            'updated_at': block.updated_at.isoformat()
-        }), HTTPStatus.CREATED
+        return training_block_serializer.response(block, HTTPStatus.CREATED)
         
     except IntegrityError:
         db.session.rollback()
@@ -95,20 +82,10 @@ def get_training_block(block_id):
         block_id: Training block ID
         
     Returns:
-        Training block data or 404 if not found
+        Training block data with an ETag, 304 if If-None-Match matches,
+        or 404 if not found
     """
-    block = TrainingBlock.query.get_or_404(block_id)
-    
-    return jsonify({
-        'id': block.id,
-        'name': block.name,
-        'plan_id': block.plan_id,
-        'primary_focus': block.primary_focus,
-        'duration_weeks': block.duration_weeks,
-        'sequence_order': block.sequence_order,
-        'created_at': block.created_at.isoformat(),
-        'updated_at': block.updated_at.isoformat()
-    })
+    return training_block_serializer.resource_response(block_id)
 
 @bp.route('/<int:block_id>', methods=['PUT'])
 def update_training_block(block_id):
@@ -142,16 +119,7 @@ def update_training_block(block_id):
             
         db.session.commit()
         
-        return jsonify({
-            'id': block.id,
-            'name': block.name,
-            'plan_id': block.plan_id,
-            'primary_focus': block.primary_focus,
-            'duration_weeks': block.duration_weeks,
-            'sequence_order': block.sequence_order,
-            'created_at': block.created_at.isoformat(),
-            'updated_at': block.updated_at.isoformat()
-        })
+        return training_block_serializer.response(block)
         
     except IntegrityError:
         db.session.rollback()
@@ -1,9 +1,16 @@
-from flask import Blueprint, jsonify, request, abort
+from flask import Blueprint, request, abort
 from http import HTTPStatus
-from ..core.models import db, TrainingPlan
+from ..core.models import db, TrainingPlan, TrainingBlock, Workout
 from ..core.validation import validate_request_data, validate_date_format, validate_date_range
+from ..core.serializers import training_plan_serializer, training_block_serializer, workout_serializer
+from ..core.negotiation import render
+from ..core.pagination import training_plan_keyset
+from ..core.queries import PLANS_BY_USER
+from ..core.materialize import PlanNotEmptyError, materialize_plan, training_days
+from ..core.query_stats import query_budget
 from sqlalchemy.exc import IntegrityError
-from datetime import datetime
+from sqlalchemy.orm import selectinload
+from datetime import datetime, date
 from typing import Dict, Any
 
 def validate_request_data(data: Dict[str, Any], required_fields: list) -> None:
@@ -16,27 +23,22 @@ bp = Blueprint('training_plans', __name__, url_prefix='/api/training-plans')
 
 @bp.route('', methods=['GET'])
 def get_training_plans():
-    """Get all training plans for the current user.
+    """Get all training plans for the current user, newest first.
     
+    Query parameters:
+        - limit: Page size for keyset pagination (optional)
+        - after: Cursor from the previous page's X-Next-Cursor (optional)
+        
     Returns:
-        List of training plans
+        List of training plans, or NDJSON lines when the client sends
+        Accept: application/x-ndjson
     """
     # TODO: Get current user from auth context
     user_id = 1  # Temporary until auth is implemented
     
-    plans = TrainingPlan.query.filter_by(user_id=user_id).order_by(TrainingPlan.created_at.desc()).all()
-    
-    return jsonify([{
-        'id': p.id,
-        'name': p.name,
-        'user_id': p.user_id,
-        'progression_type': p.progression_type,
-        'target_weekly_hours': p.target_weekly_hours,
-        'start_date': p.start_date.isoformat() if p.start_date else None,
-        'end_date': p.end_date.isoformat() if p.end_date else None,
-        'created_at': p.created_at.isoformat(),
-        'updated_at': p.updated_at.isoformat()
-    } for p in plans])
+    return training_plan_serializer.query_response(
+        PLANS_BY_USER, training_plan_keyset, {'user_id': user_id}
+    )
 
 @bp.route('', methods=['POST'])
 def create_training_plan():
@@ -83,17 +85,7 @@ def create_training_plan():
         db.session.add(plan)
         db.session.commit()
         
-        return jsonify({
-            'id': plan.id,
-            'name': plan.name,
-            'user_id': plan.user_id,
-            'progression_type': plan.progression_type,
-            'target_weekly_hours': plan.target_weekly_hours,
-            'start_date': plan.start_date.isoformat() if plan.start_date else None,
-            'end_date': plan.end_date.isoformat() if plan.end_date else None,
-            'created_at': plan.created_at.isoformat(),
-            'updated_at': plan.updated_at.isoformat()
-        }), HTTPStatus.CREATED
+        return training_plan_serializer.response(plan, HTTPStatus.CREATED)
         
     except IntegrityError:
         db.session.rollback()
@@ -110,23 +102,12 @@ def get_training_plan(plan_id):
         plan_id: Training plan ID
         
     Returns:
-        Training plan data or 404 if not found
+        Training plan data with an ETag, 304 if If-None-Match matches,
+        or 404 if not found
     """
-    plan = TrainingPlan.query.get_or_404(plan_id)
-    
     # TODO: Check if user has access to this plan
     
-    return jsonify({
-        'id': plan.id,
-        'name': plan.name,
-        'user_id': plan.user_id,
-        'progression_type': plan.progression_type,
-        'target_weekly_hours': plan.target_weekly_hours,
-        'start_date': plan.start_date.isoformat() if plan.start_date else None,
-        'end_date': plan.end_date.isoformat() if plan.end_date else None,
-        'created_at': plan.created_at.isoformat(),
-        'updated_at': plan.updated_at.isoformat()
-    })
+    return training_plan_serializer.resource_response(plan_id)
 
 @bp.route('/<int:plan_id>', methods=['PUT'])
 def update_training_plan(plan_id):
@@ -169,17 +150,7 @@ def update_training_plan(plan_id):
             
         db.session.commit()
         
-        return jsonify({
-            'id': plan.id,
-            'name': plan.name,
-            'user_id': plan.user_id,
-            'progression_type': plan.progression_type,
-            'target_weekly_hours': plan.target_weekly_hours,
-            'start_date': plan.start_date.isoformat() if plan.start_date else None,
-            'end_date': plan.end_date.isoformat() if plan.end_date else None,
-            'created_at': plan.created_at.isoformat(),
-            'updated_at': plan.updated_at.isoformat()
-        })
+        return training_plan_serializer.response(plan)
         
     except IntegrityError:
         db.session.rollback()
@@ -208,4 +179,148 @@ def delete_training_plan(plan_id):
         return '', HTTPStatus.NO_CONTENT
     except Exception as e:
         db.session.rollback()
-        abort(500, description=str(e)) 
\ No newline at end of file
+        abort(500, description=str(e))
+
+@bp.route('/<int:plan_id>/generate', methods=['POST'])
+def generate_training_plan(plan_id):
+    """Generate the workouts of a plan from its block templates.
+    
+    Blocks run back to back in sequence order; each week of a block gets
+    one workout per training day with the block's template exercises.
+    All workouts are written with one bulk insert.
+    
+    Args:
+        plan_id: Training plan ID
+        
+    Optional fields:
+        - start_date: First day of the plan (default: plan start_date, else today)
+        - sessions_per_week: Training days per week, 1-7 (default: 3)
+        - days: Weekday offsets of the training days, e.g. [0, 2, 4]
+          (overrides sessions_per_week)
+        - templates: Object mapping block names to {"exercises": [...]},
+          overriding the built-in templates
+        - replace: Delete the plan's existing workouts first (default: false)
+        
+    Returns:
+        Summary with the plan's date range and workouts per block, and 201
+        status code on success; 409 if the plan already has workouts and
+        replace is false
+    """
+    plan = TrainingPlan.query.get_or_404(plan_id)
+    
+    # TODO: Check if user has permission to update this plan
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        start_date = plan.start_date or date.today()
+        if 'start_date' in data:
+            if not isinstance(data['start_date'], str):
+                raise ValueError("start_date must be a date string")
+            start_date = validate_date_format(data['start_date'])
+        
+        if 'days' in data:
+            days = data['days']
+            if (not isinstance(days, list) or not days
+                    or not all(isinstance(day, int) and not isinstance(day, bool) and 0 <= day <= 6 for day in days)):
+                raise ValueError("days must be a non-empty list of weekday offsets 0-6")
+            days = sorted(set(days))
+        else:
+            days = training_days(data.get('sessions_per_week', 3))
+        
+        templates = data.get('templates') or {}
+        if not isinstance(templates, dict) or not all(
+                isinstance(template, dict) and isinstance(template.get('exercises'), list)
+                for template in templates.values()):
+            raise ValueError("templates must map block names to objects with an exercises list")
+        
+        summary = materialize_plan(plan_id, start_date, days, templates, replace=bool(data.get('replace')))
+        
+        if plan.start_date is None:
+            plan.start_date = summary['start_date']
+        if plan.end_date is None and summary['workouts_created']:
+            plan.end_date = summary['end_date']
+        
+        db.session.commit()
+        
+        return render(summary, HTTPStatus.CREATED)
+        
+    except PlanNotEmptyError as e:
+        db.session.rollback()
+        abort(409, description=f"{e}; pass replace=true to regenerate")
+    except ValueError as e:
+        db.session.rollback()
+        abort(400, description=str(e))
+    except IntegrityError:
+        db.session.rollback()
+        abort(409, description="Workout with this sequence order already exists in block")
+    except Exception as e:
+        db.session.rollback()
+        abort(500, description=str(e))
+
+@bp.route('/<int:plan_id>/tree', methods=['GET'])
+@query_budget(3)
+def get_training_plan_tree(plan_id):
+    """Get a training plan with its ordered blocks and their workouts.
+    
+    The whole tree is loaded in at most three queries (plan, blocks,
+    workouts with their logged sets) instead of one request per block.
+    
+    Args:
+        plan_id: Training plan ID
+        
+    Query parameters:
+        - depth: 0 for the plan only, 1 to include blocks,
+          2 to also include workouts (default: 2)
+        - fields: Plan fields to return (optional)
+        - block_fields: Block fields to return (optional)
+        - workout_fields: Workout fields to return (optional), e.g. leave
+          out exercises to skip loading the JSON
+        
+    Returns:
+        Training plan data with nested 'blocks', each with nested
+        'workouts', or 404 if not found
+    """
+    depth = request.args.get('depth', 2, type=int)
+    if depth not in (0, 1, 2):
+        abort(400, description="depth must be 0, 1 or 2")
+    
+    plan_serializer = training_plan_serializer.requested()
+    block_serializer = training_block_serializer.requested('block_fields')
+    block_workout_serializer = workout_serializer.requested('workout_fields')
+    
+    options = plan_serializer.load_options()
+    if depth >= 1:
+        blocks_loader = selectinload(TrainingPlan.training_blocks).load_only(
+            *block_serializer.load_columns(TrainingBlock.plan_id, TrainingBlock.sequence_order)
+        )
+        if depth >= 2:
+            blocks_loader = blocks_loader.selectinload(TrainingBlock.workouts).load_only(
+                *block_workout_serializer.load_columns(Workout.block_id, Workout.sequence_order)
+            )
+            if 'exercises' in block_workout_serializer.fields:
+                # Logged sets are joined into the workouts query instead of a query of their own
+                blocks_loader = blocks_loader.joinedload(Workout.set_logs)
+        options.append(blocks_loader)
+    
+    plan = db.session.execute(
+        db.select(TrainingPlan)
+        .filter_by(id=plan_id)
+        .options(*options)
+    ).scalar_one_or_none()
+    if plan is None:
+        abort(404)
+    
+    # TODO: Check if user has access to this plan
+    
+    tree = plan_serializer.to_dict(plan)
+    if depth >= 1:
+        tree['blocks'] = block_serializer.to_dicts(plan.training_blocks)
+        if depth >= 2:
+            # Serialize all workouts in one batch so logged sets are merged in one pass
+            workouts = [workout for block in plan.training_blocks for workout in block.workouts]
+            workout_rows = iter(block_workout_serializer.to_dicts(workouts))
+            for block, block_data in zip(plan.training_blocks, tree['blocks']):
+                block_data['workouts'] = [next(workout_rows) for _ in block.workouts]
+    
+    return render(tree)
@@ -1,9 +1,17 @@
 from flask import Blueprint, jsonify, request, abort
 from http import HTTPStatus
-from ..core.models import db, User, TrainingPlan
-from ..core.validation import validate_request_data
+from ..core.models import db, User
+from ..core.validation import validate_request_data, validate_date_format
+from ..core.serializers import user_serializer, training_plan_summary_serializer
+from ..core.pagination import training_plan_keyset
+from ..core.queries import PLANS_BY_USER, USER_BY_ACCESS_KEY
+from ..core.query_stats import query_budget
+from ..core.rollups import weekly_volume
+from ..core.records import personal_records
+from ..core.negotiation import render
 from sqlalchemy.exc import IntegrityError
 from typing import Dict, Any
+from datetime import date, timedelta
 import logging
 
 # Configure logging
@@ -48,11 +56,7 @@ def create_user():
         db.session.add(user)
         db.session.commit()
         
-        return jsonify({
-            'id': user.id,
-            'nickname': user.nickname,
-            'access_key': user.access_key
-        }), HTTPStatus.CREATED
+        return user_serializer.response(user, HTTPStatus.CREATED)
         
     except ValueError as e:
         abort(400, description=str(e))
@@ -80,7 +84,7 @@ def get_user(access_key):
     
     try:
         # Try to find the user
-        user = User.query.filter_by(access_key=access_key).first()
+        user = db.session.execute(USER_BY_ACCESS_KEY, {'access_key': access_key}).scalar_one_or_none()
         logger.debug(f"Query result: {user}")
         
         if not user:
@@ -90,13 +94,8 @@ def get_user(access_key):
                 'message': f'No user found with access key: {access_key}'
             }), 404
             
-        response_data = {
-            'id': user.id,
-            'nickname': user.nickname,
-            'access_key': user.access_key
-        }
-        logger.debug(f"Returning user data: {response_data}")
-        return jsonify(response_data)
+        logger.debug(f"Returning user data: {user_serializer.to_dict(user)}")
+        return user_serializer.response(user)
         
     except Exception as e:
         logger.error(f"Error while looking up user: {str(e)}", exc_info=True)
@@ -112,17 +111,83 @@ def get_user_training_plans(user_id):
     Args:
         user_id: User ID
         
+    Query parameters:
+        - limit: Page size for keyset pagination (optional)
+        - after: Cursor from the previous page's X-Next-Cursor (optional)
+        
+    Returns:
+        List of training plans, newest first
+    """
+    User.query.get_or_404(user_id)  # Verify user exists
+    return training_plan_summary_serializer.query_response(
+        PLANS_BY_USER, training_plan_keyset, {'user_id': user_id}
+    )
+
+@bp.route('/<int:user_id>/volume', methods=['GET'])
+@query_budget(2)
+def get_user_volume(user_id):
+    """Get a user's weekly training volume from the volume rollups.
+    
+    Args:
+        user_id: User ID
+        
+    Query parameters:
+        - start: A day in the first week, YYYY-MM-DD (default: 52 weeks before end)
+        - end: A day in the last week, YYYY-MM-DD (default: today)
+        - group_by: 'exercise' (default) or 'block'
+        - exercise_type_id: Only this exercise type (optional)
+        - block_id: Only this training block (optional)
+        
+    Returns:
+        List of weekly totals (iso_week, week_start, exercise_type_id or
+        block_id, sets, reps, tonnage in kg) ordered by week
+    """
+    try:
+        end = validate_date_format(request.args['end']) if 'end' in request.args else date.today()
+        start = (validate_date_format(request.args['start']) if 'start' in request.args
+                 else end - timedelta(weeks=52))
+    except ValueError as e:
+        abort(400, description=str(e))
+    if end < start:
+        abort(400, description="end must not be before start")
+    group_by = request.args.get('group_by', 'exercise')
+    if group_by not in ('exercise', 'block'):
+        abort(400, description="group_by must be 'exercise' or 'block'")
+    
+    User.query.get_or_404(user_id)  # Verify user exists
+    return render(weekly_volume(
+        user_id, start, end, group_by,
+        exercise_type_id=request.args.get('exercise_type_id', type=int),
+        block_id=request.args.get('block_id', type=int)
+    ))
+
+@bp.route('/<int:user_id>/records', methods=['GET'])
+@query_budget(2)
+def get_user_records(user_id):
+    """Get a user's personal records from the personal records index.
+    
+    Args:
+        user_id: User ID
+        
+    Query parameters:
+        - exercise_type_id: Only this exercise type (optional)
+        - formula: Estimated 1RM formula, 'epley' (default) or 'brzycki'
+        
     Returns:
-        List of training plans
+        List of records (exercise_type_id, rep_count, weight in kg, e1rm,
+        workout_id, achieved_on) ordered by exercise type and rep count
     """
+    formula = request.args.get('formula', 'epley')
     User.query.get_or_404(user_id)  # Verify user exists
-    plans = TrainingPlan.query.filter_by(user_id=user_id).all()
-    return jsonify([{
-        'id': plan.id,
-        'name': plan.name,
-        'start_date': plan.start_date.isoformat(),
-        'end_date': plan.end_date.isoformat()
-    } for plan in plans])
+    try:
+        records = personal_records(
+            user_id,
+            exercise_type_id=request.args.get('exercise_type_id', type=int),
+            formula=formula
+        )
+    except ValueError as e:
+        abort(400, description=str(e))
+    return render(records)
 
 @bp.route('/<access_key>', methods=['DELETE'])
 def delete_user(access_key):
@@ -1,45 +1,68 @@
-from flask import Blueprint, jsonify, request, abort
+from flask import Blueprint, request, abort
 from http import HTTPStatus
-from ..core.models import db, Workout, TrainingBlock
+from ..core.models import db, Workout, TrainingBlock, SetLog
 from ..core.validation import validate_request_data, validate_date_format
+from ..core.serializers import workout_serializer, set_log_serializer
+from ..core.pagination import workout_keyset
+from ..core.queries import WORKOUTS_BY_BLOCK
+from ..core.negotiation import render
+from ..core.json_queries import has_exercise
+from ..core.set_logs import append_sets, strip_set_log_patch, strip_set_logs
+from ..core.json_patch import (
+    JSON_PATCH, MERGE_PATCH, JsonPatchConflict, JsonPatchError, patch_json_column
+)
+from ..core.query_stats import query_budget
+from ..core.rollups import WorkoutState, append_set_volume, appended_sets, record_volume_changes
+from ..core.records import append_set_records, update_personal_records
+from ..core.exercise_refs import sync_exercise_refs
 from sqlalchemy.exc import IntegrityError
-from typing import List
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
 
 bp = Blueprint('workouts', __name__, url_prefix='/api/workouts')
 
+SEQUENCE_CONSTRAINT = 'uq_workouts_block_sequence'
+
+
+def _is_sequence_conflict(error: IntegrityError) -> bool:
+    """Whether an IntegrityError is a duplicate (block_id, sequence_order)."""
+    diag = getattr(error.orig, 'diag', None)
+    if diag is not None:
+        # psycopg2 reports the violated constraint by name
+        return diag.constraint_name == SEQUENCE_CONSTRAINT
+    # SQLite only names the columns
+    return 'workouts.block_id, workouts.sequence_order' in str(error.orig)
+
+
 @bp.route('', methods=['GET'])
+@query_budget(3)
 def get_workouts():
     """Get all workouts for a training block.
     
     Query parameters:
         - block_id: Training block ID (required)
+        - exercise_type_id: Only workouts containing this exercise type (optional)
+        - limit: Page size for keyset pagination (optional)
+        - after: Cursor from the previous page's X-Next-Cursor (optional)
         
     Returns:
-        List of workouts in sequence order
+        List of workouts in sequence order, or NDJSON lines when the
+        client sends Accept: application/x-ndjson
     """
     block_id = request.args.get('block_id', type=int)
     if not block_id:
         abort(400, description="block_id query parameter is required")
         
     block = TrainingBlock.query.get_or_404(block_id)
-    workouts = db.session.execute(
-        db.select(Workout)
-        .filter_by(block_id=block_id)
-        .order_by(db.text('sequence_order'))
-    ).scalars().all()
-    
-    return jsonify([{
-        'id': w.id,
-        'name': w.name,
-        'block_id': w.block_id,
-        'sequence_order': w.sequence_order,
-        'status': w.status,
-        'planned_date': w.planned_date.isoformat() if w.planned_date else None,
-        'actual_date': w.actual_date.isoformat() if w.actual_date else None,
-        'exercises': w.exercises,
-        'created_at': w.created_at.isoformat(),
-        'updated_at': w.updated_at.isoformat()
-    } for w in workouts])
+    
+    exercise_type_id = request.args.get('exercise_type_id', type=int)
+    if exercise_type_id is not None:
+        stmt = db.select(Workout).filter_by(block_id=block_id).where(
+            has_exercise(exercise_type_id=exercise_type_id)
+        )
+        return workout_serializer.query_response(stmt, workout_keyset)
+    
+    return workout_serializer.query_response(WORKOUTS_BY_BLOCK, workout_keyset, {'block_id': block_id})
 
 @bp.route('', methods=['POST'])
 def create_workout():
@@ -66,40 +89,322 @@ def create_workout():
         validate_request_data(data, ['name', 'block_id', 'sequence_order', 'exercises'])
         
         block = TrainingBlock.query.get_or_404(data['block_id'])
+        planned_date = data.get('planned_date')
+        if isinstance(planned_date, str):
+            planned_date = validate_date_format(planned_date)
         
         workout = Workout(
             name=data['name'],
             block_id=data['block_id'],
             sequence_order=data['sequence_order'],
-            exercises=data['exercises'],
-            planned_date=data.get('planned_date'),
+            exercises=strip_set_logs(data['exercises']),
+            planned_date=planned_date,
             status=data.get('status', 'pending')
         )
         
         db.session.add(workout)
+        # Assigns workout.id, which the derived tables below reference
+        db.session.flush()
+        state = WorkoutState.of(workout)
+        record_volume_changes([(None, state)])
+        update_personal_records([(None, state)])
+        sync_exercise_refs([(None, state)])
         db.session.commit()
         
-        return jsonify({
-            'id': workout.id,
-            'name': workout.name,
-            'block_id': workout.block_id,
-            'sequence_order': workout.sequence_order,
-            'status': workout.status,
-            'planned_date': workout.planned_date.isoformat() if workout.planned_date else None,
-            'actual_date': workout.actual_date.isoformat() if workout.actual_date else None,
-            'exercises': workout.exercises,
-            'created_at': workout.created_at.isoformat(),
-            'updated_at': workout.updated_at.isoformat()
-        }), HTTPStatus.CREATED
+        return workout_serializer.response(workout, HTTPStatus.CREATED)
         
-    except IntegrityError:
+    except IntegrityError as e:
+        db.session.rollback()
+        if not _is_sequence_conflict(e):
+            raise
+        abort(409, description="Workout with this sequence order already exists in block")
+    except ValueError as e:
+        db.session.rollback()
+        abort(400, description=str(e))
+    except Exception as e:
+        db.session.rollback()
+        abort(500, description=str(e))
+
+MAX_BULK_ITEMS = 500
+
+BULK_UPDATE_FIELDS = ('name', 'sequence_order', 'planned_date', 'actual_date', 'status', 'exercises')
+VOLUME_FIELDS = {'planned_date', 'actual_date', 'exercises'}
+
+
+class BulkItemError(ValueError):
+    """A single bulk item that cannot be written."""
+
+    def __init__(self, message: str, status: int = HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+def _bulk_items() -> List[Any]:
+    """Read the JSON array body of a bulk request."""
+    items = request.get_json()
+    if not isinstance(items, list) or not items:
+        abort(400, description="Request body must be a non-empty array")
+    if len(items) > MAX_BULK_ITEMS:
+        abort(400, description=f"At most {MAX_BULK_ITEMS} items per request")
+    return items
+
+
+def _workout_values(item: Any, fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """Convert the given fields of a bulk item to column values.
+
+    Raises:
+        BulkItemError: If the item is malformed
+    """
+    if not isinstance(item, dict):
+        raise BulkItemError("Item must be an object")
+    values = {field: item[field] for field in fields if field in item}
+    if 'exercises' in values:
+        values['exercises'] = strip_set_logs(values['exercises'])
+    for field in ('id', 'block_id', 'sequence_order'):
+        if field in values and (isinstance(values[field], bool) or not isinstance(values[field], int)):
+            raise BulkItemError(f"{field} must be an integer")
+    for field in ('planned_date', 'actual_date'):
+        if values.get(field) is None:
+            continue
+        if not isinstance(values[field], str):
+            raise BulkItemError(f"{field} must be a date string")
+        try:
+            values[field] = validate_date_format(values[field])
+        except ValueError as e:
+            raise BulkItemError(f"{field}: {e}")
+    return values
+
+
+def _bulk_response(workouts: List[Workout], errors: List[Dict[str, Any]], status: int):
+    """Render the written workouts alongside the per-item errors."""
+    if errors:
+        status = HTTPStatus.MULTI_STATUS
+    return render({
+        'workouts': [workout_serializer.to_dict(workout) for workout in workouts],
+        'errors': errors
+    }, status)
+
+
+def _bulk_failed(errors: List[Dict[str, Any]]):
+    """Reject an atomic batch without writing anything."""
+    db.session.rollback()
+    return render({'workouts': [], 'errors': errors}, HTTPStatus.UNPROCESSABLE_ENTITY)
+
+
+@bp.route('/bulk', methods=['POST'])
+def create_workouts_bulk():
+    """Create many workouts in one transaction.
+
+    The body is an array of workouts with the same fields as a single
+    create; planned_date is required. Every block_id is checked with one
+    IN query and the rows are written with a single multi-row INSERT.
+
+    Query parameters:
+        - atomic: If true, write nothing unless every item is valid (optional)
+
+    Returns:
+        {"workouts": [...], "errors": [{"index", "status", "error"}]} with
+        201 when every item was created, 207 when some items failed, or 422
+        in atomic mode when any item failed
+    """
+    items = _bulk_items()
+    atomic = request.args.get('atomic', 'false').lower() == 'true'
+
+    errors = []
+    rows = {}
+    for index, item in enumerate(items):
+        try:
+            if isinstance(item, dict):
+                validate_request_data(item, ['name', 'block_id', 'sequence_order', 'planned_date', 'exercises'])
+            values = _workout_values(item, ('block_id', *BULK_UPDATE_FIELDS))
+            values.setdefault('status', 'planned')
+            rows[index] = values
+        except ValueError as e:
+            errors.append({'index': index, 'status': getattr(e, 'status', HTTPStatus.BAD_REQUEST), 'error': str(e)})
+
+    if rows:
+        block_ids = {values['block_id'] for values in rows.values()}
+        existing_blocks = set(db.session.scalars(
+            db.select(TrainingBlock.id).where(TrainingBlock.id.in_(block_ids))
+        ))
+        taken = set(db.session.execute(
+            db.select(Workout.block_id, Workout.sequence_order).where(
+                Workout.block_id.in_(existing_blocks),
+                Workout.sequence_order.in_({values['sequence_order'] for values in rows.values()})
+            )
+        ).tuples()) if existing_blocks else set()
+
+        for index, values in list(rows.items()):
+            slot = (values['block_id'], values['sequence_order'])
+            if values['block_id'] not in existing_blocks:
+                error = (HTTPStatus.NOT_FOUND, f"Training block {values['block_id']} not found")
+            elif slot in taken:
+                error = (HTTPStatus.CONFLICT, "Workout with this sequence order already exists in block")
+            else:
+                taken.add(slot)
+                continue
+            del rows[index]
+            errors.append({'index': index, 'status': error[0], 'error': error[1]})
+
+    errors.sort(key=lambda error: error['index'])
+    if atomic and errors:
+        return _bulk_failed(errors)
+
+    try:
+        workouts = []
+        if rows:
+            # Without sort_by_parameter_order every row goes out in one
+            # multi-row INSERT; (block_id, sequence_order) is unique, so it
+            # restores the request order instead.
+            by_slot = {
+                (workout.block_id, workout.sequence_order): workout
+                for workout in db.session.scalars(db.insert(Workout).returning(Workout), list(rows.values()))
+            }
+            workouts = [by_slot[(values['block_id'], values['sequence_order'])] for values in rows.values()]
+            created = [(None, WorkoutState.of(workout)) for workout in workouts]
+            record_volume_changes(created)
+            update_personal_records(created)
+            sync_exercise_refs(created)
+        # Serialize before commit expires the instances
+        response = _bulk_response(workouts, errors, HTTPStatus.CREATED)
+        db.session.commit()
+        return response
+
+    except IntegrityError as e:
         db.session.rollback()
+        if not _is_sequence_conflict(e):
+            raise
         abort(409, description="Workout with this sequence order already exists in block")
     except Exception as e:
         db.session.rollback()
         abort(500, description=str(e))
 
+
+@bp.route('/bulk', methods=['PATCH'])
+def update_workouts_bulk():
+    """Update many workouts in one transaction.
+
+    The body is an array of objects with an id and any of the fields a
+    single update accepts. Workouts are looked up with one IN query and
+    written with an executemany UPDATE by primary key, in array order.
+
+    Query parameters:
+        - atomic: If true, write nothing unless every item is valid (optional)
+
+    Returns:
+        {"workouts": [...], "errors": [{"index", "status", "error"}]} with
+        200 when every item was updated, 207 when some items failed, or 422
+        in atomic mode when any item failed
+    """
+    items = _bulk_items()
+    atomic = request.args.get('atomic', 'false').lower() == 'true'
+
+    errors = []
+    rows = {}
+    for index, item in enumerate(items):
+        try:
+            values = _workout_values(item, ('id', *BULK_UPDATE_FIELDS))
+            if not isinstance(values.get('id'), int):
+                raise BulkItemError("id must be an integer")
+            if len(values) == 1:
+                raise BulkItemError("No fields to update")
+            rows[index] = values
+        except BulkItemError as e:
+            errors.append({'index': index, 'status': e.status, 'error': str(e)})
+
+    if rows:
+        current = {
+            workout_id: (block_id, sequence_order)
+            for workout_id, block_id, sequence_order in db.session.execute(
+                db.select(Workout.id, Workout.block_id, Workout.sequence_order)
+                .where(Workout.id.in_({values['id'] for values in rows.values()}))
+            ).tuples()
+        }
+        moves = {values['sequence_order'] for values in rows.values() if 'sequence_order' in values}
+        slots = {}
+        if moves and current:
+            slots = {
+                (block_id, sequence_order): workout_id
+                for workout_id, block_id, sequence_order in db.session.execute(
+                    db.select(Workout.id, Workout.block_id, Workout.sequence_order).where(
+                        Workout.block_id.in_({block_id for block_id, _ in current.values()}),
+                        Workout.sequence_order.in_(moves)
+                    )
+                ).tuples()
+            }
+        slots.update({slot: workout_id for workout_id, slot in current.items()})
+
+        # Replay the updates in order, as the executemany will, so sequence
+        # clashes are reported per item instead of failing the batch
+        for index, values in list(rows.items()):
+            workout_id = values['id']
+            if workout_id not in current:
+                error = (HTTPStatus.NOT_FOUND, f"Workout {workout_id} not found")
+            elif 'sequence_order' in values:
+                block_id, sequence_order = current[workout_id]
+                slot = (block_id, values['sequence_order'])
+                if slots.get(slot, workout_id) != workout_id:
+                    error = (HTTPStatus.CONFLICT, "Workout with this sequence order already exists in block")
+                else:
+                    slots.pop((block_id, sequence_order), None)
+                    slots[slot] = workout_id
+                    current[workout_id] = slot
+                    continue
+            else:
+                continue
+            del rows[index]
+            errors.append({'index': index, 'status': error[0], 'error': error[1]})
+
+    errors.sort(key=lambda error: error['index'])
+    if atomic and errors:
+        return _bulk_failed(errors)
+
+    try:
+        workouts = []
+        if rows:
+            # Only changes to exercises or dates affect volume, records and exercise refs
+            volume_ids = {values['id'] for values in rows.values() if VOLUME_FIELDS & values.keys()}
+            before = {
+                row.id: WorkoutState.of(row) for row in db.session.execute(
+                    db.select(Workout.id, Workout.block_id, Workout.planned_date,
+                              Workout.actual_date, Workout.exercises)
+                    .where(Workout.id.in_(volume_ids))
+                )
+            } if volume_ids else {}
+            now = datetime.utcnow()
+            db.session.execute(
+                db.update(Workout),
+                [{**values, 'updated_at': now} for values in rows.values()]
+            )
+            updated_ids = [values['id'] for values in rows.values()]
+            by_id = {
+                workout.id: workout for workout in db.session.scalars(
+                    db.select(Workout).where(Workout.id.in_(updated_ids))
+                    .execution_options(populate_existing=True)
+                )
+            }
+            workouts = [by_id[workout_id] for workout_id in dict.fromkeys(updated_ids)]
+            changes = [(before[workout_id], WorkoutState.of(by_id[workout_id])) for workout_id in before]
+            record_volume_changes(changes)
+            update_personal_records(changes)
+            sync_exercise_refs(changes)
+        # Serialize before commit expires the instances
+        response = _bulk_response(workouts, errors, HTTPStatus.OK)
+        db.session.commit()
+        return response
+
+    except IntegrityError as e:
+        db.session.rollback()
+        if not _is_sequence_conflict(e):
+            raise
+        abort(409, description="Workout with this sequence order already exists in block")
+    except Exception as e:
+        db.session.rollback()
+        abort(500, description=str(e))
+
+
 @bp.route('/<int:workout_id>', methods=['GET'])
+@query_budget(2)
 def get_workout(workout_id):
     """Get workout by ID.
     
@@ -107,22 +412,10 @@ def get_workout(workout_id):
         workout_id: Workout ID
         
     Returns:
-        Workout data or 404 if not found
+        Workout data with an ETag, 304 if If-None-Match matches,
+        or 404 if not found
     """
-    workout = Workout.query.get_or_404(workout_id)
-    
-    return jsonify({
-        'id': workout.id,
-        'name': workout.name,
-        'block_id': workout.block_id,
-        'sequence_order': workout.sequence_order,
-        'status': workout.status,
-        'planned_date': workout.planned_date.isoformat() if workout.planned_date else None,
-        'actual_date': workout.actual_date.isoformat() if workout.actual_date else None,
-        'exercises': workout.exercises,
-        'created_at': workout.created_at.isoformat(),
-        'updated_at': workout.updated_at.isoformat()
-    })
+    return workout_serializer.resource_response(workout_id)
 
 @bp.route('/<int:workout_id>', methods=['PUT'])
 def update_workout(workout_id):
@@ -146,6 +439,7 @@ def update_workout(workout_id):
         Updated workout data
     """
     workout = Workout.query.get_or_404(workout_id)
+    before = WorkoutState.of(workout)
     
     try:
         data = request.get_json()
@@ -161,30 +455,75 @@ def update_workout(workout_id):
         if 'status' in data:
             workout.status = data['status']
         if 'exercises' in data:
-            workout.exercises = data['exercises']
-            
+            # A document read from the API includes the logged sets; they stay in set_logs
+            workout.exercises = strip_set_logs(data['exercises'])
+        
+        changes = [(before, WorkoutState.of(workout))]
+        record_volume_changes(changes)
+        update_personal_records(changes)
+        sync_exercise_refs(changes)
         db.session.commit()
         
-        return jsonify({
-            'id': workout.id,
-            'name': workout.name,
-            'block_id': workout.block_id,
-            'sequence_order': workout.sequence_order,
-            'status': workout.status,
-            'planned_date': workout.planned_date.isoformat() if workout.planned_date else None,
-            'actual_date': workout.actual_date.isoformat() if workout.actual_date else None,
-            'exercises': workout.exercises,
-            'created_at': workout.created_at.isoformat(),
-            'updated_at': workout.updated_at.isoformat()
-        })
+        return workout_serializer.response(workout)
         
-    except IntegrityError:
+    except IntegrityError as e:
         db.session.rollback()
+        if not _is_sequence_conflict(e):
+            raise
         abort(409, description="Workout with this sequence order already exists in block")
     except Exception as e:
         db.session.rollback()
         abort(500, description=str(e))
 
+@bp.route('/<int:workout_id>/exercises', methods=['PATCH'])
+def patch_workout_exercises(workout_id):
+    """Apply a partial update to a workout's exercises document.
+    
+    The body is a JSON Patch (Content-Type: application/json-patch+json)
+    or a JSON Merge Patch (application/merge-patch+json). With plain
+    application/json an array is taken as a JSON Patch and an object as a
+    merge patch. On Postgres the patch runs as a single UPDATE on the
+    locked row, which returns the document before and after the patch
+    for the derived tables.
+    
+    Args:
+        workout_id: Workout ID
+        
+    Returns:
+        204 No Content on success, 404 if not found, or 409 if the patch
+        does not apply (missing path or failed test operation)
+    """
+    patch = request.get_json()
+    if request.mimetype == JSON_PATCH:
+        patch_type = JSON_PATCH
+    elif request.mimetype == MERGE_PATCH:
+        patch_type = MERGE_PATCH
+    else:
+        patch_type = JSON_PATCH if isinstance(patch, list) else MERGE_PATCH
+    patch = strip_set_log_patch(patch) if patch_type == JSON_PATCH else strip_set_logs(patch)
+    
+    try:
+        patched = patch_json_column(Workout, workout_id, 'exercises', patch_type, patch, returning=(
+            Workout.block_id, Workout.planned_date, Workout.actual_date
+        ))
+        if patched is None:
+            db.session.rollback()
+            abort(404)
+        before = WorkoutState(workout_id, *patched.values, patched.before)
+        changes = [(before, before._replace(exercises=patched.after))]
+        record_volume_changes(changes)
+        update_personal_records(changes)
+        sync_exercise_refs(changes)
+        db.session.commit()
+        return '', HTTPStatus.NO_CONTENT
+        
+    except JsonPatchError as e:
+        db.session.rollback()
+        abort(400, description=str(e))
+    except JsonPatchConflict as e:
+        db.session.rollback()
+        abort(409, description=str(e))
+
 @bp.route('/<int:workout_id>', methods=['DELETE'])
 def delete_workout(workout_id):
     """Delete workout by ID.
@@ -198,41 +537,136 @@ def delete_workout(workout_id):
     workout = Workout.query.get_or_404(workout_id)
     
     try:
+        set_logs = db.session.scalars(db.select(SetLog).filter_by(workout_id=workout_id)).all()
+        deleted = [(WorkoutState.of(workout, set_logs), None)]
+        record_volume_changes(deleted)
+        sync_exercise_refs(deleted)
+        db.session.execute(db.delete(SetLog).where(SetLog.workout_id == workout_id))
         db.session.delete(workout)
+        # Recomputing a record held by this workout must not see it
+        db.session.flush()
+        update_personal_records(deleted)
         db.session.commit()
         return '', HTTPStatus.NO_CONTENT
     except Exception as e:
         db.session.rollback()
         abort(500, description=str(e))
 
+@bp.route('/<int:workout_id>/sets', methods=['POST'])
+def log_sets(workout_id):
+    """Append logged sets to an exercise of a workout.
+    
+    Sets are appended to the set_logs table; the exercises JSON is not
+    rewritten. They appear under the exercise's "logs" when the workout
+    is read.
+    
+    Args:
+        workout_id: Workout ID
+        
+    Required fields:
+        - exercise_sequence: "sequence" of the exercise in the workout
+        - sets: List of sets, each with optional reps, weight
+          (number or string such as "82.5kg") and rpe
+    
+    Optional fields:
+        - timestamp: Log session (ISO datetime, default: now); sets logged
+          with the same timestamp are numbered after the existing ones
+        
+    Returns:
+        The stored sets and 201 status code on success, 404 if the workout
+        has no exercise with that sequence
+    """
+    try:
+        data = request.get_json()
+        validate_request_data(data, ['exercise_sequence', 'sets'])
+        
+        exercise_sequence = data['exercise_sequence']
+        if isinstance(exercise_sequence, bool) or not isinstance(exercise_sequence, int):
+            raise ValueError("exercise_sequence must be an integer")
+        if not isinstance(data['sets'], list) or not data['sets']:
+            raise ValueError("sets must be a non-empty list")
+        log_ts = None
+        if data.get('timestamp'):
+            if not isinstance(data['timestamp'], str):
+                raise ValueError("timestamp must be an ISO datetime string")
+            log_ts = datetime.fromisoformat(data['timestamp'])
+            if log_ts.tzinfo is not None:
+                raise ValueError("timestamp must not include a UTC offset")
+        
+        # Checked in SQL so the exercises JSON is never loaded
+        found = db.session.scalar(
+            db.select(Workout.id).where(
+                Workout.id == workout_id,
+                has_exercise(sequence=exercise_sequence)
+            )
+        )
+    except ValueError as e:
+        abort(400, description=str(e))
+    if found is None:
+        abort(404)
+    
+    try:
+        rows = append_sets(workout_id, exercise_sequence, data['sets'], log_ts)
+        appended = appended_sets(workout_id, exercise_sequence, rows)
+        append_set_volume(appended)
+        append_set_records(appended)
+        db.session.commit()
+        return render(rows, HTTPStatus.CREATED)
+        
+    except ValueError as e:
+        db.session.rollback()
+        abort(400, description=str(e))
+    except IntegrityError:
+        db.session.rollback()
+        abort(409, description="Sets were logged concurrently for this exercise; retry")
+    except Exception as e:
+        db.session.rollback()
+        abort(500, description=str(e))
+
+@bp.route('/<int:workout_id>/sets', methods=['GET'])
+@query_budget(2)
+def get_logged_sets(workout_id):
+    """Get the logged sets of a workout as typed rows.
+    
+    Args:
+        workout_id: Workout ID
+        
+    Query parameters:
+        - exercise_sequence: Only sets of this exercise (optional)
+        
+    Returns:
+        List of sets ordered by exercise, log session and set index
+    """
+    if db.session.scalar(db.select(Workout.id).filter_by(id=workout_id)) is None:
+        abort(404)
+    
+    stmt = db.select(SetLog).filter_by(workout_id=workout_id)
+    exercise_sequence = request.args.get('exercise_sequence', type=int)
+    if exercise_sequence is not None:
+        stmt = stmt.filter_by(exercise_sequence=exercise_sequence)
+    
+    logs = db.session.scalars(
+        stmt.order_by(SetLog.exercise_sequence, SetLog.log_ts, SetLog.set_index)
+    )
+    return set_log_serializer.response_many(logs)
+
 @bp.route('/block/<int:block_id>', methods=['GET'])
+@query_budget(3)
 def get_block_workouts(block_id):
     """Get all workouts for a training block.
     
     Args:
         block_id: Training block ID
         
+    Query parameters:
+        - limit: Page size for keyset pagination (optional)
+        - after: Cursor from the previous page's X-Next-Cursor (optional)
+        
     Returns:
-        List of workout data
+        List of workout data, or NDJSON lines when the client sends
+        Accept: application/x-ndjson
     """
     # Verify block exists
     block = TrainingBlock.query.get_or_404(block_id)
     
-    workouts = db.session.execute(
-        db.select(Workout)
-        .filter_by(block_id=block_id)
-        .order_by(db.text('sequence_order'))
-    ).scalars().all()
-    
-    return jsonify([{
-        'id': workout.id,
-        'block_id': workout.block_id,
-        'name': workout.name,
-        'planned_date': workout.planned_date.isoformat(),
-        'actual_date': workout.actual_date.isoformat() if workout.actual_date else None,
-        'status': workout.status,
-        'sequence_order': workout.sequence_order,
-        'exercises': workout.exercises,
-        'created_at': workout.created_at.isoformat(),
-        'updated_at': workout.updated_at.isoformat()
-    } for workout in workouts]) 
\ No newline at end of file
+    return workout_serializer.query_response(WORKOUTS_BY_BLOCK, workout_keyset, {'block_id': block_id})
@@ -0,0 +1,48 @@
+"""Benchmark: compression CPU cost against bytes saved on workout payloads.
+
+Renders realistic workout list payloads (see bench_serializers.py) and, for
+every available algorithm and a range of levels, reports the compressed size,
+ratio and time per response. No database is needed.
+
+Usage:
+    python api/scripts/bench_compression.py [rows] [repeat]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.compression import CODECS, compress
+from scripts.bench_serializers import document_serializer, make_workouts
+
+LEVELS = {
+    'gzip': [1, 6, 9],
+    'br': [1, 4, 6, 11],
+    'zstd': [1, 3, 9, 19],
+}
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    for count in sorted({1, 10, rows}):
+        body = document_serializer.dumps_many(make_workouts(count))
+        print(f"\n{count} workouts: {len(body)} bytes uncompressed")
+        print(f"{'algorithm':>10} {'level':>5} {'bytes':>9} {'ratio':>7} {'ms':>8} {'MB/s':>8}")
+
+        for encoding in ['gzip', 'br', 'zstd']:
+            if encoding not in CODECS:
+                print(f"{encoding:>10}   (not installed)")
+                continue
+            for level in LEVELS[encoding]:
+                compressed = compress(body, encoding, level)
+                best = min(timeit.repeat(lambda: compress(body, encoding, level), number=1, repeat=repeat))
+                print(f"{encoding:>10} {level:>5} {len(compressed):>9} "
+                      f"{len(body) / len(compressed):>6.1f}x {best * 1000:>8.3f} "
+                      f"{len(body) / best / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
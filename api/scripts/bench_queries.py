@@ -0,0 +1,98 @@
+"""Micro-benchmark: per-request statement building vs the cached hot queries.
+
+Times the Python side of a few hot route queries against an in-memory
+SQLite database holding a handful of rows, so statement construction, cache
+key generation and compiled_cache lookup dominate:
+
+- rebuilt: a fresh db.select(...) per request, as routes did before
+  core/queries.py (SQLAlchemy still reuses the compiled SQL, but has to
+  rebuild the statement and recompute its cache key to find it)
+- cached: the constants from core/queries.py with bound parameters
+
+Usage:
+    python api/scripts/bench_queries.py [repeat]
+"""
+
+import os
+import sys
+import timeit
+from datetime import date
+
+from flask import Flask
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.models import db, User, TrainingPlan, TrainingBlock, Workout
+from core.pagination import page_bind_params, paginate, training_plan_keyset, workout_keyset
+from core.queries import PLANS_BY_USER, USER_BY_ACCESS_KEY, WORKOUTS_BY_BLOCK, statement_cache
+
+PAGE_SIZE = 20
+
+
+def seed():
+    """Create one user with a plan, a block and a few workouts."""
+    user = User(access_key='bench', nickname='Bench')
+    db.session.add(user)
+    db.session.flush()
+    plan = TrainingPlan(user_id=user.id, name='Plan', progression_type='linear', target_weekly_hours=5)
+    db.session.add(plan)
+    db.session.flush()
+    block = TrainingBlock(plan_id=plan.id, name='Block', primary_focus='strength', duration_weeks=4, sequence_order=1)
+    db.session.add(block)
+    db.session.flush()
+    for i in range(5):
+        db.session.add(Workout(block_id=block.id, name=f'W{i}', planned_date=date(2024, 1, i + 1),
+                               sequence_order=i + 1, exercises={'exercises': []}))
+    db.session.commit()
+    return user.id, block.id
+
+
+def rebuilt_queries(user_id, block_id):
+    """The statements as routes built them on every request."""
+    db.session.execute(db.select(User).filter_by(access_key='bench').limit(1)).scalar_one_or_none()
+    workouts = workout_keyset.order(db.select(Workout).filter_by(block_id=block_id)).limit(PAGE_SIZE + 1)
+    db.session.execute(workouts).scalars().all()
+    plans = training_plan_keyset.order(db.select(TrainingPlan).filter_by(user_id=user_id)).limit(PAGE_SIZE + 1)
+    db.session.execute(plans).scalars().all()
+    db.session.expunge_all()
+
+
+def cached_queries(user_id, block_id):
+    """The hot queries from core/queries.py, as query_response() runs them."""
+    db.session.execute(USER_BY_ACCESS_KEY, {'access_key': 'bench'}).scalar_one_or_none()
+    workouts = statement_cache.get(
+        ('bench', WORKOUTS_BY_BLOCK),
+        lambda: paginate(workout_keyset.order(WORKOUTS_BY_BLOCK), workout_keyset, False)
+    )
+    db.session.execute(workouts, {'block_id': block_id, **page_bind_params(workout_keyset, PAGE_SIZE, None)}).scalars().all()
+    plans = statement_cache.get(
+        ('bench', PLANS_BY_USER),
+        lambda: paginate(training_plan_keyset.order(PLANS_BY_USER), training_plan_keyset, False)
+    )
+    db.session.execute(plans, {'user_id': user_id, **page_bind_params(training_plan_keyset, PAGE_SIZE, None)}).scalars().all()
+    db.session.expunge_all()
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        user_id, block_id = seed()
+
+        results = {}
+        for label, func in [('rebuilt', rebuilt_queries), ('cached', cached_queries)]:
+            func(user_id, block_id)  # warm the compiled cache
+            best = min(timeit.repeat(lambda: func(user_id, block_id), number=repeat, repeat=5)) / repeat
+            results[label] = best
+            print(f"{label:>8}: {best * 1e6:8.1f} us per request (3 queries)")
+
+    saved = results['rebuilt'] - results['cached']
+    print(f"\nSaved {saved * 1e6:.1f} us per request ({results['rebuilt'] / results['cached']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
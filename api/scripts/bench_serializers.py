@@ -0,0 +1,105 @@
+"""Micro-benchmark: compiled serializers vs the hand-built dict + jsonify path.
+
+Builds transient Workout rows with a realistic exercises document (planned
+parameters plus a few logged sets) and times rendering a list response both
+ways. No database is needed.
+
+Usage:
+    python api/scripts/bench_serializers.py [rows] [repeat]
+"""
+
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from flask import Flask, jsonify
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.models import Workout
+from core.serializers import ModelSerializer, workout_serializer
+
+# Same fields without the set-log enricher, which needs a database
+document_serializer = ModelSerializer(Workout, workout_serializer.fields)
+
+
+def make_workouts(count):
+    """Create transient workouts shaped like the populated dev data."""
+    now = datetime.utcnow()
+    exercises = {
+        'exercises': [
+            {
+                'exercise_type_id': type_id,
+                'name': name,
+                'sequence': sequence,
+                'planned': {'sets': 5, 'reps': 5, 'rpe': 8, 'rest_minutes': 3},
+                'logs': [{
+                    'timestamp': now.isoformat(),
+                    'sets': [{'reps': 5, 'weight': '100kg', 'rpe': 8 + i * 0.5} for i in range(5)],
+                    'notes': 'Felt strong today',
+                    'perceived_effort': 8,
+                    'completed': True
+                }]
+            }
+            for sequence, (type_id, name) in enumerate([(1, 'Squat'), (2, 'Bench Press'), (3, 'Deadlift')], 1)
+        ]
+    }
+
+    workouts = []
+    for i in range(count):
+        workout = Workout(
+            block_id=1,
+            name=f"Strength Block Workout {i + 1}",
+            planned_date=(now + timedelta(days=i)).date(),
+            sequence_order=i + 1,
+            exercises=exercises,
+            status='completed'
+        )
+        workout.id = i + 1
+        workout.created_at = now
+        workout.updated_at = now
+        workouts.append(workout)
+    return workouts
+
+
+def render_jsonify(workouts):
+    """The per-route dict building used before the serializer layer."""
+    return jsonify([{
+        'id': w.id,
+        'name': w.name,
+        'block_id': w.block_id,
+        'sequence_order': w.sequence_order,
+        'status': w.status,
+        'planned_date': w.planned_date.isoformat() if w.planned_date else None,
+        'actual_date': w.actual_date.isoformat() if w.actual_date else None,
+        'exercises': w.exercises,
+        'created_at': w.created_at.isoformat(),
+        'updated_at': w.updated_at.isoformat()
+    } for w in workouts]).get_data()
+
+
+def render_serializer(workouts):
+    """The compiled serializer path."""
+    return document_serializer.response_many(workouts).get_data()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    app = Flask(__name__)
+    workouts = make_workouts(rows)
+
+    with app.app_context():
+        results = {}
+        for label, func in [('jsonify', render_jsonify), ('serializer', render_serializer)]:
+            best = min(timeit.repeat(lambda: func(workouts), number=1, repeat=repeat))
+            results[label] = best
+            print(f"{label:>10}: {best * 1000:8.3f} ms for {rows} workouts "
+                  f"({len(func(workouts))} bytes)")
+
+    print(f"\nSpeedup: {results['jsonify'] / results['serializer']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
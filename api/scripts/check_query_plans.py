@@ -0,0 +1,242 @@
+"""Query-plan regression check for the hot route queries.
+
+Seeds a database with a realistic amount of data, runs EXPLAIN on the
+statements the routes execute on every page load, and exits non-zero if any
+of them reads a table with a sequential scan instead of an index.
+
+- SQLite: EXPLAIN QUERY PLAN, failing on "SCAN <table>" steps that do not
+  use an index
+- Postgres: EXPLAIN (FORMAT JSON) with enable_seqscan off, failing on any
+  "Seq Scan" node. With sequential scans disabled the planner only falls
+  back to one when no usable index exists, so small seed data cannot hide a
+  missing index.
+
+Usage:
+    python api/scripts/check_query_plans.py [database_url]
+
+Without a URL a temporary SQLite database is used. Point it at a scratch
+Postgres database (never a shared one: it creates tables and inserts data)
+to check the production planner.
+"""
+
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+USERS = 20
+PLANS_PER_USER = 3
+BLOCKS_PER_PLAN = 4
+WORKOUTS_PER_BLOCK = 24
+
+
+def hot_queries(dialect):
+    """The statements each route runs, keyed by a readable name.
+
+    Args:
+        dialect: Database dialect name, for the dialect-specific search statement
+    """
+    from api.core.models import db, User, TrainingPlan, TrainingBlock, ExerciseType, Workout, SetLog, VolumeRollup, PersonalRecord, WorkoutExerciseRef
+    from api.core.json_queries import has_exercise
+    from api.core.search import search_statement, search_terms
+
+    return {
+        'user by access_key': db.select(User).filter_by(access_key='check_user_7'),
+        'plans by user (newest first)': (
+            db.select(TrainingPlan).filter_by(user_id=7)
+            .order_by(TrainingPlan.created_at.desc(), TrainingPlan.id.desc())
+            .limit(50)
+        ),
+        'blocks by plan': (
+            db.select(TrainingBlock).filter_by(plan_id=5)
+            .order_by(TrainingBlock.sequence_order, TrainingBlock.id)
+        ),
+        'workouts by block': (
+            db.select(Workout).filter_by(block_id=11)
+            .order_by(Workout.sequence_order, Workout.id)
+        ),
+        'workouts by block with exercise type': (
+            db.select(Workout).filter_by(block_id=11)
+            .where(has_exercise(exercise_type_id=1))
+            .order_by(Workout.sequence_order, Workout.id)
+        ),
+        'workouts by date range': (
+            db.select(Workout)
+            .where(Workout.planned_date.between(date(2024, 3, 1), date(2024, 3, 31)))
+        ),
+        'calendar for user by date range': (
+            db.select(
+                Workout.id, Workout.name, Workout.planned_date, Workout.actual_date,
+                Workout.status, Workout.block_id, TrainingBlock.plan_id, Workout.updated_at
+            )
+            .join(TrainingBlock, Workout.block_id == TrainingBlock.id)
+            .join(TrainingPlan, TrainingBlock.plan_id == TrainingPlan.id)
+            .where(
+                TrainingPlan.user_id == 7,
+                Workout.planned_date.between(date(2024, 3, 1), date(2024, 3, 31))
+            )
+            .order_by(Workout.planned_date, Workout.id)
+        ),
+        'exercise types by name': (
+            db.select(ExerciseType).order_by(ExerciseType.name, ExerciseType.id).limit(50)
+        ),
+        'workout by id': db.select(Workout).filter_by(id=42),
+        'set logs by workouts': (
+            db.select(SetLog).where(SetLog.workout_id.in_([41, 42, 43]))
+            .order_by(SetLog.workout_id, SetLog.exercise_sequence, SetLog.log_ts, SetLog.set_index)
+        ),
+        'weekly volume for user': (
+            db.select(VolumeRollup.iso_week, VolumeRollup.exercise_type_id, db.func.sum(VolumeRollup.tonnage))
+            .where(VolumeRollup.user_id == 7, VolumeRollup.iso_week.between(202401, 202452))
+            .group_by(VolumeRollup.iso_week, VolumeRollup.exercise_type_id)
+        ),
+        'weekly volume for user and exercise': (
+            db.select(VolumeRollup.iso_week, db.func.sum(VolumeRollup.tonnage))
+            .where(VolumeRollup.user_id == 7, VolumeRollup.exercise_type_id == 1,
+                   VolumeRollup.iso_week.between(202401, 202452))
+            .group_by(VolumeRollup.iso_week)
+        ),
+        'personal records for user': (
+            db.select(PersonalRecord).where(PersonalRecord.user_id == 7)
+            .order_by(PersonalRecord.exercise_type_id, PersonalRecord.rep_count)
+        ),
+        'personal records held by workouts': (
+            db.select(PersonalRecord.user_id, PersonalRecord.exercise_type_id, PersonalRecord.rep_count)
+            .where(PersonalRecord.workout_id.in_([41, 42, 43]))
+        ),
+        'exercise history by date': (
+            db.select(WorkoutExerciseRef.workout_id, Workout.name, Workout.exercises)
+            .join(Workout, Workout.id == WorkoutExerciseRef.workout_id)
+            .where(WorkoutExerciseRef.exercise_type_id == 1,
+                   WorkoutExerciseRef.planned_date.between(date(2024, 1, 1), date(2024, 3, 31)))
+            .order_by(WorkoutExerciseRef.planned_date.desc(), WorkoutExerciseRef.workout_id.desc())
+            .limit(21)
+        ),
+        'exercise type referenced': db.select(
+            db.select(WorkoutExerciseRef.workout_id).where(WorkoutExerciseRef.exercise_type_id == 2).exists()
+        ),
+        'exercise search with facets': search_statement(dialect)[0].params(
+            q=search_terms(dialect, 'exercise 12'), page_limit=21
+        ),
+    }
+
+
+def seed(db):
+    """Insert users, plans, blocks, workouts and exercise types in bulk."""
+    from api.core.models import User, TrainingPlan, TrainingBlock, ExerciseType, Workout
+    from api.core.exercise_refs import rebuild_exercise_refs
+    from api.core.records import rebuild_records
+    from api.core.rollups import rebuild_volume
+
+    now = datetime.utcnow()
+    start = date(2024, 1, 1)
+    exercises = {'exercises': [{'exercise_type_id': 1, 'name': 'Squat', 'sequence': 1,
+                                'planned': {'sets': 5, 'reps': 5},
+                                'logs': [{'sets': [{'reps': 5, 'weight': '100kg'}] * 5}]}]}
+
+    db.session.execute(db.insert(ExerciseType), [
+        {'name': f"Exercise {i}", 'category': 'Strength', 'created_at': now, 'updated_at': now}
+        for i in range(200)
+    ])
+    db.session.execute(db.insert(User), [
+        {'access_key': f"check_user_{i}", 'nickname': f"User {i}", 'created_at': now, 'updated_at': now}
+        for i in range(1, USERS + 1)
+    ])
+    db.session.execute(db.insert(TrainingPlan), [
+        {'user_id': user_id, 'name': f"Plan {p}", 'created_at': now + timedelta(seconds=p), 'updated_at': now}
+        for user_id in range(1, USERS + 1) for p in range(PLANS_PER_USER)
+    ])
+    plan_count = USERS * PLANS_PER_USER
+    db.session.execute(db.insert(TrainingBlock), [
+        {'plan_id': plan_id, 'name': f"Block {b}", 'primary_focus': 'Strength', 'duration_weeks': 6,
+         'sequence_order': b + 1, 'created_at': now, 'updated_at': now}
+        for plan_id in range(1, plan_count + 1) for b in range(BLOCKS_PER_PLAN)
+    ])
+    block_count = plan_count * BLOCKS_PER_PLAN
+    db.session.execute(db.insert(Workout), [
+        {'block_id': block_id, 'name': f"Workout {w}", 'status': 'planned', 'sequence_order': w + 1,
+         'planned_date': start + timedelta(days=(block_id * 7 + w * 2) % 730),
+         'exercises': exercises, 'created_at': now, 'updated_at': now}
+        for block_id in range(1, block_count + 1) for w in range(WORKOUTS_PER_BLOCK)
+    ])
+    rebuild_volume()
+    rebuild_records()
+    rebuild_exercise_refs()
+    db.session.commit()
+
+    # Refresh planner statistics for the freshly inserted rows
+    db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+
+
+def sqlite_seq_scans(db, sql):
+    """Return the SQLite plan steps that scan a table without an index."""
+    rows = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    details = [row[-1] for row in rows]
+    # Only real tables count: SCAN CONSTANT ROW is the single row of a
+    # FROM-less SELECT, and CTEs and subqueries are scanned once built
+    scans = []
+    for detail in details:
+        match = re.match(r'SCAN (?:TABLE )?(\w+)', detail)
+        if match and match.group(1) in db.metadata.tables and 'INDEX' not in detail:
+            scans.append(detail)
+    return scans, details
+
+
+def postgres_seq_scans(db, sql):
+    """Return the Postgres plan nodes that are sequential scans."""
+    db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+    plan = db.session.execute(db.text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    scans, details = [], []
+    stack = [plan[0]['Plan']]
+    while stack:
+        node = stack.pop()
+        label = f"{node['Node Type']} on {node.get('Relation Name', '-')}"
+        if node.get('Index Name'):
+            label += f" using {node['Index Name']}"
+        details.append(label)
+        if node['Node Type'] == 'Seq Scan':
+            scans.append(label)
+        stack.extend(node.get('Plans', []))
+    db.session.rollback()
+    return scans, details
+
+
+def main():
+    if len(sys.argv) > 1:
+        os.environ['DATABASE_URL'] = sys.argv[1]
+    else:
+        os.environ['DATABASE_URL'] = f"sqlite:///{tempfile.mkdtemp()}/query_plans.db"
+
+    from api.app import app
+    from api.core.models import db
+
+    failures = 0
+    with app.app_context():
+        seed(db)
+        explain = sqlite_seq_scans if db.engine.dialect.name == 'sqlite' else postgres_seq_scans
+
+        for name, stmt in hot_queries(db.engine.dialect.name).items():
+            sql = str(stmt.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+            scans, details = explain(db, sql)
+            status = 'FAIL' if scans else 'ok'
+            failures += bool(scans)
+            print(f"[{status:>4}] {name}")
+            for detail in details:
+                print(f"         {detail}")
+
+    if failures:
+        print(f"\n{failures} hot query(s) use a sequential scan")
+        sys.exit(1)
+    print("\nAll hot queries use indexes")
+
+
+if __name__ == "__main__":
+    main()
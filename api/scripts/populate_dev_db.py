@@ -7,6 +7,7 @@ from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.models import User, TrainingPlan, TrainingBlock, Workout, ExerciseType, db
+from core.materialize import BLOCK_TEMPLATES
 
 # Load development environment
 load_dotenv('api/.env.development.local')
@@ -202,86 +203,7 @@ def create_training_plans(session, users):
 
 def create_workouts(session, plans, exercise_types):
     """Create sample workouts with exercises stored as JSON."""
-    workout_templates = {
-        'Hypertrophy Block': {
-            'exercises': [
-                {
-                    'exercise_type_id': 1,  # Squat
-                    'name': 'Squat',
-                    'sequence': 1,
-                    'planned': {
-                        'sets': 4,
-                        'reps': 10,
-                        'rpe': 7,
-                        'rest_minutes': 2
-                    }
-                },
-                {
-                    'exercise_type_id': 2,  # Bench Press
-                    'name': 'Bench Press',
-                    'sequence': 2,
-                    'planned': {
-                        'sets': 5,
-                        'reps': 8,
-                        'rpe': 7,
-                        'rest_minutes': 2
-                    }
-                }
-            ]
-        },
-        'Strength Block': {
-            'exercises': [
-                {
-                    'exercise_type_id': 1,  # Squat
-                    'name': 'Squat',
-                    'sequence': 1,
-                    'planned': {
-                        'sets': 5,
-                        'reps': 5,
-                        'rpe': 8,
-                        'rest_minutes': 3
-                    }
-                },
-                {
-                    'exercise_type_id': 3,  # Deadlift
-                    'name': 'Deadlift',
-                    'sequence': 2,
-                    'planned': {
-                        'sets': 5,
-                        'reps': 5,
-                        'rpe': 8,
-                        'rest_minutes': 3
-                    }
-                }
-            ]
-        },
-        'Peak Block': {
-            'exercises': [
-                {
-                    'exercise_type_id': 2,  # Bench Press
-                    'name': 'Bench Press',
-                    'sequence': 1,
-                    'planned': {
-                        'sets': 1,
-                        'reps': 1,
-                        'rpe': 10,
-                        'rest_minutes': 5
-                    }
-                },
-                {
-                    'exercise_type_id': 3,  # Deadlift
-                    'name': 'Deadlift',
-                    'sequence': 2,
-                    'planned': {
-                        'sets': 1,
-                        'reps': 1,
-                        'rpe': 10,
-                        'rest_minutes': 5
-                    }
-                }
-            ]
-        }
-    }
+    workout_templates = BLOCK_TEMPLATES
     
     # Get all training blocks
     blocks = []
@@ -0,0 +1,35 @@
+"""Rebuild the workout_exercise_refs index from the workouts.
+
+The migration that adds the table backfills it, so this is only needed to
+repair the index after writes that bypassed the API (manual SQL, restores)
+or on databases created with db.create_all(). The rebuild runs in one
+transaction, so readers see either the old or the new index.
+
+Usage:
+    python api/scripts/rebuild_exercise_refs.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def main():
+    from api.app import app
+    from api.core.models import db
+    from api.core.exercise_refs import rebuild_exercise_refs
+
+    with app.app_context():
+        try:
+            rows = rebuild_exercise_refs()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    print(f"Rebuilt {rows} exercise ref rows")
+
+
+if __name__ == "__main__":
+    main()
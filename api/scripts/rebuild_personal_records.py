@@ -0,0 +1,38 @@
+"""Rebuild the personal records from the workouts and set logs.
+
+Use it to backfill after adding the personal_records table, or to repair the
+records after writes that bypassed the API (manual SQL, restores). The
+rebuild runs in one transaction, so readers see either the old or the new
+records.
+
+Usage:
+    python api/scripts/rebuild_personal_records.py [user_id]
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def main():
+    user_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    from api.app import app
+    from api.core.models import db
+    from api.core.records import rebuild_records
+
+    with app.app_context():
+        try:
+            rows = rebuild_records(user_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    scope = f"user {user_id}" if user_id is not None else "all users"
+    print(f"Rebuilt {rows} personal record rows for {scope}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Rebuild the weekly volume rollups from the workouts and set logs.
+
+Use it to backfill after adding the volume_rollups table, or to repair the
+rollups after writes that bypassed the API (manual SQL, restores). The
+rebuild runs in one transaction, so readers see either the old or the new
+totals.
+
+Usage:
+    python api/scripts/rebuild_volume_rollups.py [user_id]
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def main():
+    user_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    from api.app import app
+    from api.core.models import db
+    from api.core.rollups import rebuild_volume
+
+    with app.app_context():
+        try:
+            rows = rebuild_volume(user_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    scope = f"user {user_id}" if user_id is not None else "all users"
+    print(f"Rebuilt {rows} volume rollup rows for {scope}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Shared fixtures for the API tests.
+
+Run from the repository root with ``python -m pytest``. The app is imported
+with FLASK_ENV=testing, so it runs against an in-memory SQLite database
+(see TestingConfig) with DB_QUERY_BUDGET_STRICT on: a view that exceeds its
+query_budget() fails the test.
+
+Each test gets an empty schema. Requests made with the client push their
+own app context and session, so tests that read the database afterwards
+open one with app.app_context().
+"""
+
+import os
+from contextlib import contextmanager
+
+os.environ['FLASK_ENV'] = 'testing'
+
+import pytest
+
+from api.app import app as flask_app
+from api.core.catalog import exercise_catalog
+from api.core.models import db as database, ExerciseType, TrainingBlock, TrainingPlan, User
+from api.core.query_stats import count_queries
+from api.core.search import FTS_TABLE, init_exercise_search
+
+
+@pytest.fixture(scope='session')
+def app():
+    return flask_app
+
+
+def reset_schema(app):
+    """Drop and recreate every table, including the SQLite search index."""
+    with app.app_context():
+        database.session.execute(database.text(f'DROP TABLE IF EXISTS {FTS_TABLE}'))
+        database.session.commit()
+        database.drop_all()
+        database.create_all()
+    init_exercise_search(app)
+    exercise_catalog.invalidate()
+
+
+@pytest.fixture(scope='session')
+def reset_database(app):
+    """reset_schema() for fixtures with a wider scope than db."""
+    return lambda: reset_schema(app)
+
+
+@pytest.fixture
+def db(app):
+    """An empty database for one test."""
+    reset_schema(app)
+    yield database
+    with app.app_context():
+        database.session.remove()
+
+
+@pytest.fixture
+def client(app, db):
+    return app.test_client()
+
+
+@pytest.fixture
+def query_budget():
+    """Assert that the requests made in a block execute at most n statements.
+
+    Unlike the query_budget() decorator this counts everything, including
+    version probes:
+
+        with query_budget(3):
+            client.get('/api/workouts/1', headers={'If-None-Match': '"stale"'})
+    """
+    @contextmanager
+    def budget(max_queries):
+        with count_queries() as stats:
+            yield stats
+        assert stats.count <= max_queries, f"{stats.count} SQL statements, over the budget of {max_queries}"
+    return budget
+
+
+@pytest.fixture
+def block(app, db):
+    """IDs of a user with one plan and one block, plus three exercise types."""
+    with app.app_context():
+        user = User(access_key='test_user', nickname='Tester')
+        database.session.add(user)
+        database.session.flush()
+        plan = TrainingPlan(user_id=user.id, name='Plan', progression_type='linear', target_weekly_hours=5)
+        database.session.add(plan)
+        database.session.flush()
+        training_block = TrainingBlock(plan_id=plan.id, name='Block', primary_focus='Strength',
+                                       duration_weeks=4, sequence_order=1)
+        exercise_types = [ExerciseType(name, 'Strength') for name in ('Squat', 'Bench Press', 'Deadlift')]
+        database.session.add_all([training_block, *exercise_types])
+        database.session.commit()
+        return {
+            'user_id': user.id,
+            'plan_id': plan.id,
+            'block_id': training_block.id,
+            'exercise_type_ids': [exercise_type.id for exercise_type in exercise_types]
+        }
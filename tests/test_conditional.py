@@ -0,0 +1,54 @@
+"""Query counts of the hot GET endpoints, fresh and conditional.
+
+Each view's query_budget() is the cost of a full response. A stale
+If-None-Match adds the version probe on top of it; a matching one is
+answered with 304 after the probe without loading rows.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def workout_ids(client, block):
+    response = client.post('/api/workouts/bulk', json=[
+        {'name': f'Day {day}', 'block_id': block['block_id'], 'sequence_order': day,
+         'planned_date': f'2024-01-0{day}', 'exercises': {'exercises': [
+             {'exercise_type_id': block['exercise_type_ids'][0], 'sequence': 1}
+         ]}}
+        for day in (1, 2)
+    ])
+    ids = [workout['id'] for workout in response.get_json()['workouts']]
+    client.post(f'/api/workouts/{ids[0]}/sets', json={
+        'exercise_sequence': 1, 'sets': [{'reps': 5, 'weight': '80kg'}]
+    })
+    return ids
+
+
+# (URL, queries of a full response)
+HOT_ENDPOINTS = [
+    pytest.param(lambda block, ids: f"/api/calendar?user_id={block['user_id']}&start=2024-01-01&end=2024-01-31",
+                 1, id='get_calendar'),
+    pytest.param(lambda block, ids: f'/api/workouts/{ids[0]}', 2, id='get_workout'),
+    pytest.param(lambda block, ids: f"/api/workouts?block_id={block['block_id']}", 3, id='get_workouts'),
+    pytest.param(lambda block, ids: f"/api/workouts/block/{block['block_id']}", 3, id='get_block_workouts'),
+    pytest.param(lambda block, ids: f"/api/training-blocks?plan_id={block['plan_id']}", 2,
+                 id='get_training_blocks'),
+]
+
+
+@pytest.mark.parametrize('url, budget', HOT_ENDPOINTS)
+def test_hot_endpoint_query_counts(client, block, workout_ids, query_budget, url, budget):
+    url = url(block, workout_ids)
+    with query_budget(budget):
+        response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    with query_budget(budget + 1):
+        response = client.get(url, headers={'If-None-Match': '"stale"'})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == etag
+
+    with query_budget(budget):
+        response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
@@ -0,0 +1,30 @@
+"""The hot route queries must be served by indexes.
+
+Runs the statements from scripts/check_query_plans.py against its seed
+data and fails on any sequential scan of a table, so dropping or breaking
+an index fails the suite instead of waiting for someone to run the script.
+"""
+
+import pytest
+
+from api.core.models import db
+from api.scripts.check_query_plans import hot_queries, postgres_seq_scans, seed, sqlite_seq_scans
+
+
+@pytest.fixture(scope='module')
+def seeded(app, reset_database):
+    reset_database()
+    with app.app_context():
+        seed(db)
+        db.session.remove()
+
+
+@pytest.mark.parametrize('name', list(hot_queries('sqlite')))
+def test_hot_query_uses_indexes(app, seeded, name):
+    with app.app_context():
+        dialect = db.engine.dialect
+        stmt = hot_queries(dialect.name)[name]
+        sql = str(stmt.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+        explain = sqlite_seq_scans if dialect.name == 'sqlite' else postgres_seq_scans
+        scans, details = explain(db, sql)
+    assert not scans, f"{name} scans a table without an index: {details}"
@@ -0,0 +1,34 @@
+import pytest
+from flask import Flask, g
+from sqlalchemy import inspect
+
+from api.core.models import db, init_db, ExerciseType
+from api.core.routing import REPLICA_BIND, init_read_routing, replica_binds
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    """A bare app on SQLite files with a replica bind."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'primary.db'}"
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(f"sqlite:///{tmp_path / 'replica.db'}", {})
+    init_db(app)
+    yield app
+    # init_app() registered metadata for the bind, which the test app's drop_all() would visit
+    db.metadatas.pop(REPLICA_BIND, None)
+
+
+def test_sqlite_replica_is_seeded_from_primary(replica_app):
+    with replica_app.app_context():
+        db.session.add(ExerciseType('Squat', 'Strength'))
+        db.session.commit()
+
+    init_read_routing(replica_app)
+
+    with replica_app.test_request_context('/api/exercise-types'):
+        replica_app.preprocess_request()
+        assert g.db_read_replica
+        assert db.session.get_bind() is db.engines[REPLICA_BIND]
+        assert set(db.metadata.tables) <= set(inspect(db.engines[REPLICA_BIND]).get_table_names())
+        assert db.session.scalars(db.select(ExerciseType.name)).all() == ['Squat']
+        db.session.remove()
@@ -0,0 +1,75 @@
+import pytest
+
+from api.core.models import db, SetLog
+
+
+@pytest.mark.parametrize('sessions_per_week', ['3', 2.5, True, 0, 8, None])
+def test_generate_rejects_invalid_sessions_per_week(client, block, sessions_per_week):
+    response = client.post(f"/api/training-plans/{block['plan_id']}/generate",
+                           json={'sessions_per_week': sessions_per_week})
+    assert response.status_code == 400
+    assert 'sessions_per_week' in response.get_json()['error']
+
+
+def test_generate_with_sessions_per_week(client, block):
+    template = {'exercises': [{'exercise_type_id': block['exercise_type_ids'][0], 'sequence': 1,
+                               'planned': {'sets': 5, 'reps': 5}}]}
+    response = client.post(f"/api/training-plans/{block['plan_id']}/generate", json={
+        'start_date': '2024-01-01', 'sessions_per_week': 3, 'templates': {'Block': template}
+    })
+    assert response.status_code == 201
+    assert response.get_json()['workouts_created'] == 4 * 3
+
+
+def test_tree_merges_logged_sets_within_three_queries(client, block):
+    response = client.post('/api/workouts/bulk', json=[
+        {'name': f'Day {day}', 'block_id': block['block_id'], 'sequence_order': day,
+         'planned_date': f'2024-01-0{day}', 'exercises': {'exercises': [
+             {'exercise_type_id': block['exercise_type_ids'][0], 'sequence': 1}
+         ]}}
+        for day in (1, 2)
+    ])
+    workout_ids = [workout['id'] for workout in response.get_json()['workouts']]
+    for workout_id in workout_ids:
+        client.post(f'/api/workouts/{workout_id}/sets', json={
+            'exercise_sequence': 1, 'timestamp': '2024-01-01T10:00:00',
+            'sets': [{'reps': 5, 'weight': '80kg'}, {'reps': 5, 'weight': '85kg'}]
+        })
+
+    # DB_QUERY_BUDGET_STRICT fails the request if it needs a fourth query
+    response = client.get(f"/api/training-plans/{block['plan_id']}/tree")
+    assert response.status_code == 200
+    workouts = response.get_json()['blocks'][0]['workouts']
+    assert [workout['id'] for workout in workouts] == workout_ids
+    for workout in workouts:
+        sets = workout['exercises']['exercises'][0]['logs'][0]['sets']
+        assert [exercise_set['weight'] for exercise_set in sets] == ['80kg', '85kg']
+
+
+def test_regenerate_with_replace_deletes_logged_sets(app, client, block):
+    template = {'exercises': [{'exercise_type_id': block['exercise_type_ids'][0], 'sequence': 1,
+                               'planned': {'sets': 5, 'reps': 5}}]}
+    generate = {'start_date': '2024-01-01', 'sessions_per_week': 3, 'templates': {'Block': template}}
+    assert client.post(f"/api/training-plans/{block['plan_id']}/generate", json=generate).status_code == 201
+    workout_id = client.get(f"/api/workouts/block/{block['block_id']}").get_json()[2]['id']
+    client.post(f'/api/workouts/{workout_id}/sets', json={
+        'exercise_sequence': 1, 'timestamp': '2024-01-05T10:00:00', 'sets': [{'reps': 5, 'weight': '200kg'}]
+    })
+
+    response = client.post(f"/api/training-plans/{block['plan_id']}/generate", json={**generate, 'replace': True})
+    assert response.status_code == 201
+
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.count()).select_from(SetLog)) == 0
+    for workout in client.get(f"/api/workouts/block/{block['block_id']}").get_json():
+        assert 'logs' not in workout['exercises']['exercises'][0]
+    assert client.get(f"/api/users/{block['user_id']}/records").get_json() == []
+
+
+@pytest.mark.parametrize('body', [
+    {'start_date': 20240101}, {'start_date': ['2024-01-01']}, {'days': [True]}, {'days': [0, False]}
+])
+def test_generate_rejects_invalid_start_date_and_days(client, block, body):
+    response = client.post(f"/api/training-plans/{block['plan_id']}/generate", json=body)
+    assert response.status_code == 400
+    assert next(iter(body)) in response.get_json()['error']
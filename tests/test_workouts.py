@@ -0,0 +1,190 @@
+import json
+
+import pytest
+
+from api.core.models import db, PersonalRecord, SetLog, VolumeRollup, WorkoutExerciseRef
+
+
+def create_workout(client, block, exercises):
+    response = client.post('/api/workouts/bulk', json=[{
+        'name': 'Day 1', 'block_id': block['block_id'], 'sequence_order': 1,
+        'planned_date': '2024-01-01', 'exercises': exercises
+    }])
+    assert response.status_code == 201
+    return response.get_json()['workouts'][0]['id']
+
+
+def logged_sets(workout):
+    return [exercise_set for exercise in workout['exercises']['exercises']
+            for log in exercise.get('logs') or [] for exercise_set in log['sets']]
+
+
+def test_put_round_trip_keeps_logged_sets_once(app, client, block):
+    exercises = {'exercises': [{
+        'exercise_type_id': block['exercise_type_ids'][0], 'sequence': 1,
+        'logs': [{'timestamp': '2024-01-01T10:00:00', 'sets': [{'reps': 5, 'weight': '100kg'}]}]
+    }]}
+    workout_id = create_workout(client, block, exercises)
+    response = client.post(f'/api/workouts/{workout_id}/sets', json={
+        'exercise_sequence': 1, 'timestamp': '2024-01-01T11:00:00',
+        'sets': [{'reps': 5, 'weight': '80kg'}, {'reps': 5, 'weight': '82.5kg'}]
+    })
+    assert response.status_code == 201
+
+    workout = client.get(f'/api/workouts/{workout_id}').get_json()
+    assert len(logged_sets(workout)) == 3
+    with app.app_context():
+        volume = db.session.execute(db.select(VolumeRollup.sets, VolumeRollup.tonnage)).all()
+
+    response = client.put(f'/api/workouts/{workout_id}', json={'exercises': workout['exercises']})
+    assert response.status_code == 200
+
+    assert client.get(f'/api/workouts/{workout_id}').get_json()['exercises'] == workout['exercises']
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.count()).select_from(SetLog)) == 2
+        assert db.session.execute(db.select(VolumeRollup.sets, VolumeRollup.tonnage)).all() == volume
+
+
+def test_merge_patch_round_trip_keeps_logged_sets_once(client, block):
+    workout_id = create_workout(client, block, {'exercises': [
+        {'exercise_type_id': block['exercise_type_ids'][0], 'sequence': 1}
+    ]})
+    client.post(f'/api/workouts/{workout_id}/sets', json={
+        'exercise_sequence': 1, 'timestamp': '2024-01-01T11:00:00', 'sets': [{'reps': 5, 'weight': '80kg'}]
+    })
+    workout = client.get(f'/api/workouts/{workout_id}').get_json()
+
+    response = client.patch(f'/api/workouts/{workout_id}/exercises', data=json.dumps(
+        {'exercises': workout['exercises']['exercises']}
+    ), content_type='application/merge-patch+json')
+    assert response.status_code == 204
+
+    assert client.get(f'/api/workouts/{workout_id}').get_json()['exercises'] == workout['exercises']
+
+
+def test_json_patch_updates_volume(app, client, block):
+    workout_id = create_workout(client, block, {'exercises': [
+        {'exercise_type_id': block['exercise_type_ids'][0], 'sequence': 1, 'logs': []}
+    ]})
+
+    response = client.patch(f'/api/workouts/{workout_id}/exercises', json=[{
+        'op': 'add', 'path': '/exercises/0/logs/-',
+        'value': {'timestamp': '2024-01-01T10:00:00', 'sets': [{'reps': 5, 'weight': '100kg'}]}
+    }])
+    assert response.status_code == 204
+
+    with app.app_context():
+        assert db.session.execute(db.select(VolumeRollup.sets, VolumeRollup.tonnage)).all() == [(1, 500)]
+
+
+def test_create_rejects_duplicate_sequence_order(client, block):
+    workout = {'name': 'Day 1', 'block_id': block['block_id'], 'sequence_order': 1,
+               'planned_date': '2024-01-01', 'exercises': {'exercises': []}}
+    assert client.post('/api/workouts', json=workout).status_code == 201
+
+    response = client.post('/api/workouts', json={**workout, 'name': 'Day 1 again'})
+    assert response.status_code == 409
+
+
+def test_create_writes_exercise_refs_records_and_volume(app, client, block):
+    squat, bench, _ = block['exercise_type_ids']
+    response = client.post('/api/workouts', json={
+        'name': 'Day 1', 'block_id': block['block_id'], 'sequence_order': 1, 'planned_date': '2024-01-01',
+        'exercises': {'exercises': [
+            {'exercise_type_id': squat, 'sequence': 1, 'logs': [
+                {'timestamp': '2024-01-01T10:00:00', 'sets': [{'reps': 5, 'weight': '100kg'}]}
+            ]},
+            {'exercise_type_id': bench, 'sequence': 2}
+        ]}
+    })
+    assert response.status_code == 201
+    workout_id = response.get_json()['id']
+
+    with app.app_context():
+        assert set(db.session.execute(
+            db.select(WorkoutExerciseRef.exercise_type_id, WorkoutExerciseRef.workout_id)
+        ).tuples()) == {(squat, workout_id), (bench, workout_id)}
+        assert db.session.execute(db.select(
+            PersonalRecord.exercise_type_id, PersonalRecord.rep_count, PersonalRecord.weight, PersonalRecord.workout_id
+        )).tuples().all() == [(squat, 5, 100, workout_id)]
+        assert db.session.execute(
+            db.select(VolumeRollup.exercise_type_id, VolumeRollup.sets, VolumeRollup.tonnage)
+        ).tuples().all() == [(squat, 1, 500)]
+
+
+@pytest.mark.parametrize('field, value', [
+    ('block_id', [1]), ('block_id', True), ('sequence_order', True), ('sequence_order', '2'),
+    ('planned_date', 5), ('planned_date', '2024-13-01'), ('actual_date', ['2024-01-01'])
+])
+def test_bulk_create_reports_malformed_items(client, block, field, value):
+    valid = {'name': 'Day 1', 'block_id': block['block_id'], 'sequence_order': 1,
+             'planned_date': '2024-01-01', 'exercises': {'exercises': []}}
+    response = client.post('/api/workouts/bulk', json=[valid, {**valid, 'sequence_order': 2, field: value}])
+    assert response.status_code == 207
+    body = response.get_json()
+    assert len(body['workouts']) == 1
+    assert body['errors'] == [{'index': 1, 'status': 400, 'error': body['errors'][0]['error']}]
+    assert field in body['errors'][0]['error']
+
+
+MALFORMED_EXERCISES = [
+    {'exercises': 5},
+    {'exercises': [{'exercise_type_id': 1, 'sequence': 1, 'logs': 5}]},
+    {'exercises': [{'exercise_type_id': 1, 'sequence': 1, 'logs': [{'timestamp': '2024-01-01T10:00:00', 'sets': 5}]}]},
+]
+
+
+@pytest.mark.parametrize('exercises', MALFORMED_EXERCISES)
+def test_writes_accept_documents_without_lists(client, block, exercises):
+    workout = {'name': 'Day 1', 'block_id': block['block_id'], 'sequence_order': 1,
+               'planned_date': '2024-01-01', 'exercises': exercises}
+    response = client.post('/api/workouts', json=workout)
+    assert response.status_code == 201
+    workout_id = response.get_json()['id']
+
+    assert client.put(f'/api/workouts/{workout_id}', json={'exercises': exercises}).status_code == 200
+    response = client.patch('/api/workouts/bulk', json=[{'id': workout_id, 'exercises': exercises}])
+    assert response.status_code == 200
+    response = client.post('/api/workouts/bulk', json=[{**workout, 'sequence_order': 2}])
+    assert response.status_code == 201
+
+
+def test_merge_patch_accepts_exercises_that_are_not_a_list(client, block):
+    workout_id = create_workout(client, block, {'exercises': []})
+    response = client.patch(f'/api/workouts/{workout_id}/exercises', data=json.dumps({'exercises': 7}),
+                            content_type='application/merge-patch+json')
+    assert response.status_code == 204
+
+
+def test_json_patch_pointers_from_a_read_address_stored_entries(client, block):
+    workout_id = create_workout(client, block, {'exercises': [
+        {'exercise_type_id': block['exercise_type_ids'][0], 'sequence': 1,
+         'logs': [{'timestamp': '2024-01-02T10:00:00', 'sets': [{'reps': 5, 'weight': '100kg'}]}]}
+    ]})
+    # Logged before the stored entry
+    client.post(f'/api/workouts/{workout_id}/sets', json={
+        'exercise_sequence': 1, 'timestamp': '2024-01-01T10:00:00', 'sets': [{'reps': 3, 'weight': '80kg'}]
+    })
+    logs = client.get(f'/api/workouts/{workout_id}').get_json()['exercises']['exercises'][0]['logs']
+    assert [log['timestamp'] for log in logs] == ['2024-01-02T10:00:00', '2024-01-01T10:00:00']
+
+    response = client.patch(f'/api/workouts/{workout_id}/exercises', json=[
+        {'op': 'test', 'path': '/exercises/0/logs/0/sets/0/reps', 'value': 5},
+        {'op': 'replace', 'path': '/exercises/0/logs/0/sets/0/reps', 'value': 6}
+    ])
+    assert response.status_code == 204
+
+    logs = client.get(f'/api/workouts/{workout_id}').get_json()['exercises']['exercises'][0]['logs']
+    assert logs[0]['sets'] == [{'reps': 6, 'weight': '100kg'}]
+    assert logs[1]['sets'] == [{'reps': 3, 'weight': '80kg', 'source': 'set_log'}]
+
+
+@pytest.mark.parametrize('timestamp', [123, ['2024-01-01T10:00:00'], 'yesterday'])
+def test_log_sets_rejects_invalid_timestamp(client, block, timestamp):
+    workout_id = create_workout(client, block, {'exercises': [
+        {'exercise_type_id': block['exercise_type_ids'][0], 'sequence': 1}
+    ]})
+    response = client.post(f'/api/workouts/{workout_id}/sets', json={
+        'exercise_sequence': 1, 'timestamp': timestamp, 'sets': [{'reps': 5}]
+    })
+    assert response.status_code == 400